@@ -8,15 +8,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi.errors import RateLimitExceeded
 from fastapi.responses import JSONResponse
-from routers import auth, workouts, settings, routines, internal
+from routers import auth, workouts, settings, routines, reports, exercises, sync, internal
 from config import limiter
 from lib.database_lib import indexes
+from lib.misc.hashing_pool import HashingPoolFull
+from lib.misc.error_handler import ErrorMessage
 from fastapi.responses import JSONResponse
 import config 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    indexes.EnsureIndexes()
+    await indexes.EnsureIndexes()
     yield    
 
 app = FastAPI(title="Workout Tracker", lifespan=lifespan)
@@ -29,6 +31,14 @@ async def rate_limit_handler(request, exc):
         content={"detail": "Too many requests. Please try again later."}
     )
 
+@app.exception_handler(HashingPoolFull)
+async def hashing_pool_full_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": ErrorMessage.SERVER_BUSY},
+        headers={"Retry-After": "1"}
+    )
+
 origins = [
     "http://localhost:5173",  # Dev frontend
     config.FRONTEND_URL,  # Prod frontend
@@ -40,12 +50,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],         # GET, POST, PUT, DELETE, OPTIONS
     allow_headers=["*"],         # Content-Type, Authorization, etc.
+    expose_headers=[config.NEXT_CURSOR_HEADER, "ETag"],  # Pagination cursor and version tag for list endpoints
 )
 
 app.include_router(auth.router)
 app.include_router(workouts.router)
 app.include_router(settings.router)
 app.include_router(routines.router)
+app.include_router(reports.router)
+app.include_router(exercises.router)
+app.include_router(sync.router)
 app.include_router(internal.router)
 
 @app.get("/")
@@ -0,0 +1,70 @@
+"""
+Concurrent request throughput of the data-access layer, before and after the
+move to the async client.
+
+"before" replays the old behaviour: a coroutine calling a blocking pymongo
+helper inline, which serializes every concurrent request on the event loop.
+"after" awaits the async helpers, so round trips overlap.
+
+Run from backend/src against a reachable MONGO_URI:
+    python -m benchmarks.async_db_throughput --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from pymongo import MongoClient
+import config
+from lib.database_lib.workouts import workout_methods
+
+def ListWorkoutsBlocking(sync_client: MongoClient, user_id: str) -> list:
+    collection = sync_client[config.MONGO_DB_NAME]["workouts"]
+
+    return list(collection.find({"user_id": user_id}).sort("scheduled_date", -1).limit(50))
+
+async def RunBefore(sync_client: MongoClient, user_id: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            ListWorkoutsBlocking(sync_client, user_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(requests)))
+
+    return time.perf_counter() - start
+
+async def RunAfter(user_id: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            await workout_methods.GetWorkoutsForUser(user_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(requests)))
+
+    return time.perf_counter() - start
+
+async def Main(requests: int, concurrency: int, user_id: str) -> None:
+    sync_client = MongoClient(config.MONGO_URI)
+
+    # Warm up both connection pools so neither run pays for the handshakes.
+    ListWorkoutsBlocking(sync_client, user_id)
+    await workout_methods.GetWorkoutsForUser(user_id)
+
+    before = await RunBefore(sync_client, user_id, requests, concurrency)
+    after = await RunAfter(user_id, requests, concurrency)
+    sync_client.close()
+
+    print(f"database={config.MONGO_DB_NAME} requests={requests} concurrency={concurrency}")
+    print(f"before (blocking pymongo): {before:.3f}s  {requests / before:.1f} req/s")
+    print(f"after  (async pymongo):    {after:.3f}s  {requests / after:.1f} req/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--user-id", default="benchmark-user")
+    args = parser.parse_args()
+
+    asyncio.run(Main(args.requests, args.concurrency, args.user_id))
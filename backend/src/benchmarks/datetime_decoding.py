@@ -0,0 +1,81 @@
+"""
+CPU time and allocations for turning one 100-workout page of raw BSON into
+response-ready documents, before and after tz-aware decoding.
+
+"before" replays the old behaviour: naive datetimes from the driver, then a
+deepcopy of every document (exercises included) to attach tzinfo to three keys.
+"after" decodes with the client's tz-aware codec options and only renames _id.
+
+Needs no database; runs from backend/src:
+    python -m benchmarks.datetime_decoding --workouts 100 --repeat 200
+"""
+import argparse
+import timeit
+import tracemalloc
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId, decode_all, encode
+from bson.codec_options import CodecOptions
+from lib.database_lib.database_config import CODEC_OPTIONS
+from lib.database_lib.workouts.general_methods import FormatEntry
+
+NAIVE_CODEC_OPTIONS = CodecOptions()
+
+def BuildPage(workouts: int) -> bytes:
+    now = datetime.now(timezone.utc)
+    documents = []
+
+    for i in range(workouts):
+        documents.append({
+            "_id": ObjectId(),
+            "user_id": "benchmark-user",
+            "name": f"Workout {i}",
+            "scheduled_date": now - timedelta(days=i),
+            "created_at": now - timedelta(days=i, hours=1),
+            "exercises": [
+                {"name": f"exercise {j}", "sets": 4, "reps": 8, "weight": 100.0 + j}
+                for j in range(8)
+            ],
+        })
+
+    return b"".join(encode(document) for document in documents)
+
+def OldMakeDatetimeAware(document: dict) -> dict:
+    document = deepcopy(document)
+
+    for key in ("scheduled_date", "created_at", "expires_at"):
+        if isinstance(document.get(key), datetime) and document[key].tzinfo is None:
+            document[key] = document[key].replace(tzinfo=timezone.utc)
+
+    return document
+
+def Before(page: bytes) -> list:
+    return [FormatEntry(OldMakeDatetimeAware(document)) for document in decode_all(page, NAIVE_CODEC_OPTIONS)]
+
+def After(page: bytes) -> list:
+    return [FormatEntry(document) for document in decode_all(page, CODEC_OPTIONS)]
+
+def MeasurePeakBytes(fn, page: bytes) -> int:
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+def Main(workouts: int, repeat: int) -> None:
+    page = BuildPage(workouts)
+    assert Before(page) == After(page)
+
+    for label, fn in (("before (naive + deepcopy)", Before), ("after  (tz-aware codec) ", After)):
+        seconds = min(timeit.repeat(lambda: fn(page), number=repeat, repeat=5)) / repeat
+        peak = MeasurePeakBytes(fn, page)
+        print(f"{label}: {seconds * 1000:.3f} ms/page  peak {peak / 1024:.1f} KiB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workouts", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    Main(args.workouts, args.repeat)
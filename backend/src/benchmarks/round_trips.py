@@ -0,0 +1,26 @@
+from collections import Counter
+from pymongo import monitoring
+
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue", "buildInfo"}
+
+class RoundTripCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.by_collection = Counter()
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+
+        target = event.command.get(event.command_name)
+        self.by_collection[target if isinstance(target, str) else event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def Take(self) -> Counter:
+        counts, self.by_collection = self.by_collection, Counter()
+
+        return counts
@@ -0,0 +1,74 @@
+"""
+Counts MongoDB round trips per auth/settings endpoint.
+
+Every command the server receives is recorded by a pymongo command listener
+and grouped by collection. Connection handshakes and monitoring pings are
+ignored. Before the user repository, /auth/login alone made 5-6 reads of the
+users collection (7-8 round trips with the refresh token writes).
+
+Run from backend/src against a reachable MONGO_URI:
+    python -m benchmarks.user_round_trips
+"""
+import asyncio
+import secrets
+import httpx
+from pymongo import monitoring
+from benchmarks.round_trips import RoundTripCounter
+
+counter = RoundTripCounter()
+# Listeners only attach to clients created after registration, so this runs before any import touches the database.
+monitoring.register(counter)
+
+from app import app
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.users import auth_helper
+from lib.database_lib.users import general_methods as general_user_methods
+from lib.database_lib.users import reset_password as reset_password_methods
+from bson import ObjectId
+
+def Report(endpoint: str, status_code: int) -> None:
+    counts = counter.Take()
+    detail = ", ".join(f"{name}={count}" for name, count in sorted(counts.items()))
+    print(f"{endpoint:<28} status={status_code}  round_trips={sum(counts.values()):<3} ({detail})")
+
+async def Main() -> None:
+    suffix = secrets.token_hex(4)
+    email = f"benchmark-{suffix}@example.com"
+    username = f"benchmark-{suffix}"
+    password = "Benchmark123!"
+
+    user_id = await general_user_methods.CreateUser(email, username, await auth_helper.GetPasswordHash(password))
+    counter.Take()
+
+    transport = httpx.ASGITransport(app=app)
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            response = await client.post("/auth/login", json={"email_or_username": username, "password": password})
+            Report("POST /auth/login (username)", response.status_code)
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            response = await client.post("/auth/refresh")
+            Report("POST /auth/refresh", response.status_code)
+
+            response = await client.get("/settings/", headers=headers)
+            Report("GET /settings/ (cold cache)", response.status_code)
+
+            response = await client.get("/settings/", headers=headers)
+            Report("GET /settings/ (warm cache)", response.status_code)
+
+            raw_token = await reset_password_methods.StorePasswordResetToken(ObjectId(user_id))
+            counter.Take()
+            response = await client.post(
+                "/auth/reset-password",
+                json={"email": email, "token": raw_token, "password": password}
+            )
+            Report("POST /auth/reset-password", response.status_code)
+    finally:
+        db = GetDb()
+        await db["users"].delete_one({"_id": ObjectId(user_id)})
+        await db["refresh_sessions"].delete_many({"user_id": user_id})
+        await db["password_reset_tokens"].delete_many({"user_id": ObjectId(user_id)})
+
+if __name__ == "__main__":
+    asyncio.run(Main())
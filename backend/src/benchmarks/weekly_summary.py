@@ -0,0 +1,155 @@
+"""
+Round trips and wall time for building every user's weekly summary, before and
+after the batched aggregations. No email is sent; only the summaries are built.
+
+"before" replays the old per-user loop: one aggregation per exercise of every
+weekly workout plus a read of the user's whole history for the streak.
+"after" runs tasks.BuildWeeklySummaries over keyset batches of users.
+
+The benchmark seeds synthetic users and workouts, so it refuses to run against
+the app's default database. Run from backend/src against a reachable MONGO_URI:
+    MONGO_DB_NAME=weekly_summary_benchmark python -m benchmarks.weekly_summary --users 10000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import monitoring
+from benchmarks.round_trips import RoundTripCounter
+
+counter = RoundTripCounter()
+# Listeners only attach to clients created after registration, so this runs before any import touches the database.
+monitoring.register(counter)
+
+import config
+from lib.database_lib.database_config import GetClient, GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from scripts.backfill_workout_day_counters import Backfill as BackfillWorkoutDayCounters
+from scripts.rebuild_activity_days import Rebuild as RebuildActivityDays
+from scripts.rebuild_personal_records import Rebuild as RebuildPersonalRecords
+import tasks
+
+EXERCISES = ["bench press", "squat", "deadlift", "overhead press", "barbell row", "pull up", "dip", "curl"]
+
+async def Seed(users: int, workouts_per_user: int, days: int) -> None:
+    db = GetDb()
+    await EnsureIndexes()
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+
+    for start in range(0, users, 1000):
+        batch = [{"email": f"user{i}@example.com", "username": f"user{i}"} for i in range(start, min(start + 1000, users))]
+        result = await db["users"].insert_many(batch)
+        workouts = []
+
+        for user_id in result.inserted_ids:
+            for n in range(workouts_per_user):
+                workouts.append({
+                    "user_id": str(user_id),
+                    "name": f"Workout {n}",
+                    "normalized_name": f"workout{n}",
+                    "scheduled_date": now - timedelta(days=rng.randrange(days), hours=rng.randrange(24)),
+                    "created_at": now,
+                    "exercises": [
+                        {"name": name, "sets": 3, "reps": rng.randint(1, 12), "weight": float(rng.randrange(45, 400, 5))}
+                        for name in rng.sample(EXERCISES, 4)
+                    ],
+                })
+
+        await db["workouts"].insert_many(workouts)
+
+    await RebuildPersonalRecords(None, 1000)
+    await BackfillWorkoutDayCounters(1000)
+    await RebuildActivityDays(1000)
+
+def CountStreak(days: set, today) -> int:
+    streak = 0
+    check_date = today
+
+    while check_date.isoformat() in days:
+        streak += 1
+        check_date -= timedelta(days=1)
+
+    return streak
+
+async def LegacySummaries(now: datetime) -> int:
+    db = GetDb()
+    week_ago = now - timedelta(days=7)
+    built = 0
+
+    async for user in db["users"].find({}):
+        user_id = str(user["_id"])
+        weekly_workouts = await db["workouts"].find({
+            "user_id": user_id,
+            "scheduled_date": {"$gte": week_ago, "$lte": now}
+        }).to_list()
+
+        if not weekly_workouts:
+            continue
+
+        prs = []
+
+        for workout in weekly_workouts:
+            for exercise in workout.get("exercises", []):
+                pipeline = [
+                    {"$match": {"user_id": user_id, "scheduled_date": {"$lt": week_ago}}},
+                    {"$unwind": "$exercises"},
+                    {"$match": {"exercises.name": exercise["name"]}},
+                    {"$group": {"_id": None, "max_weight": {"$max": "$exercises.weight"}}},
+                ]
+                result = await (await db["workouts"].aggregate(pipeline)).to_list()
+
+                if not result or exercise["weight"] > result[0]["max_weight"]:
+                    prs.append(exercise["name"])
+
+        days = {w["scheduled_date"].date().isoformat() async for w in db["workouts"].find({"user_id": user_id})}
+        tasks.FormatWeeklySummary(len(weekly_workouts), sorted(set(prs)), CountStreak(days, now.date()))
+        built += 1
+
+    return built
+
+async def BatchedSummaries(now: datetime, batch_size: int) -> int:
+    # The same keyset batches the weekly summary slices hand out, without the job bookkeeping.
+    users = GetDb()["users"]
+    query = {}
+    built = 0
+
+    while batch := await users.find(query, {"_id": 1, "email": 1}).sort("_id", 1).limit(batch_size).to_list():
+        built += len(await tasks.BuildWeeklySummaries(batch, now))
+        query = {"_id": {"$gt": batch[-1]["_id"]}}
+
+    return built
+
+async def Measure(label: str, run) -> None:
+    counter.Take()
+    start = time.perf_counter()
+    built = await run()
+    elapsed = time.perf_counter() - start
+    round_trips = sum(counter.Take().values())
+    print(f"{label}: {elapsed:.2f}s  round_trips={round_trips}  summaries={built}")
+
+async def Main(users: int, workouts_per_user: int, days: int, batch_size: int, keep: bool) -> None:
+    try:
+        await Seed(users, workouts_per_user, days)
+        now = datetime.now(timezone.utc)
+        print(f"users={users} workouts_per_user={workouts_per_user} days={days} batch_size={batch_size}")
+        await Measure("before (per-user loop)   ", lambda: LegacySummaries(now))
+        await Measure("after  (batched pipeline)", lambda: BatchedSummaries(now, batch_size))
+    finally:
+        if not keep:
+            await GetClient().drop_database(config.MONGO_DB_NAME)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--workouts-per-user", type=int, default=12)
+    parser.add_argument("--days", type=int, default=60, help="Workouts are spread over this many past days")
+    parser.add_argument("--batch-size", type=int, default=config.WEEKLY_SUMMARY_BATCH_SIZE)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    args = parser.parse_args()
+
+    if config.MONGO_DB_NAME == "database":
+        parser.error("set MONGO_DB_NAME to a scratch database; this benchmark seeds and drops it")
+
+    asyncio.run(Main(args.users, args.workouts_per_user, args.days, args.batch_size, args.keep))
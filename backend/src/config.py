@@ -7,16 +7,60 @@ from slowapi.util import get_remote_address
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / '.env')
 MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "database")
 SECRET_KEY = os.getenv("SECRET_KEY")
 LINK_EXPIRATION_MINUTES = int(os.getenv("LINK_EXPIRATION_MINUTES", 30))
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", 15))
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 SENDER_EMAIL_PASSWORD = os.getenv("SENDER_EMAIL_PASSWORD")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+SMTP_POOL_MAX_QUEUE = int(os.getenv("SMTP_POOL_MAX_QUEUE", 100))
 REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", 30))
+MAXIMUM_SESSIONS_PER_USER = int(os.getenv("MAXIMUM_SESSIONS_PER_USER", 5))
 IS_PRODUCTION = os.getenv("ENVIRONMENT") == "production"
 MAXIMUM_WORKOUTS_PER_DAY = int(os.getenv("MAXIMUM_WORKOUTS_PER_DAY", 5))
 CRON_SECRET = os.getenv("CRON_SECRET")
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+HASHING_POOL_WORKERS = int(os.getenv("HASHING_POOL_WORKERS", 4))
+HASHING_POOL_MAX_QUEUE = int(os.getenv("HASHING_POOL_MAX_QUEUE", 32))
+VERIFIED_USER_CACHE_SIZE = int(os.getenv("VERIFIED_USER_CACHE_SIZE", 10000))
+VERIFIED_USER_CACHE_TTL_SECONDS = int(os.getenv("VERIFIED_USER_CACHE_TTL_SECONDS", 120))
+EXERCISE_CATALOG_CACHE_SIZE = int(os.getenv("EXERCISE_CATALOG_CACHE_SIZE", 5000))
+EXERCISE_CATALOG_CACHE_TTL_SECONDS = int(os.getenv("EXERCISE_CATALOG_CACHE_TTL_SECONDS", 300))
+# Serialized workout and routine list responses are kept per process up to this many bytes.
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+WEEKLY_SUMMARY_BATCH_SIZE = int(os.getenv("WEEKLY_SUMMARY_BATCH_SIZE", 500))
+# Summaries are sent concurrently in groups of this many, with the deadline checked between groups.
+WEEKLY_SUMMARY_SEND_BATCH_SIZE = int(os.getenv("WEEKLY_SUMMARY_SEND_BATCH_SIZE", 50))
+# One /internal/weekly-summary call stops after this many users or seconds, whichever comes first.
+WEEKLY_SUMMARY_MAX_USERS = int(os.getenv("WEEKLY_SUMMARY_MAX_USERS", 5000))
+WEEKLY_SUMMARY_MAX_SECONDS = int(os.getenv("WEEKLY_SUMMARY_MAX_SECONDS", 45))
+WEEKLY_SUMMARY_LEASE_SECONDS = int(os.getenv("WEEKLY_SUMMARY_LEASE_SECONDS", 120))
+# A slice whose sends failed for some users is tried again after WEEKLY_SUMMARY_RETRY_SECONDS,
+# up to WEEKLY_SUMMARY_MAX_ATTEMPTS times, before those users are skipped for the week.
+WEEKLY_SUMMARY_MAX_ATTEMPTS = int(os.getenv("WEEKLY_SUMMARY_MAX_ATTEMPTS", 3))
+WEEKLY_SUMMARY_RETRY_SECONDS = int(os.getenv("WEEKLY_SUMMARY_RETRY_SECONDS", 300))
+# Background jobs: a failed job is retried after JOB_BACKOFF_BASE_SECONDS, doubling up to
+# JOB_BACKOFF_MAX_SECONDS, and a job not finished within JOB_VISIBILITY_TIMEOUT_SECONDS is run again.
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", 10))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", 600))
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", 120))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 2))
+# One /internal/jobs call stops claiming jobs after this many seconds.
+JOB_RUN_MAX_SECONDS = float(os.getenv("JOB_RUN_MAX_SECONDS", 45))
+# Signup and reset emails are retried on the same backoff until EMAIL_OUTBOX_MAX_ATTEMPTS.
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 60))
+# A sync starts SYNC_OVERLAP_SECONDS before the previous one ended, to pick up writes that
+# committed late, and deletions are remembered for SYNC_TOMBSTONE_TTL_DAYS.
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", 10))
+SYNC_TOMBSTONE_TTL_DAYS = int(os.getenv("SYNC_TOMBSTONE_TTL_DAYS", 30))
+# Personal record checks wait this long so workouts logged in a burst share one email.
+PERSONAL_RECORDS_CHECK_DELAY_SECONDS = float(os.getenv("PERSONAL_RECORDS_CHECK_DELAY_SECONDS", 30))
 
 # Centralized rate limiter instance
 limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
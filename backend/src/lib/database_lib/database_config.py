@@ -1,23 +1,28 @@
-from copy import deepcopy
+import asyncio
 from datetime import timezone
-from typing import Any, Dict, Optional
-from pymongo import MongoClient
+from weakref import WeakKeyDictionary
+from bson.codec_options import CodecOptions
+from pymongo import AsyncMongoClient
 import config
 
 MONGO_URI = config.MONGO_URI
-client = MongoClient(MONGO_URI)
+# Datetimes are decoded as UTC-aware values by the driver itself, so documents
+# can go straight to the AwareDatetime response models without any fixing up.
+CODEC_OPTIONS = CodecOptions(tz_aware=True, tzinfo=timezone.utc)
 
-def GetDb():
-    return client["database"]
+# AsyncMongoClient binds itself to the event loop it first runs on, so every loop
+# (the uvicorn loop, a TestClient portal, a script's asyncio.run) gets its own client.
+_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMongoClient]" = WeakKeyDictionary()
+
+def GetClient() -> AsyncMongoClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+
+    if client is None:
+        client = AsyncMongoClient(MONGO_URI, tz_aware=CODEC_OPTIONS.tz_aware, tzinfo=CODEC_OPTIONS.tzinfo)
+        _clients[loop] = client
 
-def MakeDatetimeAware(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    if not doc:
-        return doc
-    
-    doc_copy = deepcopy(doc)
-    
-    for key in ["created_at", "scheduled_date", "expires_at"]:
-        if doc_copy.get(key) and doc_copy[key].tzinfo is None:
-            doc_copy[key] = doc_copy[key].replace(tzinfo=timezone.utc)
-    
-    return doc_copy
\ No newline at end of file
+    return client
+
+def GetDb():
+    return GetClient()[config.MONGO_DB_NAME]
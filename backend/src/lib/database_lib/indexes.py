@@ -29,19 +29,27 @@ INDEX_DEFINITIONS = {
             [("expires_at", pymongo.ASCENDING)],
             {"expireAfterSeconds": 0, "name": "pending_users_expiration_ttl"}
         ),
+        (
+            [("email_outbox.status", pymongo.ASCENDING), ("email_outbox.available_at", pymongo.ASCENDING)],
+            {"name": "pending_users_email_outbox_status_available_at"}
+        ),
     ],
-    "refresh_tokens": [
+    "refresh_sessions": [
         (
-            [("token_hash", pymongo.ASCENDING)],
-            {"unique": True, "name": "refresh_tokens_token_hash_unique"}
+            [("sessions.token_hash", pymongo.ASCENDING)],
+            {
+                "unique": True,
+                "partialFilterExpression": {"sessions.token_hash": {"$exists": True}},
+                "name": "refresh_sessions_token_hash_unique"
+            }
         ),
         (
             [("user_id", pymongo.ASCENDING)],
-            {"name": "refresh_tokens_user_id"}
+            {"unique": True, "name": "refresh_sessions_user_id_unique"}
         ),
         (
             [("expires_at", pymongo.ASCENDING)],
-            {"expireAfterSeconds": 0, "name": "refresh_tokens_expiration_ttl"}
+            {"expireAfterSeconds": 0, "name": "refresh_sessions_expiration_ttl"}
         ),
     ],
     "password_reset_tokens": [
@@ -56,26 +64,97 @@ INDEX_DEFINITIONS = {
         (
             [("user_id", pymongo.ASCENDING)],
             {"name": "password_reset_user_id"}
-        )
+        ),
+        (
+            [("email_outbox.status", pymongo.ASCENDING), ("email_outbox.available_at", pymongo.ASCENDING)],
+            {"name": "password_reset_email_outbox_status_available_at"}
+        ),
     ],
     "workouts": [
         (
-            [("user_id", pymongo.ASCENDING), ("scheduled_date", pymongo.DESCENDING)],
-            {"name": "workouts_user_id_scheduled_date"}
+            [("user_id", pymongo.ASCENDING), ("scheduled_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            {"name": "workouts_user_id_scheduled_date_id"}
         ),
         (
-            [("user_id", pymongo.ASCENDING), ("exercises.name", pymongo.ASCENDING)],
-            {"name": "workouts_user_id_exercise_name"}
+            [("user_id", pymongo.ASCENDING), ("exercises.name", pymongo.ASCENDING), ("scheduled_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            {"name": "workouts_user_id_exercise_name_scheduled_date_id"}
         ),
         (
             [("_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)],
             {"name": "workouts_id_user_id"}
         ),
+        (
+            [("user_id", pymongo.ASCENDING), ("updated_at", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            {"name": "workouts_user_id_updated_at_id"}
+        ),
+        (
+            [("user_id", pymongo.ASCENDING), ("scheduled_day", pymongo.ASCENDING), ("normalized_name", pymongo.ASCENDING)],
+            {
+                "unique": True,
+                # Documents written before normalized_name or scheduled_day existed stay out until
+                # they are backfilled; otherwise every undated workout would share scheduled_day null.
+                "partialFilterExpression": {"normalized_name": {"$exists": True}, "scheduled_day": {"$exists": True}},
+                "name": "workouts_user_id_scheduled_day_normalized_name_dated_unique"
+            }
+        ),
+    ],
+    "workout_day_counters": [
+        (
+            [("user_id", pymongo.ASCENDING), ("scheduled_day", pymongo.ASCENDING)],
+            {"unique": True, "name": "workout_day_counters_user_id_scheduled_day_unique"}
+        ),
+    ],
+    "training_rollups": [
+        (
+            [("user_id", pymongo.ASCENDING), ("exercise", pymongo.ASCENDING), ("period", pymongo.ASCENDING), ("start", pymongo.ASCENDING)],
+            {"unique": True, "name": "training_rollups_user_id_exercise_period_start_unique"}
+        ),
+        (
+            [("user_id", pymongo.ASCENDING), ("period", pymongo.ASCENDING), ("start", pymongo.ASCENDING)],
+            {"name": "training_rollups_user_id_period_start"}
+        ),
+    ],
+    "activity_days": [
+        (
+            [("user_id", pymongo.ASCENDING), ("year", pymongo.ASCENDING)],
+            {"unique": True, "name": "activity_days_user_id_year_unique"}
+        ),
+    ],
+    "personal_records": [
+        (
+            [("user_id", pymongo.ASCENDING), ("exercise", pymongo.ASCENDING)],
+            {"unique": True, "name": "personal_records_user_id_exercise_unique"}
+        ),
+    ],
+    "exercise_catalog": [
+        (
+            [("user_id", pymongo.ASCENDING), ("exercise", pymongo.ASCENDING)],
+            {"unique": True, "name": "exercise_catalog_user_id_exercise_unique"}
+        ),
+    ],
+    "jobs": [
+        (
+            [("status", pymongo.ASCENDING), ("available_at", pymongo.ASCENDING)],
+            {"name": "jobs_status_available_at"}
+        ),
+        (
+            [("dedupe_key", pymongo.ASCENDING)],
+            {
+                "unique": True,
+                # Keyless jobs are left out, or all but one of them would collide on a null key.
+                "partialFilterExpression": {"dedupe_key": {"$exists": True}, "status": "queued", "attempts": 0},
+                "name": "jobs_keyed_dedupe_key_untried_unique"
+            }
+        ),
+        (
+            [("expires_at", pymongo.ASCENDING)],
+            {"expireAfterSeconds": 0, "name": "jobs_expiration_ttl"}
+        ),
     ],
     "routines": [
         (
-            [("user_id", pymongo.ASCENDING),],
-            {"name": "routines_user_id"}
+            [("user_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            {"name": "routines_user_id_created_at_id"}
         ),
         (
             [("user_id", pymongo.ASCENDING), ("exercises.name", pymongo.ASCENDING)],
@@ -85,15 +164,80 @@ INDEX_DEFINITIONS = {
             [("_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)],
             {"name": "routines_id_user_id"}
         ),
+        (
+            [("user_id", pymongo.ASCENDING), ("updated_at", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            {"name": "routines_user_id_updated_at_id"}
+        ),
+        (
+            [("user_id", pymongo.ASCENDING), ("normalized_name", pymongo.ASCENDING)],
+            {
+                "unique": True,
+                "partialFilterExpression": {"normalized_name": {"$exists": True}},
+                "name": "routines_user_id_normalized_name_unique"
+            }
+        ),
+    ],
+    "tombstones": [
+        (
+            [("user_id", pymongo.ASCENDING), ("updated_at", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            {"name": "tombstones_user_id_updated_at_id"}
+        ),
+        (
+            [("expires_at", pymongo.ASCENDING)],
+            {"expireAfterSeconds": 0, "name": "tombstones_expiration_ttl"}
+        ),
+    ],
+    "weekly_summary_runs": [
+        (
+            [("expires_at", pymongo.ASCENDING)],
+            {"expireAfterSeconds": 0, "name": "weekly_summary_runs_expiration_ttl"}
+        ),
+    ],
+    "weekly_summary_slices": [
+        (
+            [("week", pymongo.ASCENDING), ("start_after", pymongo.ASCENDING)],
+            {"unique": True, "name": "weekly_summary_slices_week_start_after_unique"}
+        ),
+        (
+            [("week", pymongo.ASCENDING), ("done", pymongo.ASCENDING), ("lease_expires_at", pymongo.ASCENDING)],
+            {"name": "weekly_summary_slices_week_done_lease_expires_at"}
+        ),
+        (
+            [("expires_at", pymongo.ASCENDING)],
+            {"expireAfterSeconds": 0, "name": "weekly_summary_slices_expiration_ttl"}
+        ),
+    ],
+    "weekly_summary_deliveries": [
+        (
+            [("week", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)],
+            {"unique": True, "name": "weekly_summary_deliveries_week_user_id_unique"}
+        ),
+        (
+            [("expires_at", pymongo.ASCENDING)],
+            {"expireAfterSeconds": 0, "name": "weekly_summary_deliveries_expiration_ttl"}
+        ),
+    ],
+}
+
+# Indexes superseded by a definition above. They are dropped once their replacement exists.
+OBSOLETE_INDEXES = {
+    "workouts": [
+        "workouts_user_id_scheduled_date",
+        "workouts_user_id_exercise_name",
+        "workouts_user_id_scheduled_day_normalized_name_unique",
+        "workouts_user_id_updated_at",
     ],
+    "routines": ["routines_user_id", "routines_user_id_updated_at"],
+    "tombstones": ["tombstones_user_id_updated_at"],
+    "jobs": ["jobs_dedupe_key_untried_unique"],
 }
 
-def EnsureIndexes() -> None:
+async def EnsureIndexes() -> None:
     db = GetDb()
 
     for collection_name, indexes in INDEX_DEFINITIONS.items():
         collection = db[collection_name]
-        existing_indexes = collection.index_information()
+        existing_indexes = await collection.index_information()
 
         for keys, options in indexes:
             index_name = options.get("name")
@@ -101,4 +245,12 @@ def EnsureIndexes() -> None:
             if index_name in existing_indexes:
                 continue 
 
-            collection.create_index(keys, **options)
\ No newline at end of file
+            await collection.create_index(keys, **options)
+
+    for collection_name, index_names in OBSOLETE_INDEXES.items():
+        collection = db[collection_name]
+        existing_indexes = await collection.index_information()
+
+        for index_name in index_names:
+            if index_name in existing_indexes:
+                await collection.drop_index(index_name)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from ..database_config import GetDb
+import config
+
+# Background jobs run by tasks.worker:
+#   {type, payload, dedupe_key, status, attempts, available_at, lease, last_error, created_at, updated_at, expires_at}
+# status moves queued -> running -> done, or back to queued with a backoff after a
+# failure until JOB_MAX_ATTEMPTS, then failed. available_at is when a queued job may
+# run and, while it runs, when its lease expires, so one (status, available_at) index
+# finds both due jobs and jobs whose worker died. lease is a fresh token per claim,
+# so a worker that lost its lease cannot complete or fail the job it no longer owns.
+# Finished jobs carry an expires_at for the TTL index.
+COLLECTION_NAME = "jobs"
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+RETENTION = timedelta(days=7)
+
+async def Enqueue(job_type: str, payload: Dict, dedupe_key: Optional[str] = None, delay_seconds: float = 0,
+    merge: Optional[Dict] = None
+) -> None:
+    """
+    Queues a job. Jobs with a dedupe_key collapse into the one under that key that has not
+    been tried yet, which the partial unique index keeps to one; merge is an update such
+    as $addToSet applied to it, so the collapsed job sees every request. A job that has
+    started, or is waiting to be retried, does not absorb new requests, since it may have
+    read its data before them.
+    """
+    now = datetime.now(timezone.utc)
+    job = {
+        "type": job_type,
+        "status": QUEUED,
+        "attempts": 0,
+        "available_at": now + timedelta(seconds=delay_seconds),
+        "created_at": now,
+    }
+    jobs = GetDb()[COLLECTION_NAME]
+
+    if dedupe_key is None:
+        await jobs.insert_one(job | {"payload": payload, "updated_at": now})
+        return
+
+    # Dotted paths, so merge may update other fields of the payload.
+    fields = job | {f"payload.{key}": value for key, value in payload.items()}
+    update = {"$setOnInsert": fields, "$set": {"updated_at": now}} | (merge or {})
+    query = {"dedupe_key": dedupe_key, "status": QUEUED, "attempts": 0}
+
+    try:
+        await jobs.update_one(query, update, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent enqueue inserted the queued job first; it exists now, so merge into it.
+        await jobs.update_one(query, update, upsert=True)
+
+def GetBackoffSeconds(attempts: int) -> float:
+    return min(config.JOB_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), config.JOB_BACKOFF_MAX_SECONDS)
+
+async def ClaimNextJob(job_types: Iterable[str], visibility_timeout: float) -> Optional[Dict]:
+    """
+    Atomically takes the oldest due job of the given types: a queued job whose
+    available_at has passed or a running one whose lease expired. Returns None when
+    nothing is due.
+    """
+    now = datetime.now(timezone.utc)
+
+    return await GetDb()[COLLECTION_NAME].find_one_and_update(
+        {"status": {"$in": [QUEUED, RUNNING]}, "available_at": {"$lte": now}, "type": {"$in": list(job_types)}},
+        {
+            "$set": {
+                "status": RUNNING,
+                "available_at": now + timedelta(seconds=visibility_timeout),
+                "lease": uuid.uuid4().hex,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+async def CompleteJob(job: Dict) -> bool:
+    now = datetime.now(timezone.utc)
+    result = await GetDb()[COLLECTION_NAME].update_one(
+        {"_id": job["_id"], "lease": job["lease"]},
+        {"$set": {"status": DONE, "updated_at": now, "expires_at": now + RETENTION}, "$unset": {"lease": ""}}
+    )
+
+    return result.modified_count == 1
+
+async def FailJob(job: Dict, error: str) -> bool:
+    """Puts the job back with a backoff, or marks it failed once it is out of attempts."""
+    now = datetime.now(timezone.utc)
+
+    if job["attempts"] >= config.JOB_MAX_ATTEMPTS:
+        fields = {"status": FAILED, "expires_at": now + RETENTION}
+    else:
+        fields = {"status": QUEUED, "available_at": now + timedelta(seconds=GetBackoffSeconds(job["attempts"]))}
+
+    result = await GetDb()[COLLECTION_NAME].update_one(
+        {"_id": job["_id"], "lease": job["lease"]},
+        {"$set": fields | {"last_error": error[:1000], "updated_at": now}, "$unset": {"lease": ""}}
+    )
+
+    return result.modified_count == 1
@@ -1,6 +1,6 @@
 from pydantic import AwareDatetime, BaseModel, EmailStr, Field
-from datetime import datetime, timezone
-from typing import List, Optional
+from datetime import date, datetime, timezone
+from typing import List, Literal, Optional
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -65,6 +65,48 @@ class WorkoutResponse(Workout, UserCreation):
 class RoutineResponse(Routine, UserCreation):
     pass
 
+class ActivitySummary(BaseModel):
+    current_streak: int
+    longest_streak: int
+    active_days: int
+    days: List[date]
+
+class ReportPoint(BaseModel):
+    bucket: date
+    value: float
+
+class ReportResponse(BaseModel):
+    total: Optional[float] = None
+    points: List[ReportPoint]
+
+class RollupPoint(BaseModel):
+    start: date
+    volume: float
+    sets: int
+    max_weight: float
+    best_e1rm: float
+
+class ExerciseCatalogEntry(BaseModel):
+    name: str
+    workouts: int
+    last_used: datetime
+
+class ExerciseHistoryPoint(BaseModel):
+    date: datetime
+    weight: float
+    reps: int
+    sets: int
+    e1rm: float
+
+class SyncResponse(BaseModel):
+    workouts: List[WorkoutResponse]
+    routines: List[RoutineResponse]
+    deleted_workouts: List[str]
+    deleted_routines: List[str]
+    token: str
+    has_more: bool
+    reset: bool
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -83,4 +125,12 @@ class ResetPasswordModel(BaseModel):
 
 class IsRequestTokenValidRequest(BaseModel):
     type: str
-    token: str
\ No newline at end of file
+    token: str
+
+class EmailStatusRequest(BaseModel):
+    type: Literal["email-confirmation", "reset-password"]
+    # Returned by /auth/signup or /auth/initial-reset-password when the email was queued.
+    status_id: str
+
+class EmailStatusResponse(BaseModel):
+    status: Literal["pending", "sending", "sent", "failed"]
\ No newline at end of file
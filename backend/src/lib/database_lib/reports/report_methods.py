@@ -0,0 +1,116 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from ..database_config import GetDb
+from ..workouts.personal_records import E1RM_EXPRESSION
+from lib.misc.downsampling import LargestTriangleThreeBuckets
+
+BUCKETS = ("day", "week", "month")
+
+# Volume is summed per exercise entry, each entry floored like the reports page always did.
+VOLUME_EXPRESSION = {"$floor": {"$multiply": ["$exercises.sets", "$exercises.reps", "$exercises.weight"]}}
+
+def GetDateRange(start: date, end: date, time_zone: str) -> Tuple[datetime, datetime]:
+    # The client's start and end days, both inclusive, as an aware [from, until) range.
+    zone = ZoneInfo(time_zone)
+
+    return (
+        datetime.combine(start, time.min, tzinfo=zone),
+        datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+    )
+
+def BuildReportPipeline(
+    user_id: str,
+    start: date,
+    end: date,
+    time_zone: str,
+    bucket: str,
+    value_accumulator: Dict,
+    exercise: Optional[str] = None
+) -> List[Dict]:
+    """
+    Buckets the user's exercise entries in the range by the client's calendar day,
+    week (starting Monday) or month and returns one {bucket, value} row per bucket.
+    The first $match is a range on (user_id, scheduled_date), so it runs on the
+    workouts_user_id_scheduled_date_id index.
+    """
+    range_from, range_until = GetDateRange(start, end, time_zone)
+    match = {"user_id": user_id, "scheduled_date": {"$gte": range_from, "$lt": range_until}}
+    exercise_match = {"exercises.name": exercise} if exercise else {}
+    truncate = {"date": "$scheduled_date", "unit": bucket, "timezone": time_zone}
+
+    if bucket == "week":
+        truncate["startOfWeek"] = "monday"
+
+    pipeline = [{"$match": match | exercise_match}, {"$unwind": "$exercises"}]
+
+    if exercise_match:
+        pipeline.append({"$match": exercise_match})
+
+    return pipeline + [
+        {"$group": {"_id": {"$dateTrunc": truncate}, "value": value_accumulator}},
+        {"$sort": {"_id": 1}},
+        {"$project": {
+            "_id": 0,
+            "bucket": {"$dateToString": {"format": "%Y-%m-%d", "date": "$_id", "timezone": time_zone}},
+            "value": 1,
+        }},
+    ]
+
+async def RunReport(pipeline: List[Dict]) -> List[Dict]:
+    rows = await (await GetDb()["workouts"].aggregate(pipeline)).to_list()
+
+    return [{"bucket": date.fromisoformat(row["bucket"]), "value": row["value"]} for row in rows]
+
+async def GetVolumeReport(user_id: str, start: date, end: date, time_zone: str, bucket: str, exercise: Optional[str] = None) -> Dict:
+    pipeline = BuildReportPipeline(user_id, start, end, time_zone, bucket, {"$sum": VOLUME_EXPRESSION}, exercise)
+    points = await RunReport(pipeline)
+
+    return {"total": sum(point["value"] for point in points), "points": points}
+
+async def GetOneRepMaxReport(user_id: str, start: date, end: date, time_zone: str, bucket: str, exercise: str) -> Dict:
+    # The best estimated 1RM of the exercise in each bucket.
+    pipeline = BuildReportPipeline(user_id, start, end, time_zone, bucket, {"$max": E1RM_EXPRESSION}, exercise)
+    points = await RunReport(pipeline)
+
+    for point in points:
+        point["value"] = int(point["value"])
+
+    return {"total": None, "points": points}
+
+def BuildExerciseHistoryPipeline(user_id: str, exercise: str) -> List[Dict]:
+    """
+    Every logged entry of one exercise, oldest first, as one flat row each. The first
+    $match and the sort run on the workouts_user_id_exercise_name_scheduled_date_id index.
+    """
+    match = {"user_id": user_id, "exercises.name": exercise}
+
+    return [
+        {"$match": match},
+        {"$sort": {"scheduled_date": 1, "_id": 1}},
+        {"$project": {"_id": 0, "scheduled_date": 1, "exercises": 1}},
+        {"$unwind": "$exercises"},
+        {"$match": {"exercises.name": exercise}},
+        {"$project": {
+            "date": "$scheduled_date",
+            "weight": "$exercises.weight",
+            "reps": "$exercises.reps",
+            "sets": "$exercises.sets",
+            "e1rm": E1RM_EXPRESSION,
+        }},
+    ]
+
+async def GetExerciseHistory(user_id: str, exercise: str, max_points: Optional[int] = None) -> List[Dict]:
+    """
+    The exercise's history, cut down to max_points with LTTB on the estimated 1RM when
+    given, so the chart payload stays the same size however long the history grows.
+    """
+    rows = await (await GetDb()["workouts"].aggregate(BuildExerciseHistoryPipeline(user_id, exercise))).to_list()
+
+    if max_points is None:
+        return rows
+
+    xs = [row["date"].timestamp() for row in rows]
+    ys = [row["e1rm"] for row in rows]
+
+    return [rows[index] for index in LargestTriangleThreeBuckets(xs, ys, max_points)]
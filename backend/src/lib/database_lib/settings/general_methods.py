@@ -1,12 +1,12 @@
 from ..database_config import GetDb
 
-def UpdateBodyweight(email: str, bodyweight: float = 0) -> bool:
+async def UpdateBodyweight(email: str, bodyweight: float = 0) -> bool:
     users = GetDb()["users"]
     user_filter = {"email": email}
     update = {"$set": {"bodyweight": bodyweight,}}
 
     try:
-        users.update_one(
+        await users.update_one(
             user_filter,
             update
         )
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from ..database_config import GetDb
+
+# A weekly summary run is split into slices of users so it can be finished over
+# several short invocations, some of them running at the same time:
+#   weekly_summary_runs:       {_id: week, now, cursor, exhausted}, the shared _id cursor over users
+#   weekly_summary_slices:     {week, start_after, end, lease_expires_at, attempts, done}, users in (start_after, end]
+#   weekly_summary_deliveries: {week, user_id, sent_at}, one per user emailed that week
+# All three carry an expires_at so the TTL indexes clear them out after RETENTION.
+# A slice is owned by whoever holds its lease. An invocation that dies or runs out of
+# time leaves the lease to expire, and the next one picks the slice up again, skipping
+# users that already have a delivery. A slice whose sends failed for some users is left
+# open the same way, after a delay, until its attempts run out.
+RUNS = "weekly_summary_runs"
+SLICES = "weekly_summary_slices"
+DELIVERIES = "weekly_summary_deliveries"
+RETENTION = timedelta(weeks=8)
+
+def GetWeekKey(now: datetime) -> str:
+    # The ISO week, e.g. "2026-W42", so every invocation in the same week joins one run.
+    year, week, _ = now.isocalendar()
+
+    return f"{year}-W{week:02d}"
+
+async def GetOrCreateRun(week: str, now: datetime) -> Dict:
+    """
+    Returns the week's run, creating it on the first call. The run's "now" is fixed
+    at creation so every slice summarizes the same seven days.
+    """
+    return await GetDb()[RUNS].find_one_and_update(
+        {"_id": week},
+        {"$setOnInsert": {"now": now, "cursor": None, "exhausted": False, "expires_at": now + RETENTION}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+async def ReclaimExpiredSlice(week: str, lease_seconds: int) -> Optional[Dict]:
+    now = datetime.now(timezone.utc)
+
+    return await GetDb()[SLICES].find_one_and_update(
+        {"week": week, "done": False, "lease_expires_at": {"$lt": now}},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds)}},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def ClaimNextSlice(week: str, batch_size: int, lease_seconds: int) -> Optional[Dict]:
+    """
+    Carves the next batch of users off the run's cursor. The unique (week, start_after)
+    index makes the slice insert the claim: of several callers reading the same cursor
+    only one inserts, and the others help move the cursor past that slice and retry.
+    Returns None once every user has been handed out.
+    """
+    db = GetDb()
+
+    while True:
+        run = await db[RUNS].find_one({"_id": week})
+
+        if run["exhausted"]:
+            return None
+
+        cursor = run["cursor"]
+        query = {"_id": {"$gt": cursor}} if cursor else {}
+        user_ids = await db["users"].find(query, {"_id": 1}).sort("_id", 1).limit(batch_size).to_list()
+
+        if not user_ids:
+            await db[RUNS].update_one({"_id": week, "cursor": cursor}, {"$set": {"exhausted": True}})
+            continue
+
+        now = datetime.now(timezone.utc)
+        slice_doc = {
+            "week": week,
+            "start_after": cursor,
+            "end": user_ids[-1]["_id"],
+            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+            "attempts": 0,
+            "done": False,
+            "expires_at": now + RETENTION,
+        }
+
+        try:
+            await db[SLICES].insert_one(slice_doc)
+            claimed = True
+        except DuplicateKeyError:
+            slice_doc = await db[SLICES].find_one({"week": week, "start_after": cursor}, {"end": 1})
+            claimed = False
+
+        # Whoever inserted the slice may have died before moving the cursor, so everyone moves it.
+        await db[RUNS].update_one({"_id": week, "cursor": cursor}, {"$set": {"cursor": slice_doc["end"]}})
+
+        if claimed:
+            return slice_doc
+
+async def ReleaseSlice(slice_id: ObjectId, done: bool) -> None:
+    # A finished slice is closed; an unfinished one is left for the next invocation right away.
+    update = {"done": True} if done else {"lease_expires_at": datetime.now(timezone.utc)}
+    await GetDb()[SLICES].update_one({"_id": slice_id}, {"$set": update})
+
+async def RetrySlice(slice_id: ObjectId, max_attempts: int, retry_seconds: int) -> bool:
+    """
+    Counts a pass over the slice that left some users undelivered. The slice stays open
+    for another invocation to pick up after retry_seconds, unless this was its last
+    attempt, in which case it is closed. Returns whether it will be retried.
+    """
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=retry_seconds)
+    slice_doc = await GetDb()[SLICES].find_one_and_update(
+        {"_id": slice_id},
+        [
+            {"$set": {"attempts": {"$add": [{"$ifNull": ["$attempts", 0]}, 1]}, "lease_expires_at": retry_at}},
+            {"$set": {"done": {"$gte": ["$attempts", max_attempts]}}},
+        ],
+        projection={"done": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+    return slice_doc is not None and not slice_doc["done"]
+
+async def GetSliceUsers(slice_doc: Dict) -> List[Dict]:
+    query = {"_id": {"$lte": slice_doc["end"]}, "email": {"$exists": True, "$ne": None}}
+
+    if slice_doc["start_after"]:
+        query["_id"]["$gt"] = slice_doc["start_after"]
+
+    return await GetDb()["users"].find(query, {"_id": 1, "email": 1}).to_list()
+
+async def GetDeliveredUserIds(week: str, user_ids: List[str]) -> set:
+    deliveries = GetDb()[DELIVERIES].find({"week": week, "user_id": {"$in": user_ids}}, {"_id": 0, "user_id": 1})
+
+    return {delivery["user_id"] async for delivery in deliveries}
+
+async def RecordDeliveries(week: str, user_ids: List[str]) -> None:
+    if not user_ids:
+        return
+
+    now = datetime.now(timezone.utc)
+    deliveries = [{"week": week, "user_id": user_id, "sent_at": now, "expires_at": now + RETENTION} for user_id in user_ids]
+
+    try:
+        await GetDb()[DELIVERIES].insert_many(deliveries, ordered=False)
+    except BulkWriteError as error:
+        # Another invocation recorded some of them first; those are already delivered.
+        if any(write_error["code"] != 11000 for write_error in error.details["writeErrors"]):
+            raise
+
+async def IsRunFinished(week: str) -> bool:
+    db = GetDb()
+    run = await db[RUNS].find_one({"_id": week}, {"exhausted": 1})
+
+    if not run or not run["exhausted"]:
+        return False
+
+    return await db[SLICES].find_one({"week": week, "done": False}, {"_id": 1}) is None
@@ -4,41 +4,33 @@ from argon2.exceptions import VerifyMismatchError
 from .. import users
 from .. import models
 import jwt 
+from bson import ObjectId
 import datetime
 import hashlib
 import config 
 import secrets
-from lib.misc import emails
+from lib.misc.hashing_pool import HashingPool
 from . import refresh_tokens
 from . import general_methods as general_user_methods
 from . import reset_password as reset_password_methods
+from .verified_user_cache import verified_user_cache
 
 SECRET_KEY = config.SECRET_KEY
 ph = PasswordHasher()
+hashing_pool = HashingPool(config.HASHING_POOL_WORKERS, config.HASHING_POOL_MAX_QUEUE)
 ALGORITHM = "HS256"
 
-def InitiateResetPassword(email: str) -> bool:
-    user = general_user_methods.GetVerifiedUserByEmail(email)
+# Both only write the token with its email queued in the outbox and return the document's id
+# for email_outbox.DeliverOne; nothing waits on SMTP here.
+async def InitiateResetPassword(email: str, user_id: ObjectId) -> ObjectId:
+    return await reset_password_methods.StorePasswordResetToken(user_id, email)
 
-    if not user:
-        return False
-
-    user_id = user["_id"] 
-    raw_token = reset_password_methods.StorePasswordResetToken(user_id)
-
-    return emails.SendResetPasswordEmail(raw_token, email)
-
-def InitiateEmailVerification(email: str, username: str, hashed_password: str) -> bool:
+async def InitiateEmailVerification(email: str, username: str, hashed_password: str) -> ObjectId:
     token = secrets.token_urlsafe(32)
     # The token argument ensures that the user is not verified.
-    general_user_methods.CreateUser(email, username, hashed_password, token)
-    success = emails.SendVerificationEmail(token, email, username, hashed_password)
+    pending_user_id = await general_user_methods.CreateUser(email, username, hashed_password, token)
 
-    if not success:
-        # The user is deleted so they can try again.
-        general_user_methods.DeletePendingUserByEmail(email)
-
-    return success
+    return ObjectId(pending_user_id)
 
 def IsPasswordStrong(password: str) -> bool:
     if len(password) < 8:
@@ -51,15 +43,20 @@ def IsPasswordStrong(password: str) -> bool:
 
     return has_upper and has_lower and has_digit and has_special
 
-def GetPasswordHash(password : str) -> str:
-    return ph.hash(password)
+# Argon2 takes tens of milliseconds of CPU, so both calls go through the hashing pool.
+# Raises HashingPoolFull when the pool's queue is at its limit.
+async def GetPasswordHash(password : str) -> str:
+    return await hashing_pool.Run(ph.hash, password)
 
-def VerifyPassword(plain_password: str, hashed_password: str) -> bool:
+def _VerifyPasswordBlocking(plain_password: str, hashed_password: str) -> bool:
     try:
         ph.verify(hashed_password, plain_password)
         return True
     except VerifyMismatchError:
         return False
+
+async def VerifyPassword(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.Run(_VerifyPasswordBlocking, plain_password, hashed_password)
     
 def CreateRefreshToken() -> str:
     raw_token = secrets.token_urlsafe(32)
@@ -86,25 +83,38 @@ def CreateAccessToken(user_id: str, email: str, username: str) -> str:
 
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
-def CreateTokenPair(user_id: str, email: str, username: str, device_fingerprint: str) -> tuple:
+def GetRefreshTokenExpiry() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=config.REFRESH_TOKEN_DAYS)
+
+async def CreateTokenPair(
+    user_id: str,
+    email: str,
+    username: str,
+    device_fingerprint: str,
+    previous_refresh_token: str | None = None
+) -> tuple:
     access_token = CreateAccessToken(user_id, email, username)
     raw_refresh_token, refresh_token_hash = CreateRefreshToken()
+    replaces_token_hash = None
 
-    expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=config.REFRESH_TOKEN_DAYS)
-    refresh_tokens.StoreRefreshToken(
+    if previous_refresh_token:
+        replaces_token_hash = hashlib.sha256(previous_refresh_token.encode()).hexdigest()
+
+    await refresh_tokens.StoreRefreshToken(
         user_id, 
         refresh_token_hash, 
-        expires_at, 
+        GetRefreshTokenExpiry(), 
         email,
         username=username,
         device_fingerprint=device_fingerprint,
+        replaces_token_hash=replaces_token_hash,
     )
     
     return access_token, raw_refresh_token
 
-def ValidateRefreshTokenAndGetUser(raw_refresh_token: str, device_fingerprint: str) -> dict:
+async def ValidateRefreshTokenAndGetUser(raw_refresh_token: str, device_fingerprint: str) -> dict:
     token_hash = hashlib.sha256(raw_refresh_token.encode()).hexdigest()
-    result = refresh_tokens.GetRefreshTokenInfo(token_hash)
+    result = await refresh_tokens.GetRefreshTokenInfo(token_hash)
 
     if result is None:
         raise ValueError("Refresh token is invalid, expired, or revoked")
@@ -114,29 +124,31 @@ def ValidateRefreshTokenAndGetUser(raw_refresh_token: str, device_fingerprint: s
     
     return result
 
-def RefreshAccessToken(raw_refresh_token: str, device_fingerprint: str) -> tuple:
+async def RefreshAccessToken(raw_refresh_token: str, device_fingerprint: str) -> tuple:
     token_hash = hashlib.sha256(raw_refresh_token.encode()).hexdigest()
-    token_info = refresh_tokens.ConsumeRefreshToken(token_hash)
+    new_refresh_token, new_refresh_token_hash = CreateRefreshToken()
+
+    # Rotation is a single conditional write on the user's session document.
+    token_info = await refresh_tokens.RotateRefreshToken(
+        token_hash,
+        new_refresh_token_hash,
+        GetRefreshTokenExpiry(),
+        device_fingerprint
+    )
 
     if not token_info:
+        # A live token presented from another device is revoked as a potential compromise.
+        await refresh_tokens.RevokeRefreshToken(token_hash)
         raise ValueError("Invalid or expired refresh token")
 
-    if token_info.get("device_fingerprint") != device_fingerprint:
-        raise ValueError("Token used from different device")
-
-    new_access_token, new_refresh_token = CreateTokenPair(
-        user_id=token_info["user_id"],
-        email=token_info["email"],
-        username=token_info["username"],
-        device_fingerprint=device_fingerprint,
-    )
+    new_access_token = CreateAccessToken(token_info["user_id"], token_info["email"], token_info["username"])
 
     return new_access_token, new_refresh_token
 
-def RevokeRefreshToken(raw_refresh_token: str) -> bool:
+async def RevokeRefreshToken(raw_refresh_token: str) -> bool:
     token_hash = hashlib.sha256(raw_refresh_token.encode()).hexdigest()
 
-    return refresh_tokens.RevokeRefreshToken(token_hash)
+    return await refresh_tokens.RevokeRefreshToken(token_hash)
 
 async def GetCurrentUser(authorization : str = Header(...)) -> models.CurrentUser:    
     if not authorization.startswith("Bearer "):
@@ -168,10 +180,15 @@ async def GetCurrentUser(authorization : str = Header(...)) -> models.CurrentUse
             detail="Invalid token"
         )
     
-    if not general_user_methods.DoesVerifiedUserExist(email):
+    if verified_user_cache.Contains(user_id, email):
+        return models.CurrentUser(user_id=user_id, email=email)
+
+    if not await general_user_methods.DoesVerifiedUserExist(email):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Verified user does not exist"
         )
     
+    verified_user_cache.Add(user_id, email)
+
     return models.CurrentUser(user_id=user_id, email=email)
\ No newline at end of file
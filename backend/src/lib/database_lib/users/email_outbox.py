@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from ..database_config import GetDb
+from ..jobs.job_queue import GetBackoffSeconds
+from lib.misc import emails
+import config
+
+# Signup verification and password reset emails are not sent inside the request.
+# The email is written as an outbox, embedded in the same insert as the pending
+# user or reset token it belongs to, so the two cannot disagree:
+#   email_outbox: {kind, to, token, status, attempts, available_at, lease, last_error, sent_at}
+# status moves pending -> sending -> sent, or back to pending with a backoff until
+# EMAIL_OUTBOX_MAX_ATTEMPTS, then failed. While sending, available_at is when the
+# lease expires, as in the jobs queue. The raw token is needed to build the email,
+# so it is kept in the outbox only until the email is sent or has failed for good.
+OUTBOX_FIELD = "email_outbox"
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+VERIFICATION = "verification"
+RESET_PASSWORD = "reset_password"
+COLLECTIONS = {VERIFICATION: "pending_users", RESET_PASSWORD: "password_reset_tokens"}
+
+def NewOutbox(kind: str, to: str, token: str) -> Dict:
+    return {
+        "kind": kind,
+        "to": to,
+        "token": token,
+        "status": PENDING,
+        "attempts": 0,
+        "available_at": datetime.now(timezone.utc),
+    }
+
+def MakeStatusId(kind: str, document_id: ObjectId) -> str:
+    """
+    The id the client polls POST /auth/email-status with after an email is queued. It names
+    one outbox document and carries a signature, so it cannot be made up from an email
+    address or for another document, and a poll says nothing about anyone else's email.
+    """
+    signature = hmac.new(config.SECRET_KEY.encode(), f"{kind}:{document_id}".encode(), hashlib.sha256).hexdigest()
+
+    return f"{document_id}.{signature[:32]}"
+
+def ParseStatusId(kind: str, status_id: str) -> Optional[ObjectId]:
+    document_id = status_id.partition(".")[0]
+
+    if not ObjectId.is_valid(document_id) or not hmac.compare_digest(MakeStatusId(kind, ObjectId(document_id)), status_id):
+        return None
+
+    return ObjectId(document_id)
+
+def BuildEmail(outbox: Dict) -> Tuple[str, str, str]:
+    if outbox["kind"] == VERIFICATION:
+        subject, body = emails.BuildVerificationEmail(outbox["token"], outbox["to"])
+    else:
+        subject, body = emails.BuildResetPasswordEmail(outbox["token"], outbox["to"])
+
+    return outbox["to"], subject, body
+
+async def ClaimDue(kind: str, document_id: Optional[ObjectId] = None) -> Optional[Dict]:
+    """
+    Takes one due outbox of the kind, or the given document's if it is due: a pending
+    one or one whose lease expired after its sender died.
+    """
+    now = datetime.now(timezone.utc)
+    query = {
+        f"{OUTBOX_FIELD}.status": {"$in": [PENDING, SENDING]},
+        f"{OUTBOX_FIELD}.available_at": {"$lte": now},
+    }
+
+    if document_id is not None:
+        query["_id"] = document_id
+
+    return await GetDb()[COLLECTIONS[kind]].find_one_and_update(
+        query,
+        {
+            "$set": {
+                f"{OUTBOX_FIELD}.status": SENDING,
+                f"{OUTBOX_FIELD}.available_at": now + timedelta(seconds=config.EMAIL_OUTBOX_LEASE_SECONDS),
+                f"{OUTBOX_FIELD}.lease": uuid.uuid4().hex,
+            },
+            "$inc": {f"{OUTBOX_FIELD}.attempts": 1},
+        },
+        sort=[(f"{OUTBOX_FIELD}.available_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+async def RecordResult(kind: str, document: Dict, sent: bool) -> str:
+    outbox = document[OUTBOX_FIELD]
+    now = datetime.now(timezone.utc)
+
+    if sent:
+        status = SENT
+        update = {"$set": {f"{OUTBOX_FIELD}.status": SENT, f"{OUTBOX_FIELD}.sent_at": now}}
+        update["$unset"] = {f"{OUTBOX_FIELD}.token": "", f"{OUTBOX_FIELD}.lease": ""}
+    else:
+        status = FAILED if outbox["attempts"] >= config.EMAIL_OUTBOX_MAX_ATTEMPTS else PENDING
+        fields = {f"{OUTBOX_FIELD}.status": status, f"{OUTBOX_FIELD}.last_error": "The SMTP server did not accept the email"}
+
+        removed = {f"{OUTBOX_FIELD}.lease": ""}
+
+        if status == PENDING:
+            fields[f"{OUTBOX_FIELD}.available_at"] = now + timedelta(seconds=GetBackoffSeconds(outbox["attempts"]))
+        else:
+            # No attempt is left to build the email, so the raw token has no reason to stay.
+            removed[f"{OUTBOX_FIELD}.token"] = ""
+
+        update = {"$set": fields, "$unset": removed}
+
+    # Only the holder of the lease records the result; a sender that outlived it lost the claim.
+    await GetDb()[COLLECTIONS[kind]].update_one({"_id": document["_id"], f"{OUTBOX_FIELD}.lease": outbox["lease"]}, update)
+
+    return status
+
+async def DeliverOne(kind: str, document_id: ObjectId) -> None:
+    # The fast path right after the request; a failure is left for DeliverDue to retry.
+    document = await ClaimDue(kind, document_id)
+
+    if document:
+        sent = (await emails.SendEmails([BuildEmail(document[OUTBOX_FIELD])]))[0]
+        await RecordResult(kind, document, sent)
+
+async def DeliverDue(max_messages: int = 100) -> Dict[str, int]:
+    """
+    Sends up to max_messages due outbox emails of every kind concurrently over the SMTP
+    pool and records each result. Returns how many were sent, will be retried and failed.
+    """
+    counts = {SENT: 0, PENDING: 0, FAILED: 0}
+
+    for kind in COLLECTIONS:
+        claimed: List[Dict] = []
+
+        while len(claimed) < max_messages and (document := await ClaimDue(kind)):
+            claimed.append(document)
+
+        if not claimed:
+            continue
+
+        results = await emails.SendEmails(BuildEmail(document[OUTBOX_FIELD]) for document in claimed)
+
+        for document, sent in zip(claimed, results):
+            counts[await RecordResult(kind, document, sent)] += 1
+
+    return counts
+
+async def GetDeliveryStatus(kind: str, query: Dict) -> Optional[str]:
+    document = await GetDb()[COLLECTIONS[kind]].find_one(query, {f"{OUTBOX_FIELD}.status": 1})
+
+    if not document:
+        return None
+
+    # Documents written before the outbox had their email sent inline.
+    return document.get(OUTBOX_FIELD, {}).get("status", SENT)
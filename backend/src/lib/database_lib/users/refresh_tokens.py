@@ -1,92 +1,159 @@
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from pymongo import ReturnDocument
 from ..database_config import GetDb
-from bson import ObjectId
+import config
 
-def StoreRefreshToken(
-    user_id: ObjectId,
+# Each user has one document in "refresh_sessions" holding up to
+# MAXIMUM_SESSIONS_PER_USER device sessions:
+#   {user_id, email, username, expires_at, sessions: [{token_hash, device_fingerprint, expires_at, created_at}]}
+# The top-level expires_at is the latest session expiry and drives the TTL index,
+# while each session's own expires_at is checked by the queries.
+COLLECTION_NAME = "refresh_sessions"
+SESSION_INFO_PROJECTION = {"_id": 0, "user_id": 1, "email": 1, "username": 1}
+
+def BuildSession(token_hash: str, expires_at: datetime, device_fingerprint: Optional[str], created_at: datetime) -> Dict:
+    return {
+        "token_hash": token_hash,
+        "device_fingerprint": device_fingerprint,
+        "expires_at": expires_at,
+        "created_at": created_at,
+    }
+
+def BuildAppendSessionPipeline(session: Dict, keep_condition: Dict, email: str, username: str) -> List[Dict]:
+    """
+    Update pipeline that drops every session failing keep_condition, appends the
+    new one and keeps only the newest MAXIMUM_SESSIONS_PER_USER, in one write.
+    """
+    kept_sessions = {
+        "$filter": {
+            "input": {"$ifNull": ["$sessions", []]},
+            "as": "session",
+            "cond": keep_condition,
+        }
+    }
+
+    return [
+        {"$set": {
+            "email": email,
+            "username": username,
+            "sessions": {"$slice": [
+                {"$concatArrays": [kept_sessions, [{"$literal": session}]]},
+                -config.MAXIMUM_SESSIONS_PER_USER
+            ]},
+        }},
+        {"$set": {"expires_at": {"$max": "$sessions.expires_at"}}},
+    ]
+
+async def StoreRefreshToken(
+    user_id: str,
     token_hash: str,
     expires_at: datetime,
     email: str,
     username: str,
     device_fingerprint: Optional[str] = None,
-    parent_token_id: Optional[str] = None
-) -> str:
-    refresh_tokens = GetDb()["refresh_tokens"]
-
-    RevokeAllUserRefreshTokens(user_id)
-
-    result = refresh_tokens.insert_one({
-        "user_id": user_id, 
-        "email": email,
-        "username": username,
-        "token_hash": token_hash,
-        "expires_at": expires_at,
-        "created_at": datetime.now(timezone.utc),
-        "device_fingerprint": device_fingerprint,
-        "parent_token_id": parent_token_id
-    })
+    replaces_token_hash: Optional[str] = None
+) -> None:
+    """
+    Starts a session for a device with a single upsert. Expired sessions, any
+    earlier session of the same device and the session being replaced (the
+    refresh token the client still holds) are dropped in the same write.
+    """
+    now = datetime.now(timezone.utc)
+    keep_condition = {"$and": [
+        {"$gt": ["$$session.expires_at", now]},
+        {"$ne": ["$$session.device_fingerprint", device_fingerprint]},
+        {"$ne": ["$$session.token_hash", replaces_token_hash]},
+    ]}
+
+    await GetDb()[COLLECTION_NAME].update_one(
+        {"user_id": str(user_id)},
+        BuildAppendSessionPipeline(
+            BuildSession(token_hash, expires_at, device_fingerprint, now),
+            keep_condition,
+            email,
+            username
+        ),
+        upsert=True
+    )
 
-    return str(result.inserted_id)
+async def RotateRefreshToken(
+    token_hash: str,
+    new_token_hash: str,
+    new_expires_at: datetime,
+    device_fingerprint: str
+) -> Optional[Dict]:
+    """
+    Swaps a live session's token for a new one in a single conditional write.
+    Returns the owner's user_id, email and username, or None when the token is
+    unknown, expired, already rotated or presented from another device.
+    """
+    now = datetime.now(timezone.utc)
+
+    return await GetDb()[COLLECTION_NAME].find_one_and_update(
+        {"sessions": {"$elemMatch": {
+            "token_hash": token_hash,
+            "device_fingerprint": device_fingerprint,
+            "expires_at": {"$gt": now},
+        }}},
+        {
+            "$set": {
+                "sessions.$.token_hash": new_token_hash,
+                "sessions.$.expires_at": new_expires_at,
+                "sessions.$.rotated_at": now,
+            },
+            "$max": {"expires_at": new_expires_at},
+        },
+        projection=SESSION_INFO_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
 
-def GetRefreshTokenInfo(token_hash: str) -> Optional[Dict]:
-    refresh_tokens = GetDb()["refresh_tokens"]
-    token = refresh_tokens.find_one({
-        "token_hash": token_hash,
-        "expires_at": {"$gt": datetime.now(timezone.utc)}
-    })
+async def GetRefreshTokenInfo(token_hash: str) -> Optional[Dict]:
+    sessions = GetDb()[COLLECTION_NAME]
+    user = await sessions.find_one(
+        {"sessions": {"$elemMatch": {
+            "token_hash": token_hash,
+            "expires_at": {"$gt": datetime.now(timezone.utc)},
+        }}},
+        SESSION_INFO_PROJECTION | {"sessions.$": 1}
+    )
 
-    if token:
+    if user:
         return {
-            "user_id": token["user_id"],
-            "email": token["email"],
-            "username": token["username"],
-            "device_fingerprint": token.get("device_fingerprint"),
-            "token_id": str(token["_id"])
+            "user_id": user["user_id"],
+            "email": user["email"],
+            "username": user["username"],
+            "device_fingerprint": user["sessions"][0].get("device_fingerprint"),
         }
-    
-    return None
 
-def ValidateRefreshToken(user_id: str, token_hash: str) -> bool:
-    refresh_tokens = GetDb()["refresh_tokens"]
-    token = refresh_tokens.find_one({
-        "user_id": user_id,
-        "token_hash": token_hash,
-        "expires_at": {"$gt": datetime.now(timezone.utc)}
-    })
-
-    return token is not None
+    return None
 
-def RevokeRefreshToken(token_hash: str) -> bool:
-    refresh_tokens = GetDb()["refresh_tokens"]
-    result = refresh_tokens.delete_one(
-        {"token_hash": token_hash},
+async def ValidateRefreshToken(user_id: str, token_hash: str) -> bool:
+    sessions = GetDb()[COLLECTION_NAME]
+    user = await sessions.find_one(
+        {
+            "user_id": str(user_id),
+            "sessions": {"$elemMatch": {
+                "token_hash": token_hash,
+                "expires_at": {"$gt": datetime.now(timezone.utc)},
+            }},
+        },
+        {"_id": 1}
     )
 
-    return result.deleted_count > 0
+    return user is not None
 
-def RevokeAllUserRefreshTokens(user_id: ObjectId) -> int:
-    refresh_tokens = GetDb()["refresh_tokens"]
-    result = refresh_tokens.delete_many({"user_id": user_id})
-
-    return result.deleted_count
-
-def ConsumeRefreshToken(token_hash: str) -> Optional[Dict]:
-    refresh_tokens = GetDb()["refresh_tokens"]
-
-    token = refresh_tokens.find_one_and_delete(
-        {
-            "token_hash": token_hash,
-            "expires_at": {"$gt": datetime.now(timezone.utc)}
-        }
+async def RevokeRefreshToken(token_hash: str) -> bool:
+    sessions = GetDb()[COLLECTION_NAME]
+    result = await sessions.update_one(
+        {"sessions.token_hash": token_hash},
+        {"$pull": {"sessions": {"token_hash": token_hash}}}
     )
 
-    if not token:
-        return None
+    return result.modified_count > 0
 
-    return {
-        "user_id": token["user_id"],
-        "email": token["email"],
-        "username": token["username"],
-        "device_fingerprint": token.get("device_fingerprint"),
-    }
\ No newline at end of file
+async def RevokeAllUserRefreshTokens(user_id: str) -> int:
+    sessions = GetDb()[COLLECTION_NAME]
+    user = await sessions.find_one_and_delete({"user_id": str(user_id)}, {"sessions.token_hash": 1})
+
+    return len(user.get("sessions", [])) if user else 0
@@ -0,0 +1,103 @@
+from typing import Dict, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from ..database_config import GetDb
+
+# Projections for the endpoints that read users, so no caller pulls the whole document.
+ID_PROJECTION = {"_id": 1}
+PROFILE_PROJECTION = {"_id": 1, "email": 1, "username": 1}
+LOGIN_PROJECTION = {"_id": 1, "email": 1, "username": 1, "password": 1}
+SETTINGS_PROJECTION = {"_id": 1, "bodyweight": 1}
+
+class UserRepository:
+    """
+    Per-request access to the users collection.
+
+    Each lookup is a single query that only fetches the projected fields.
+    Results are memoized for the lifetime of the repository, so asking for the
+    same user twice within one request costs one round trip. A cached document
+    is reused whenever it already holds every field the caller asks for.
+    """
+
+    def __init__(self):
+        self.round_trips = 0
+        self._documents: Dict[Tuple[str, str], Tuple[frozenset, Optional[Dict]]] = {}
+
+    def _GetMemoized(self, key: Tuple[str, str], projection: Dict) -> Tuple[bool, Optional[Dict]]:
+        if key not in self._documents:
+            return False, None
+
+        fields, document = self._documents[key]
+
+        if document is None or set(projection) <= fields:
+            return True, document
+
+        return False, None
+
+    def _Memoize(self, document: Optional[Dict], projection: Dict, *keys: Tuple[str, str]) -> None:
+        fields = frozenset(projection)
+
+        if document is not None:
+            keys = keys + (("_id", str(document["_id"])),)
+
+            if "email" in document:
+                keys = keys + (("email", document["email"]),)
+
+        for key in keys:
+            self._documents[key] = (fields, document)
+
+    async def _FindOne(self, key: Tuple[str, str], query: Dict, projection: Dict) -> Optional[Dict]:
+        found, document = self._GetMemoized(key, projection)
+
+        if found:
+            return document
+
+        self.round_trips += 1
+        document = await GetDb()["users"].find_one(query, projection)
+        self._Memoize(document, projection, key)
+
+        return document
+
+    async def FindById(self, user_id: str | ObjectId, projection: Dict = PROFILE_PROJECTION) -> Optional[Dict]:
+        if not ObjectId.is_valid(user_id):
+            return None
+
+        return await self._FindOne(("_id", str(user_id)), {"_id": ObjectId(user_id)}, projection)
+
+    async def FindByEmail(self, email: str, projection: Dict = PROFILE_PROJECTION) -> Optional[Dict]:
+        return await self._FindOne(("email", email), {"email": email}, projection)
+
+    async def FindByEmailOrUsername(self, email_or_username: str, projection: Dict = PROFILE_PROJECTION) -> Optional[Dict]:
+        key = ("email_or_username", email_or_username)
+        found, document = self._GetMemoized(key, projection)
+
+        if found:
+            return document
+
+        self.round_trips += 1
+        query = {"$or": [{"email": email_or_username}, {"username": email_or_username}]}
+        matches = await GetDb()["users"].find(query, projection | {"email": 1}).limit(2).to_list()
+
+        # An email match wins over a username match, as it did when they were separate queries.
+        matches.sort(key=lambda user: user.get("email") != email_or_username)
+        document = matches[0] if matches else None
+        self._Memoize(document, projection, key)
+
+        return document
+
+    async def UpdatePasswordById(self, user_id: str | ObjectId, hashed_password: str) -> Optional[Dict]:
+        """Sets the password and returns the user's profile fields from the same write."""
+        self.round_trips += 1
+        document = await GetDb()["users"].find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"password": hashed_password}},
+            projection=PROFILE_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        self._Memoize(document, PROFILE_PROJECTION, ("_id", str(user_id)))
+
+        return document
+
+def GetUserRepository() -> UserRepository:
+    """FastAPI dependency; FastAPI caches it, so one request shares one repository."""
+    return UserRepository()
@@ -1,14 +1,19 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional
 from ..database_config import GetDb
 import config 
 from bson import ObjectId
 import hashlib
 import secrets
-from . import general_methods
+from . import email_outbox
 from . import refresh_tokens
+from .repository import UserRepository
+from .verified_user_cache import verified_user_cache
 
-def GetPasswordResetToken(token_hash: str):
+def HashToken(raw_token: str) -> str:
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+async def GetPasswordResetToken(token_hash: str):
     """
     Docstring for GetPasswordResetToken
     
@@ -17,17 +22,17 @@ def GetPasswordResetToken(token_hash: str):
     """
     collection = GetDb()["password_reset_tokens"]
 
-    return collection.find_one({
+    return await collection.find_one({
         "token_hash": token_hash,
         "expires_at": {"$gt": datetime.now(timezone.utc)}
     })
 
-def ConsumePasswordResetToken(raw_token: str) -> Optional[ObjectId]:
+async def ConsumePasswordResetToken(raw_token: str) -> Optional[ObjectId]:
     collection = GetDb()["password_reset_tokens"]
 
-    token_hash = hashlib.sha256(raw_token.encode()).hexdigest()
+    token_hash = HashToken(raw_token)
 
-    token = collection.find_one_and_delete({
+    token = await collection.find_one_and_delete({
         "token_hash": token_hash,
         "expires_at": {"$gt": datetime.now(timezone.utc)}
     })
@@ -37,55 +42,44 @@ def ConsumePasswordResetToken(raw_token: str) -> Optional[ObjectId]:
 
     return token["user_id"] 
 
-def StorePasswordResetToken(user_id: ObjectId) -> str:
+# Returns the token document's id. Only the hash is stored; the raw token waits in the
+# outbox until the reset email is sent.
+async def StorePasswordResetToken(user_id: ObjectId, email: str) -> ObjectId:
     collection = GetDb()["password_reset_tokens"]
 
     raw_token = secrets.token_urlsafe(32)
-    token_hash = hashlib.sha256(raw_token.encode()).hexdigest()
+    token_hash = HashToken(raw_token)
 
-    collection.delete_many({"user_id": user_id})
+    await collection.delete_many({"user_id": user_id})
 
-    collection.insert_one({
+    result = await collection.insert_one({
         "user_id": user_id,
         "token_hash": token_hash,
         "expires_at": datetime.now(timezone.utc) + timedelta(
             minutes=config.LINK_EXPIRATION_MINUTES
         ),
-        "created_at": datetime.now(timezone.utc)
+        "created_at": datetime.now(timezone.utc),
+        email_outbox.OUTBOX_FIELD: email_outbox.NewOutbox(email_outbox.RESET_PASSWORD, email, raw_token)
     })
 
-    return raw_token
-
-def UserHasResetPasswordToken(email: str) -> bool:
-    user = general_methods.GetVerifiedUserByEmail(email)
-
-    if not user:
-        return False
-
-    user_id = user["_id"]
+    return result.inserted_id
 
+async def UserHasResetPasswordToken(user_id: ObjectId) -> bool:
     collection = GetDb()["password_reset_tokens"]
-    token = collection.find_one({
+    # A token whose email could not be delivered does not hold back a new request.
+    token = await collection.find_one({
         "user_id": user_id,
-        "expires_at": {"$gt": datetime.now(timezone.utc)}
+        "expires_at": {"$gt": datetime.now(timezone.utc)},
+        f"{email_outbox.OUTBOX_FIELD}.status": {"$ne": email_outbox.FAILED}
     })
 
     return token is not None
 
-def ResetPassword(user_id: ObjectId, hashed_password: str) -> None:
-    users = GetDb()["users"]
-    users.update_one(
-        {"_id": user_id},
-        {"$set": {"password": hashed_password}}
-    )
-    refresh_tokens.RevokeAllUserRefreshTokens(user_id)
+async def ResetPassword(users: UserRepository, user_id: ObjectId, hashed_password: str) -> Optional[Dict]:
+    # The update hands back the user's email and username, so no re-read is needed.
+    user = await users.UpdatePasswordById(user_id, hashed_password)
+    # Refresh tokens store the user id as a string.
+    await refresh_tokens.RevokeAllUserRefreshTokens(str(user_id))
+    verified_user_cache.Invalidate(user_id)
 
-def DoesResetPasswordTokenExist(token: str) -> bool:
-    collection = GetDb()["password_reset_tokens"]
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    token_doc = collection.find_one({
-        "token_hash": token_hash,
-        "expires_at": {"$gt": datetime.now(timezone.utc)}
-    })
-    
-    return token_doc is not None
\ No newline at end of file
+    return user
@@ -0,0 +1,57 @@
+import threading
+from typing import Dict
+from cachetools import TTLCache
+import config
+
+class VerifiedUserCache:
+    """
+    Remembers which (user id, email) pairs belong to a verified user so
+    GetCurrentUser can skip the database on most requests.
+
+    Entries expire after ttl_seconds and the cache holds at most max_entries,
+    evicting the least recently used. The cache is per process, so the TTL is
+    what bounds staleness across workers; invalidation only clears this one.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def Contains(self, user_id: str, email: str) -> bool:
+        with self._lock:
+            if self._entries.get(user_id) == email:
+                self._hits += 1
+                return True
+
+            self._misses += 1
+            return False
+
+    def Add(self, user_id: str, email: str) -> None:
+        with self._lock:
+            self._entries[user_id] = email
+
+    def Invalidate(self, user_id: str) -> None:
+        with self._lock:
+            if self._entries.pop(str(user_id), None) is not None:
+                self._invalidations += 1
+
+    def GetMetrics(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._entries.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+verified_user_cache = VerifiedUserCache(
+    config.VERIFIED_USER_CACHE_SIZE,
+    config.VERIFIED_USER_CACHE_TTL_SECONDS
+)
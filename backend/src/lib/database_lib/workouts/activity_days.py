@@ -0,0 +1,69 @@
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List
+from bson.int64 import Int64
+from pymongo.errors import DuplicateKeyError
+from ..database_config import GetDb
+from lib.misc.activity_bitmap import ActivityTimeline, GetWordAndMask, JoinWords, WORDS_PER_YEAR
+
+# One document per user and year with the active days packed into six int64 words:
+#   {user_id, year, w0, ..., w5, updated_at}
+# A day is active while its workout_day_counters count is above zero, so the bit is
+# flipped only when a counter moves between 0 and 1.
+COLLECTION_NAME = "activity_days"
+WORD_FIELDS = [f"w{i}" for i in range(WORDS_PER_YEAR)]
+
+async def SetDayActive(user_id: str, scheduled_day: str, active: bool) -> None:
+    day = date.fromisoformat(scheduled_day)
+    word, mask = GetWordAndMask(day)
+    operation = {"or": Int64(mask)} if active else {"and": Int64(~mask)}
+
+    query = {"user_id": user_id, "year": day.year}
+    update = {"$bit": {WORD_FIELDS[word]: operation}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    activity = GetDb()[COLLECTION_NAME]
+
+    try:
+        await activity.update_one(query, update, upsert=active)
+    except DuplicateKeyError:
+        # Another write created the year's document first; it exists now, so update it.
+        await activity.update_one(query, update)
+
+def GetYearBits(document: Dict) -> int:
+    return JoinWords([document.get(field, 0) for field in WORD_FIELDS])
+
+async def GetTimelines(user_ids: Iterable[str]) -> Dict[str, ActivityTimeline]:
+    # Every year of every given user in one query; a user has one small document per active year.
+    years: Dict[str, Dict[int, int]] = {}
+    documents = GetDb()[COLLECTION_NAME].find(
+        {"user_id": {"$in": list(user_ids)}},
+        {"_id": 0, "user_id": 1, "year": 1, **{field: 1 for field in WORD_FIELDS}}
+    )
+
+    async for document in documents:
+        years.setdefault(document["user_id"], {})[document["year"]] = GetYearBits(document)
+
+    return {user_id: ActivityTimeline(user_years) for user_id, user_years in years.items()}
+
+async def GetTimeline(user_id: str) -> ActivityTimeline:
+    timelines = await GetTimelines([user_id])
+
+    return timelines.get(user_id, ActivityTimeline({}))
+
+async def GetActivitySummary(user_id: str, start: date, end: date, today: date) -> Dict:
+    timeline = await GetTimeline(user_id)
+
+    return {
+        "current_streak": timeline.GetCurrentStreak(today),
+        "longest_streak": timeline.GetLongestStreak(),
+        "active_days": timeline.CountActiveDays(start, end),
+        "days": timeline.GetActiveDays(start, end),
+    }
+
+def BuildYearWords(days: Iterable[date]) -> Dict[int, List[int]]:
+    # Packs days into per-year word lists, ready to $set, for rebuilding from the counters.
+    words: Dict[int, List[int]] = {}
+
+    for day in days:
+        word, mask = GetWordAndMask(day)
+        words.setdefault(day.year, [0] * WORDS_PER_YEAR)[word] |= mask
+
+    return words
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+from ..database_config import GetDb
+
+# One counter per user, {_id: user_id, version, updated_at}, bumped after every write to
+# the user's workouts or routines. Responses tagged with the version can be revalidated
+# with a single _id lookup instead of re-running the query behind them.
+COLLECTION_NAME = "data_versions"
+
+async def BumpVersion(user_id: str) -> None:
+    versions = GetDb()[COLLECTION_NAME]
+    update = {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+
+    try:
+        await versions.update_one({"_id": user_id}, update, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent first write created the counter; it exists now, so bump it.
+        await versions.update_one({"_id": user_id}, update)
+
+async def GetVersion(user_id: str) -> int:
+    # Read before the data it tags: a write landing in between then only makes the tag
+    # older than the data, which costs a refetch, never a stale 304.
+    document = await GetDb()[COLLECTION_NAME].find_one({"_id": user_id}, {"version": 1})
+
+    return document["version"] if document else 0
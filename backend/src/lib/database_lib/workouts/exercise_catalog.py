@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from ..database_config import GetDb
+from .exercise_catalog_cache import exercise_catalog_cache
+
+# One document per user and exercise name the user has logged:
+#   {user_id, exercise, workouts, last_used, updated_at}
+# workouts counts the workouts containing the exercise and last_used is the latest
+# scheduled_date among them. Creates add to the entries in place; updates and deletes
+# recompute the entries they touch, since a latest date cannot be taken back out.
+COLLECTION_NAME = "exercise_catalog"
+ENTRY_PROJECTION = {"_id": 0, "exercise": 1, "workouts": 1, "last_used": 1}
+
+def NormalizeExerciseName(name: str) -> str:
+    # Autocomplete matches prefixes case-insensitively.
+    return name.strip().lower()
+
+def BuildCatalogPipeline(match: Dict, exercise_names: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Aggregation that recomputes catalog entries from workouts: one row per
+    (user_id, exercise) with its workout count and latest scheduled_date.
+    """
+    if exercise_names is not None:
+        match = match | {"exercises.name": {"$in": exercise_names}}
+
+    pipeline = [
+        {"$match": match},
+        # A workout can list an exercise more than once but counts once.
+        {"$project": {"user_id": 1, "scheduled_date": 1, "names": {"$setUnion": ["$exercises.name", []]}}},
+        {"$unwind": "$names"},
+    ]
+
+    if exercise_names is not None:
+        pipeline.append({"$match": {"names": {"$in": exercise_names}}})
+
+    return pipeline + [
+        {"$group": {
+            "_id": {"user_id": "$user_id", "exercise": "$names"},
+            "workouts": {"$sum": 1},
+            "last_used": {"$max": "$scheduled_date"},
+        }},
+        {"$project": {"_id": 0, "user_id": "$_id.user_id", "exercise": "$_id.exercise", "workouts": 1, "last_used": 1}},
+    ]
+
+def GetExerciseNames(workout: Dict) -> Set[str]:
+    return {exercise["name"] for exercise in workout.get("exercises", [])}
+
+async def AddWorkout(user_id: str, workout: Dict) -> None:
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "exercise": name},
+            {
+                "$inc": {"workouts": 1},
+                "$max": {"last_used": workout["scheduled_date"]},
+                "$set": {"updated_at": now},
+            },
+            upsert=True
+        )
+        for name in GetExerciseNames(workout)
+    ]
+
+    if not operations:
+        return
+
+    catalog = GetDb()[COLLECTION_NAME]
+
+    try:
+        await catalog.bulk_write(operations, ordered=False)
+    except BulkWriteError as error:
+        write_errors = error.details["writeErrors"]
+
+        if any(write_error["code"] != 11000 for write_error in write_errors):
+            raise
+
+        # A concurrent first write created the entry. $inc is not idempotent, so only
+        # the rejected upserts are replayed; the entry exists now and they update it.
+        await catalog.bulk_write([operations[write_error["index"]] for write_error in write_errors], ordered=False)
+    finally:
+        exercise_catalog_cache.Invalidate(user_id)
+
+async def RecomputeExercises(user_id: str, exercise_names: Set[str]) -> None:
+    """Rebuilds the given entries from the stored workouts and drops the unused ones."""
+    if not exercise_names:
+        return
+
+    db = GetDb()
+    now = datetime.now(timezone.utc)
+    names = list(exercise_names)
+    pipeline = BuildCatalogPipeline({"user_id": user_id}, names)
+    recomputed = {row["exercise"]: row async for row in await db["workouts"].aggregate(pipeline)}
+    operations = []
+
+    for name in names:
+        query = {"user_id": user_id, "exercise": name}
+
+        if name in recomputed:
+            fields = {
+                "workouts": recomputed[name]["workouts"],
+                "last_used": recomputed[name]["last_used"],
+                "updated_at": now,
+            }
+            operations.append(UpdateOne(query, {"$set": fields}, upsert=True))
+        else:
+            operations.append(DeleteOne(query))
+
+    try:
+        await db[COLLECTION_NAME].bulk_write(operations, ordered=False)
+    finally:
+        exercise_catalog_cache.Invalidate(user_id)
+
+async def RemoveWorkout(user_id: str, workout: Dict) -> None:
+    await RecomputeExercises(user_id, GetExerciseNames(workout))
+
+async def ReplaceWorkout(user_id: str, previous: Dict, updated: Dict) -> None:
+    if previous.get("scheduled_date") == updated.get("scheduled_date") and GetExerciseNames(previous) == GetExerciseNames(updated):
+        # Same exercises on the same date: counts and dates are unchanged.
+        return
+
+    await RecomputeExercises(user_id, GetExerciseNames(previous) | GetExerciseNames(updated))
+
+async def GetCatalog(user_id: str) -> List[Dict]:
+    """The user's whole catalog, most used first, from the cache when it is warm."""
+    entries, generation = exercise_catalog_cache.Get(user_id)
+
+    if entries is not None:
+        return entries
+
+    entries = await GetDb()[COLLECTION_NAME].find({"user_id": user_id}, ENTRY_PROJECTION).to_list()
+    entries.sort(key=lambda entry: (-entry["workouts"], entry["exercise"]))
+    exercise_catalog_cache.Put(user_id, entries, generation)
+
+    return entries
+
+async def SearchCatalog(user_id: str, prefix: str = "", limit: Optional[int] = None) -> List[Dict]:
+    normalized_prefix = NormalizeExerciseName(prefix)
+    matches = [
+        entry for entry in await GetCatalog(user_id)
+        if NormalizeExerciseName(entry["exercise"]).startswith(normalized_prefix)
+    ]
+
+    return matches[:limit] if limit else matches
@@ -0,0 +1,66 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from cachetools import TTLCache
+import config
+
+class ExerciseCatalogCache:
+    """
+    Keeps each user's exercise catalog in memory so autocomplete requests do not
+    touch the database while the user types.
+
+    Every catalog write invalidates the user's entry. A read that raced with a
+    write could otherwise put the catalog it read before the write back into the
+    cache, so each user has a generation that invalidation bumps, and Put only
+    stores a catalog read under the current generation. The cache is per process,
+    so the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._generations: Dict[str, int] = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def Get(self, user_id: str) -> Tuple[Optional[List[Dict]], int]:
+        with self._lock:
+            entries = self._entries.get(user_id)
+            generation = self._generations.get(user_id, 0)
+
+            if entries is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+            return entries, generation
+
+    def Put(self, user_id: str, entries: List[Dict], generation: int) -> None:
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._entries[user_id] = entries
+
+    def Invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+            if self._entries.pop(user_id, None) is not None:
+                self._invalidations += 1
+
+    def GetMetrics(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._entries.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+exercise_catalog_cache = ExerciseCatalogCache(
+    config.EXERCISE_CATALOG_CACHE_SIZE,
+    config.EXERCISE_CATALOG_CACHE_TTL_SECONDS
+)
@@ -1,81 +1,221 @@
+import base64
+import json
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pymongo.results import InsertOneResult
-from typing import Dict, List, Optional
-from ..database_config import GetDb, MakeDatetimeAware
+from typing import Dict, List, Optional, Tuple
+from ..database_config import GetDb
+from .data_versions import BumpVersion
+from .tombstones import RecordDeletion
+from lib.misc.response_cache import list_response_cache
+
+# Lists are ordered newest first by this field, with _id as the tie-breaker.
+SORT_FIELDS = {"workouts": "scheduled_date", "routines": "created_at"}
+
+class DuplicateEntryError(ValueError):
+    """Raised when a write collides with one of the unique normalized_name indexes."""
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+def AsUtc(value: datetime) -> datetime:
+    # Query parameters and cursors may carry naive datetimes, which are taken as UTC like
+    # scheduled_date on create, so they compare with the stored, timezone-aware values.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def EncodeCursor(sort_value: datetime, entry_id: str) -> str:
+    payload = json.dumps([sort_value.isoformat(), entry_id], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def DecodeCursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, entry_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+        return AsUtc(datetime.fromisoformat(sort_value)), ObjectId(entry_id)
+    except Exception:
+        raise InvalidCursorError(cursor)
 
 def NormalizeName(s: str) -> str:
     # Remove ALL whitespace (spaces, tabs, newlines, etc.) and lowercase
     return "".join(s.split()).lower()
 
-def UpdateCollectionEntry(collection_name: str, entry_id: str, user_id: str, update_data: Dict) -> bool:
+def SetNormalizedName(entry_dict: Dict) -> Dict:
+    # normalized_name is stored so the unique indexes can do the duplicate checks.
+    if "name" in entry_dict:
+        entry_dict["normalized_name"] = NormalizeName(entry_dict["name"])
+
+    return entry_dict
+
+async def RecordWrite(user_id: str) -> None:
+    # Moves the user's ETags and cached list responses on to a new version, and frees
+    # this process's cached responses for the old one.
+    await BumpVersion(user_id)
+    await list_response_cache.Invalidate(user_id)
+
+def FormatEntry(entry: Dict) -> Dict:
+    # Shapes a stored document for the response models in place: a string "id" instead of "_id".
+    entry["id"] = str(entry["_id"])
+    del entry["_id"]
+
+    return entry
+
+# Returns the updated document from the write itself, or None when no entry matched.
+async def UpdateCollectionEntry(collection_name: str, entry_id: str, user_id: str, update_data: Dict) -> Optional[Dict]:
+    collection = GetDb()[collection_name]
+    update_data["updated_at"] = datetime.now(timezone.utc)
+
+    try:
+        entry = await collection.find_one_and_update(
+            {"_id": ObjectId(entry_id), "user_id": user_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise DuplicateEntryError(update_data.get("name"))
+
+    if not entry:
+        return None
+
+    await RecordWrite(user_id)
+
+    return FormatEntry(entry)
+
+async def UpdateCollectionEntryWithPrevious(
+    collection_name: str,
+    entry_id: str,
+    user_id: str,
+    update_data: Dict
+) -> Optional[Tuple[Dict, Dict]]:
+    """
+    Like UpdateCollectionEntry, but returns (previous, updated) for callers that
+    maintain state derived from the old values. The write returns the previous
+    document and, because the update is a plain $set, the updated one is that
+    document with update_data applied.
+    """
     collection = GetDb()[collection_name]
     update_data["updated_at"] = datetime.now(timezone.utc)
 
     try:
-        collection.update_one(
+        previous = await collection.find_one_and_update(
             {"_id": ObjectId(entry_id), "user_id": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
         )
+    except DuplicateKeyError:
+        raise DuplicateEntryError(update_data.get("name"))
+
+    if not previous:
+        return None
+
+    await RecordWrite(user_id)
+    updated = FormatEntry({**previous, **update_data})
 
-        return True
-    except Exception as e:
-        return False
+    return FormatEntry(previous), updated
 
-def DeleteCollectionEntry(collection_name: str, entry_id: str, user_id: str) -> bool:
+# Returns the deleted document (or None when nothing matched) so callers can undo derived state.
+async def DeleteCollectionEntry(collection_name: str, entry_id: str, user_id: str) -> Optional[Dict]:
     collection = GetDb()[collection_name]
-    result = collection.delete_one({"_id": ObjectId(entry_id), "user_id": user_id})
+    entry = await collection.find_one_and_delete({"_id": ObjectId(entry_id), "user_id": user_id})
+
+    if entry:
+        await RecordDeletion(collection_name, entry["_id"], user_id)
+        await RecordWrite(user_id)
 
-    return result.deleted_count > 0
+    return entry
 
-def CreateCollectionEntry(collection_name: str, entry_dict : Dict) -> str:
+# Returns the inserted document, so there is no need to read it back.
+async def CreateCollectionEntry(collection_name: str, entry_dict : Dict) -> Dict:
     collection = GetDb()[collection_name]
-    result: InsertOneResult = collection.insert_one(entry_dict)
+    entry_dict["updated_at"] = datetime.now(timezone.utc)
+
+    try:
+        result: InsertOneResult = await collection.insert_one(entry_dict)
+    except DuplicateKeyError:
+        raise DuplicateEntryError(entry_dict.get("name"))
     
-    return str(result.inserted_id)  
+    entry_dict["_id"] = result.inserted_id
+    await RecordWrite(entry_dict["user_id"])
+
+    return FormatEntry(entry_dict)
 
-def GetCollectionEntriesForUser(collection_name: str, user_id: str,
+def FindEntriesForUser(collection, sort_field: str, user_id: str,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 50,
-    skip: int = 0
-) -> List[Dict]:
-    collection = GetDb()[collection_name]
+    exercise_names: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 50
+):
+    """
+    The find behind a page of entries, newest first. With exercise_names only entries
+    listing at least one of them match, and the (user_id, exercises.name, sort field, _id)
+    index serves both the filter and the order.
+    """
     filter_query = {"user_id": user_id}
 
+    if exercise_names:
+        filter_query["exercises.name"] = exercise_names[0] if len(exercise_names) == 1 else {"$in": exercise_names}
+
     if start_date or end_date:
         filter_query["scheduled_date"] = {}
 
         if start_date:
-            filter_query["scheduled_date"]["$gte"] = start_date
+            filter_query["scheduled_date"]["$gte"] = AsUtc(start_date)
 
         if end_date:
-            filter_query["scheduled_date"]["$lte"] = end_date
+            filter_query["scheduled_date"]["$lte"] = AsUtc(end_date)
+
+    if cursor:
+        last_value, last_id = DecodeCursor(cursor)
+        # The $lte bound keeps the index scan starting at the cursor; the $or then
+        # skips the entries sharing the last value that were already returned.
+        bounds = filter_query.setdefault(sort_field, {})
+        bounds["$lte"] = min(bounds.get("$lte", last_value), last_value)
+        filter_query["$or"] = [
+            {sort_field: {"$lt": last_value}},
+            {sort_field: last_value, "_id": {"$lt": last_id}},
+        ]
+
+    # One extra entry tells whether another page exists.
+    return collection.find(filter_query).sort([(sort_field, -1), ("_id", -1)]).skip(skip).limit(limit + 1)
+
+async def GetCollectionEntriesForUser(collection_name: str, user_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    exercise_names: Optional[List[str]] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Returns a page of entries, newest first, and the cursor for the next page
+    (None on the last page). A cursor resumes right after the last entry of the
+    previous page, so the index seek costs the same however deep the page is;
+    skip still works but walks every skipped entry.
+    """
+    sort_field = SORT_FIELDS[collection_name]
+    documents = FindEntriesForUser(
+        GetDb()[collection_name], sort_field, user_id, start_date, end_date, exercise_names, cursor, skip, limit
+    )
+    results = []
 
-    cursor = None
+    async for doc in documents:
+        results.append(FormatEntry(doc))
 
-    if collection_name == "workouts":
-        cursor = collection.find(filter_query).sort("scheduled_date", -1).skip(skip).limit(limit)
-    else:
-        cursor = collection.find(filter_query).skip(skip).limit(limit)
-    
-    results = []
+    next_cursor = None
 
-    for doc in cursor:
-        doc = MakeDatetimeAware(doc)
-        doc["id"] = str(doc["_id"])
-        del doc["_id"] 
-        
-        results.append(doc)
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = EncodeCursor(results[-1][sort_field], results[-1]["id"])
     
-    return results
+    return results, next_cursor
 
-def GetCollectionEntryById(collection_name: str, entry_id: str, user_id: str) -> Optional[Dict]:
+async def GetCollectionEntryById(collection_name: str, entry_id: str, user_id: str) -> Optional[Dict]:
     collection = GetDb()[collection_name]
-    entry = collection.find_one({"_id": ObjectId(entry_id), "user_id": user_id})
-
-    if entry:
-        entry = MakeDatetimeAware(entry)
-        entry["id"] = str(entry["_id"]) 
+    entry = await collection.find_one({"_id": ObjectId(entry_id), "user_id": user_id})
 
-    return entry
\ No newline at end of file
+    return FormatEntry(entry) if entry else None
\ No newline at end of file
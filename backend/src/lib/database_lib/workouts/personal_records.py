@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from ..database_config import GetDb
+
+# One document per user and exercise name, maintained on every workout write:
+#   {user_id, exercise, max_weight, max_weight_workout_id, best_e1rm, best_e1rm_workout_id, updated_at}
+# A record belongs to the first workout that reached it, so a workout that only ties
+# an existing best does not take it over.
+COLLECTION_NAME = "personal_records"
+RECORD_FIELDS = ("max_weight", "max_weight_workout_id", "best_e1rm", "best_e1rm_workout_id")
+
+def EstimateOneRepMax(weight: float, reps: int) -> float:
+    # Epley formula; a single rep (or none logged) is taken at face value.
+    if reps <= 1:
+        return weight
+
+    return weight * (1 + reps / 30)
+
+# Same formula as EstimateOneRepMax, for aggregations over unwound exercises.
+E1RM_EXPRESSION = {"$cond": [
+    {"$gt": ["$exercises.reps", 1]},
+    {"$multiply": ["$exercises.weight", {"$add": [1, {"$divide": ["$exercises.reps", 30]}]}]},
+    "$exercises.weight"
+]}
+
+def GetBestPerExercise(exercises: Iterable[Dict]) -> Dict[str, Dict]:
+    # A workout can log the same exercise more than once; only its best set counts.
+    best = {}
+
+    for exercise in exercises:
+        current = best.setdefault(exercise["name"], {"max_weight": 0.0, "best_e1rm": 0.0})
+        current["max_weight"] = max(current["max_weight"], exercise["weight"])
+        current["best_e1rm"] = max(current["best_e1rm"], EstimateOneRepMax(exercise["weight"], exercise["reps"]))
+
+    return best
+
+def BuildApplyUpdate(workout_id: str, max_weight: float, best_e1rm: float, now: datetime) -> List[Dict]:
+    # Every expression in a $set stage reads the document as it was before the stage,
+    # so the source ids are decided against the old bests.
+    return [{"$set": {
+        "max_weight_workout_id": {"$cond": [
+            {"$gt": [max_weight, {"$ifNull": ["$max_weight", -1]}]}, workout_id, "$max_weight_workout_id"
+        ]},
+        "best_e1rm_workout_id": {"$cond": [
+            {"$gt": [best_e1rm, {"$ifNull": ["$best_e1rm", -1]}]}, workout_id, "$best_e1rm_workout_id"
+        ]},
+        "max_weight": {"$max": ["$max_weight", max_weight]},
+        "best_e1rm": {"$max": ["$best_e1rm", best_e1rm]},
+        "updated_at": now,
+    }}]
+
+def BuildRecomputePipeline(match: Dict, exercise_names: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Aggregation over workouts that yields one row per (user_id, exercise) with the
+    record fields, ties going to the earliest workout like the incremental updates.
+    """
+    exercise_match = {"exercises.name": {"$in": exercise_names}} if exercise_names is not None else {}
+
+    return [
+        {"$match": match | exercise_match},
+        {"$unwind": "$exercises"},
+        {"$match": exercise_match},
+        {"$set": {"e1rm": E1RM_EXPRESSION}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "exercise": "$exercises.name"},
+            "max_weight": {"$top": {"sortBy": {"exercises.weight": -1, "_id": 1}, "output": ["$exercises.weight", "$_id"]}},
+            "best_e1rm": {"$top": {"sortBy": {"e1rm": -1, "_id": 1}, "output": ["$e1rm", "$_id"]}},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "exercise": "$_id.exercise",
+            "max_weight": {"$arrayElemAt": ["$max_weight", 0]},
+            "max_weight_workout_id": {"$toString": {"$arrayElemAt": ["$max_weight", 1]}},
+            "best_e1rm": {"$arrayElemAt": ["$best_e1rm", 0]},
+            "best_e1rm_workout_id": {"$toString": {"$arrayElemAt": ["$best_e1rm", 1]}},
+        }},
+    ]
+
+async def ApplyWorkout(user_id: str, workout_id: str, exercises: Iterable[Dict]) -> None:
+    """Raises the user's records with a workout's exercises, one bulk write for all of them."""
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "exercise": name},
+            BuildApplyUpdate(workout_id, best["max_weight"], best["best_e1rm"], now),
+            upsert=True
+        )
+        for name, best in GetBestPerExercise(exercises).items()
+    ]
+
+    if not operations:
+        return
+
+    records = GetDb()[COLLECTION_NAME]
+
+    try:
+        await records.bulk_write(operations, ordered=False)
+    except BulkWriteError as error:
+        if any(write_error["code"] != 11000 for write_error in error.details["writeErrors"]):
+            raise
+
+        # Two first-ever writes for the same exercise raced on the upsert and the unique
+        # index rejected one. The updates are idempotent, so replaying the batch is safe.
+        await records.bulk_write(operations, ordered=False)
+
+async def RecomputeExercises(user_id: str, exercise_names: List[str]) -> None:
+    """
+    Rebuilds the given exercises' records from the workouts that exist now, and drops
+    records of exercises the user no longer has. Used when a record's source changes.
+    """
+    if not exercise_names:
+        return
+
+    db = GetDb()
+    now = datetime.now(timezone.utc)
+    pipeline = BuildRecomputePipeline({"user_id": user_id}, exercise_names)
+    recomputed = {row["exercise"]: row async for row in await db["workouts"].aggregate(pipeline)}
+
+    operations = []
+
+    for name in exercise_names:
+        key = {"user_id": user_id, "exercise": name}
+
+        if name in recomputed:
+            fields = {field: recomputed[name][field] for field in RECORD_FIELDS}
+            operations.append(UpdateOne(key, {"$set": fields | {"updated_at": now}}, upsert=True))
+        else:
+            operations.append(DeleteOne(key))
+
+    await db[COLLECTION_NAME].bulk_write(operations, ordered=False)
+
+async def GetRecordsHeldBy(user_id: str, workout_id: str, exercise_names: Iterable[str]) -> List[str]:
+    # Exercise names whose weight or e1RM record currently comes from the workout.
+    records = GetDb()[COLLECTION_NAME].find(
+        {
+            "user_id": user_id,
+            "exercise": {"$in": list(set(exercise_names))},
+            "$or": [{"max_weight_workout_id": workout_id}, {"best_e1rm_workout_id": workout_id}],
+        },
+        {"_id": 0, "exercise": 1}
+    )
+
+    return [record["exercise"] async for record in records]
+
+async def RemoveWorkout(user_id: str, workout_id: str, exercises: Iterable[Dict]) -> None:
+    names = [exercise["name"] for exercise in exercises]
+    await RecomputeExercises(user_id, await GetRecordsHeldBy(user_id, workout_id, names))
+
+async def ReplaceWorkout(user_id: str, workout_id: str, previous_exercises: Iterable[Dict], exercises: Iterable[Dict]) -> None:
+    """
+    Brings the records in line with an edited workout. Records the old version held are
+    recomputed from the stored workouts, which already include the edit, and then the
+    new version is applied like a fresh workout.
+    """
+    await RemoveWorkout(user_id, workout_id, previous_exercises)
+    await ApplyWorkout(user_id, workout_id, exercises)
+
+async def GetRecordsForExercises(user_id: str, exercise_names: Iterable[str]) -> List[Dict]:
+    records = GetDb()[COLLECTION_NAME].find(
+        {"user_id": user_id, "exercise": {"$in": list(set(exercise_names))}},
+        {"_id": 0, "exercise": 1, **{field: 1 for field in RECORD_FIELDS}}
+    )
+
+    return await records.to_list()
@@ -1,29 +1,38 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from lib.database_lib.database_config import GetDb
 from . import general_methods as general_methods 
 
-def UpdateRoutine(routine_id: str, user_id: str, update_data: Dict) -> bool:
-    return general_methods.UpdateCollectionEntry("routines", routine_id, user_id, update_data)
+# Returns the updated routine, or None when it does not exist.
+async def UpdateRoutine(routine_id: str, user_id: str, update_data: Dict) -> Optional[Dict]:
+    general_methods.SetNormalizedName(update_data)
 
-def DeleteRoutine(routine_id: str, user_id: str) -> bool:
-    return general_methods.DeleteCollectionEntry("routines", routine_id, user_id)
+    return await general_methods.UpdateCollectionEntry("routines", routine_id, user_id, update_data)
 
-def CreateRoutine(routine_dict : Dict) -> str:
-    return general_methods.CreateCollectionEntry("routines", routine_dict)
+async def DeleteRoutine(routine_id: str, user_id: str) -> bool:
+    return await general_methods.DeleteCollectionEntry("routines", routine_id, user_id) is not None
 
-def GetRoutineById(routine_id: str, user_id: str) -> Optional[Dict]:
-    return general_methods.GetCollectionEntryById("routines", routine_id, user_id)
+# Raises DuplicateEntryError when the user already has a routine with the same normalized name.
+async def CreateRoutine(routine_dict : Dict) -> Dict:
+    general_methods.SetNormalizedName(routine_dict)
 
-def GetRoutinesForUser(user_id: str, limit: int = 50, skip: int = 0) -> List[Dict]:
-    return general_methods.GetCollectionEntriesForUser("routines", user_id, None, None, limit, skip)
+    return await general_methods.CreateCollectionEntry("routines", routine_dict)
 
-def IsThereARoutineWithName(user_id: str, name: str) -> bool:
-    routines = GetDb()["routines"]
-    normalized_name = general_methods.NormalizeName(name)
-    user_routines = routines.find({"user_id": user_id})
+async def GetRoutineById(routine_id: str, user_id: str) -> Optional[Dict]:
+    return await general_methods.GetCollectionEntryById("routines", routine_id, user_id)
+
+async def GetRoutinesForUser(
+    user_id: str,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    return await general_methods.GetCollectionEntriesForUser("routines", user_id, None, None, limit, skip, cursor)
 
-    for routine in user_routines:
-        if "name" in routine and general_methods.NormalizeName(routine["name"]) == normalized_name:
-            return True
+async def IsThereARoutineWithName(user_id: str, name: str) -> bool:
+    routines = GetDb()["routines"]
+    routine = await routines.find_one(
+        {"user_id": user_id, "normalized_name": general_methods.NormalizeName(name)},
+        {"_id": 1}
+    )
 
-    return False
\ No newline at end of file
+    return routine is not None
\ No newline at end of file
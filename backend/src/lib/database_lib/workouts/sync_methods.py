@@ -0,0 +1,117 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from ..database_config import GetDb
+from . import tombstones
+from .general_methods import FormatEntry
+import config
+
+SYNCED_COLLECTIONS = ("workouts", "routines")
+SOURCES = SYNCED_COLLECTIONS + (tombstones.COLLECTION_NAME,)
+
+# Where a sync resumes in one collection: after (updated_at, _id) in that order, or from
+# updated_at inclusive when there is no _id.
+Position = Tuple[datetime, Optional[ObjectId]]
+
+class InvalidSyncTokenError(ValueError):
+    """Raised when a sync token cannot be decoded."""
+
+def EncodeSyncToken(positions: Dict[str, Position]) -> str:
+    payload = {
+        name: [updated_at.isoformat(), str(entry_id) if entry_id else None]
+        for name, (updated_at, entry_id) in positions.items()
+    }
+
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def DecodeSyncToken(token: str) -> Dict[str, Position]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        positions = {
+            name: (datetime.fromisoformat(payload[name][0]), ObjectId(payload[name][1]) if payload[name][1] else None)
+            for name in SOURCES
+        }
+    except Exception:
+        raise InvalidSyncTokenError(token)
+
+    if any(updated_at.tzinfo is None for updated_at, _ in positions.values()):
+        raise InvalidSyncTokenError(token)
+
+    return positions
+
+def GetCompletePosition(started_at: datetime) -> Position:
+    # updated_at is stamped before a write commits, so a write can become visible after a
+    # sync has read past its timestamp. Starting the next sync SYNC_OVERLAP_SECONDS early
+    # picks those up again; clients apply changes by id, so the repeats are harmless.
+    return started_at - timedelta(seconds=config.SYNC_OVERLAP_SECONDS), None
+
+def BuildChangesQuery(user_id: str, position: Position) -> Dict:
+    updated_at, entry_id = position
+    query = {"user_id": user_id, "updated_at": {"$gte": updated_at}}
+
+    if entry_id is not None:
+        # Same keyset as the list cursors: the $gte bound keeps the index scan starting at
+        # the position and the $or skips the entries sharing its updated_at already sent.
+        query["$or"] = [
+            {"updated_at": {"$gt": updated_at}},
+            {"updated_at": updated_at, "_id": {"$gt": entry_id}},
+        ]
+
+    return query
+
+def TrimPages(pages: Dict[str, List[Dict]], limit: int) -> Dict[str, Position]:
+    """
+    Trims every page fetched with limit + 1 down to limit, in place, and returns the
+    position after the last entry kept of each page that had more. Positions carry the
+    _id, so a page of entries that all share one updated_at still moves forward.
+    """
+    positions = {}
+
+    for name, page in pages.items():
+        if len(page) > limit:
+            del page[limit:]
+            positions[name] = page[-1]["updated_at"], page[-1]["_id"]
+
+    return positions
+
+async def FindChanges(collection_name: str, user_id: str, position: Position, limit: int) -> List[Dict]:
+    documents = GetDb()[collection_name].find(
+        BuildChangesQuery(user_id, position)
+    ).sort([("updated_at", 1), ("_id", 1)]).limit(limit + 1)
+
+    return await documents.to_list()
+
+async def GetChanges(user_id: str, token: Optional[str], limit: int) -> Dict:
+    """
+    The workouts and routines created or updated, and the ids of those deleted, since the
+    token. Without a token, or with one older than the tombstones are kept, nothing is
+    returned and reset is set: the client loads the lists in full and syncs from the token.
+    """
+    started_at = datetime.now(timezone.utc)
+    positions = DecodeSyncToken(token) if token else None
+    changes = {"workouts": [], "routines": [], "deleted_workouts": [], "deleted_routines": []}
+    complete = GetCompletePosition(started_at)
+    oldest_kept = started_at - timedelta(days=config.SYNC_TOMBSTONE_TTL_DAYS)
+
+    if positions is None or any(updated_at < oldest_kept for updated_at, _ in positions.values()):
+        token = EncodeSyncToken({name: complete for name in SOURCES})
+
+        return changes | {"token": token, "has_more": False, "reset": True}
+
+    fetched = await asyncio.gather(*(FindChanges(name, user_id, positions[name], limit) for name in SOURCES))
+    pages = dict(zip(SOURCES, fetched))
+    # A collection that had more resumes right after its page; the others are caught up.
+    resume_positions = TrimPages(pages, limit)
+    next_positions = {name: complete for name in SOURCES} | resume_positions
+
+    for name in SYNCED_COLLECTIONS:
+        changes[name] = [FormatEntry(entry) for entry in pages[name]]
+
+    for tombstone in pages[tombstones.COLLECTION_NAME]:
+        changes[f"deleted_{tombstone['collection']}"].append(tombstone["entry_id"])
+
+    return changes | {"token": EncodeSyncToken(next_positions), "has_more": bool(resume_positions), "reset": False}
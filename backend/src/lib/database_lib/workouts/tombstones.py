@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from ..database_config import GetDb
+import config
+
+# One document per deleted workout or routine, so a sync can report the deletion:
+#   {user_id, collection, entry_id, updated_at, expires_at}
+# updated_at is the deletion time, which lets a sync read tombstones through the same
+# (user_id, updated_at) range as the live entries. They expire after SYNC_TOMBSTONE_TTL_DAYS.
+COLLECTION_NAME = "tombstones"
+
+async def RecordDeletion(collection_name: str, entry_id: ObjectId, user_id: str) -> None:
+    now = datetime.now(timezone.utc)
+
+    await GetDb()[COLLECTION_NAME].insert_one({
+        "user_id": user_id,
+        "collection": collection_name,
+        "entry_id": str(entry_id),
+        "updated_at": now,
+        "expires_at": now + timedelta(days=config.SYNC_TOMBSTONE_TTL_DAYS),
+    })
@@ -0,0 +1,226 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from ..database_config import GetDb
+from .personal_records import E1RM_EXPRESSION, EstimateOneRepMax
+
+# One document per user, exercise and calendar week or month of scheduled_day:
+#   {user_id, exercise, period: "week" | "month", start: "YYYY-MM-DD", volume, sets, max_weight, best_e1rm, updated_at}
+# Weeks start on Monday. Creates add to the buckets in place; updates and deletes
+# recompute the buckets they touch, since a maximum cannot be taken back out.
+COLLECTION_NAME = "training_rollups"
+PERIODS = ("week", "month")
+ROLLUP_FIELDS = ("volume", "sets", "max_weight", "best_e1rm")
+
+# The workout's calendar day, falling back to the UTC day for workouts that predate scheduled_day.
+DAY_EXPRESSION = {"$ifNull": [
+    "$scheduled_day",
+    {"$dateToString": {"format": "%Y-%m-%d", "date": "$scheduled_date", "timezone": "UTC"}}
+]}
+
+def GetPeriodStart(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+
+    return day.replace(day=1)
+
+def GetPeriodEnd(start: date, period: str) -> date:
+    # The first day after the bucket.
+    if period == "week":
+        return start + timedelta(days=7)
+
+    return (start + timedelta(days=32)).replace(day=1)
+
+def GetWorkoutDay(workout: Dict) -> date:
+    if workout.get("scheduled_day"):
+        return date.fromisoformat(workout["scheduled_day"])
+
+    return workout["scheduled_date"].astimezone(timezone.utc).date()
+
+def GetBucketKeys(workout: Dict) -> Set[Tuple[str, str, str]]:
+    # (exercise, period, start) for every bucket the workout contributes to.
+    day = GetWorkoutDay(workout)
+
+    return {
+        (exercise["name"], period, GetPeriodStart(day, period).isoformat())
+        for exercise in workout.get("exercises", [])
+        for period in PERIODS
+    }
+
+def SummarizeExercises(exercises: Iterable[Dict]) -> Dict[str, Dict]:
+    totals: Dict[str, Dict] = {}
+
+    for exercise in exercises:
+        current = totals.setdefault(exercise["name"], {"volume": 0.0, "sets": 0, "max_weight": 0.0, "best_e1rm": 0.0})
+        current["volume"] += exercise["sets"] * exercise["reps"] * exercise["weight"]
+        current["sets"] += exercise["sets"]
+        current["max_weight"] = max(current["max_weight"], exercise["weight"])
+        current["best_e1rm"] = max(current["best_e1rm"], EstimateOneRepMax(exercise["weight"], exercise["reps"]))
+
+    return totals
+
+def BuildRollupPipeline(match: Dict, day_from: Optional[str] = None, day_until: Optional[str] = None) -> List[Dict]:
+    """
+    Aggregation that recomputes rollups from workouts: one row per (user_id, exercise,
+    period, start). day_from and day_until bound the calendar days, until exclusive.
+    """
+    day_match = {}
+
+    if day_from:
+        day_match["$gte"] = day_from
+
+    if day_until:
+        day_match["$lt"] = day_until
+
+    pipeline = [{"$match": match}, {"$set": {"day": DAY_EXPRESSION}}]
+
+    if day_match:
+        pipeline.append({"$match": {"day": day_match}})
+
+    day_date = {"$dateFromString": {"dateString": "$day", "format": "%Y-%m-%d"}}
+    period_starts = [
+        {"period": "week", "start": {"$dateTrunc": {"date": day_date, "unit": "week", "startOfWeek": "monday"}}},
+        {"period": "month", "start": {"$dateTrunc": {"date": day_date, "unit": "month"}}},
+    ]
+
+    return pipeline + [
+        {"$unwind": "$exercises"},
+        {"$set": {"bucket": period_starts, "e1rm": E1RM_EXPRESSION}},
+        {"$unwind": "$bucket"},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "exercise": "$exercises.name",
+                "period": "$bucket.period",
+                "start": {"$dateToString": {"format": "%Y-%m-%d", "date": "$bucket.start"}},
+            },
+            "volume": {"$sum": {"$multiply": ["$exercises.sets", "$exercises.reps", "$exercises.weight"]}},
+            "sets": {"$sum": "$exercises.sets"},
+            "max_weight": {"$max": "$exercises.weight"},
+            "best_e1rm": {"$max": "$e1rm"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "exercise": "$_id.exercise",
+            "period": "$_id.period",
+            "start": "$_id.start",
+            **{field: 1 for field in ROLLUP_FIELDS},
+        }},
+    ]
+
+async def AddWorkout(user_id: str, workout: Dict) -> None:
+    """Adds a new workout into its week and month buckets with one bulk write."""
+    day = GetWorkoutDay(workout)
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "exercise": name, "period": period, "start": GetPeriodStart(day, period).isoformat()},
+            {
+                "$inc": {"volume": totals["volume"], "sets": totals["sets"]},
+                "$max": {"max_weight": totals["max_weight"], "best_e1rm": totals["best_e1rm"]},
+                "$set": {"updated_at": now},
+            },
+            upsert=True
+        )
+        for name, totals in SummarizeExercises(workout.get("exercises", [])).items()
+        for period in PERIODS
+    ]
+
+    if not operations:
+        return
+
+    rollups = GetDb()[COLLECTION_NAME]
+
+    try:
+        await rollups.bulk_write(operations, ordered=False)
+    except BulkWriteError as error:
+        write_errors = error.details["writeErrors"]
+
+        if any(write_error["code"] != 11000 for write_error in write_errors):
+            raise
+
+        # A concurrent first write created the bucket. $inc is not idempotent, so only
+        # the rejected upserts are replayed; the bucket exists now and they update it.
+        await rollups.bulk_write([operations[write_error["index"]] for write_error in write_errors], ordered=False)
+
+async def RecomputeBuckets(user_id: str, keys: Set[Tuple[str, str, str]]) -> None:
+    """
+    Rebuilds the given (exercise, period, start) buckets from the stored workouts and
+    drops buckets that no workout contributes to any more.
+    """
+    if not keys:
+        return
+
+    db = GetDb()
+    now = datetime.now(timezone.utc)
+    starts = [date.fromisoformat(start) for _, _, start in keys]
+    day_from = min(starts)
+    day_until = max(GetPeriodEnd(date.fromisoformat(start), period) for _, period, start in keys)
+
+    # scheduled_day is a local day, so the UTC range is widened by a day on both sides
+    # to keep the index range scan, and the exact days are matched after.
+    match = {
+        "user_id": user_id,
+        "scheduled_date": {
+            "$gte": datetime.combine(day_from - timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc),
+            "$lt": datetime.combine(day_until + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc),
+        },
+        "exercises.name": {"$in": list({exercise for exercise, _, _ in keys})},
+    }
+    pipeline = BuildRollupPipeline(match, day_from.isoformat(), day_until.isoformat())
+    recomputed = {}
+
+    async for row in await db["workouts"].aggregate(pipeline):
+        recomputed[(row["exercise"], row["period"], row["start"])] = row
+
+    operations = []
+
+    for key in keys:
+        exercise, period, start = key
+        query = {"user_id": user_id, "exercise": exercise, "period": period, "start": start}
+
+        if key in recomputed:
+            fields = {field: recomputed[key][field] for field in ROLLUP_FIELDS}
+            operations.append(UpdateOne(query, {"$set": fields | {"updated_at": now}}, upsert=True))
+        else:
+            operations.append(DeleteOne(query))
+
+    await db[COLLECTION_NAME].bulk_write(operations, ordered=False)
+
+async def RemoveWorkout(user_id: str, workout: Dict) -> None:
+    await RecomputeBuckets(user_id, GetBucketKeys(workout))
+
+async def ReplaceWorkout(user_id: str, previous: Dict, updated: Dict) -> None:
+    # The stored workout already holds the edit, so every bucket either version touches is recomputed.
+    await RecomputeBuckets(user_id, GetBucketKeys(previous) | GetBucketKeys(updated))
+
+async def GetRollups(user_id: str, period: str, start: date, end: date, exercise: Optional[str] = None) -> List[Dict]:
+    """
+    The buckets of the period starting from start to end inclusive, summed across exercises
+    unless one is given. Reads one small document per exercise and bucket in the range.
+    """
+    match = {
+        "user_id": user_id,
+        "period": period,
+        "start": {"$gte": GetPeriodStart(start, period).isoformat(), "$lte": end.isoformat()},
+    }
+
+    if exercise:
+        match["exercise"] = exercise
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$start",
+            "volume": {"$sum": "$volume"},
+            "sets": {"$sum": "$sets"},
+            "max_weight": {"$max": "$max_weight"},
+            "best_e1rm": {"$max": "$best_e1rm"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    rows = await (await GetDb()[COLLECTION_NAME].aggregate(pipeline)).to_list()
+
+    return [{"start": date.fromisoformat(row.pop("_id")), **row} for row in rows]
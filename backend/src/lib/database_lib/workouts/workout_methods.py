@@ -1,58 +1,194 @@
-from datetime import datetime, timezone, timedelta
-import re
-from typing import Dict, List, Optional
+from datetime import datetime
+from bson import ObjectId
+from typing import Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from ..database_config import GetDb
 from . import general_methods as general_methods
+from . import activity_days
+from . import exercise_catalog
+from . import personal_records
+from . import training_rollups
+import config
 
-def UpdateWorkout(workout_id: str, user_id: str, update_data: Dict) -> bool:
-    return general_methods.UpdateCollectionEntry("workouts", workout_id, user_id, update_data)
+class WorkoutLimitReachedError(ValueError):
+    """Raised when a day already holds MAXIMUM_WORKOUTS_PER_DAY workouts."""
 
-def DeleteWorkout(workout_id: str, user_id: str) -> bool:
-    return general_methods.DeleteCollectionEntry("workouts", workout_id, user_id)
+def GetScheduledDay(date: datetime) -> str:
+    # The calendar day in the time zone the date was given in, e.g. "2026-10-18".
+    return date.date().isoformat()
 
-def CreateWorkout(workout_dict : Dict) -> str:
-    return general_methods.CreateCollectionEntry("workouts", workout_dict)
+def SetDuplicateCheckFields(workout_dict: Dict) -> Dict:
+    general_methods.SetNormalizedName(workout_dict)
 
-def GetWorkoutsForUser(user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
-    limit: int = 50,
-    skip: int = 0
-) -> List[Dict]:
-    return general_methods.GetCollectionEntriesForUser("workouts", user_id, start_date, end_date, limit, skip)
+    if workout_dict.get("scheduled_date"):
+        workout_dict["scheduled_day"] = GetScheduledDay(workout_dict["scheduled_date"])
 
-def GetWorkoutById(workout_id: str, user_id: str) -> Optional[Dict]:
-    return general_methods.GetCollectionEntryById("workouts", workout_id, user_id)
+    return workout_dict
 
-def GetNumberOfWorkoutsForUserOnDate(user_id: str, date: datetime) -> int:
-    workouts = GetDb()["workouts"]
+def GetStoredScheduledDay(workout: Dict) -> str:
+    # Workouts written before scheduled_day existed only have a UTC timestamp.
+    if workout.get("scheduled_day"):
+        return workout["scheduled_day"]
 
-    local_midnight = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    start_of_day = local_midnight.astimezone(timezone.utc)
-    end_of_day = (local_midnight + timedelta(days=1)).astimezone(timezone.utc)
-    
-    count = workouts.count_documents({
-        "user_id": user_id,
-        "scheduled_date": {
-            "$gte": start_of_day, 
-            "$lt": end_of_day
-        }
-    })
-    
-    return count
-
-def IsThereAWorkoutWithNameOnSameDate(user_id: str, name: str, date: datetime) -> bool:
-    workouts = GetDb()["workouts"]
+    return GetScheduledDay(workout["scheduled_date"])
+
+async def ReserveWorkoutSlot(user_id: str, scheduled_day: str) -> bool:
+    """
+    Takes one of the day's MAXIMUM_WORKOUTS_PER_DAY slots with a single conditional upsert.
+    Once the day's counter is at the limit the filter no longer matches, the upsert tries
+    to insert a second counter and the unique index rejects it.
+    Two first workouts of a day race the same way, since the server does not retry an
+    upsert whose filter is more than the index key, so a rejected upsert is retried once
+    as a plain update: only when that does not match either is the day full.
+    The first workout of a day also marks the day in the user's activity bitmap.
+    """
+    counters = GetDb()["workout_day_counters"]
+    query = {"user_id": user_id, "scheduled_day": scheduled_day, "count": {"$lt": config.MAXIMUM_WORKOUTS_PER_DAY}}
+    update = {"$inc": {"count": 1}}
+    projection = {"_id": 0, "count": 1}
+
+    try:
+        counter = await counters.find_one_and_update(
+            query, update, projection=projection, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        counter = await counters.find_one_and_update(
+            query, update, projection=projection, return_document=ReturnDocument.AFTER
+        )
+
+    if counter is None:
+        return False
+
+    if counter["count"] == 1:
+        await activity_days.SetDayActive(user_id, scheduled_day, True)
+
+    return True
+
+async def ReleaseWorkoutSlot(user_id: str, scheduled_day: str) -> None:
+    counters = GetDb()["workout_day_counters"]
+    counter = await counters.find_one_and_update(
+        {"user_id": user_id, "scheduled_day": scheduled_day, "count": {"$gt": 0}},
+        {"$inc": {"count": -1}},
+        projection={"_id": 0, "count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+    # The day's last workout is gone, so it is no longer an active day.
+    if counter and counter["count"] == 0:
+        await activity_days.SetDayActive(user_id, scheduled_day, False)
+
+# Returns the updated workout, or None when it does not exist.
+# Raises WorkoutLimitReachedError when the new day is full and DuplicateEntryError on a name clash.
+async def UpdateWorkout(workout_id: str, user_id: str, update_data: Dict) -> Optional[Dict]:
+    SetDuplicateCheckFields(update_data)
+    moved_to = None
+
+    if "scheduled_day" in update_data or "normalized_name" in update_data:
+        stored = await GetDb()["workouts"].find_one(
+            {"_id": ObjectId(workout_id), "user_id": user_id},
+            {"_id": 0, "scheduled_day": 1, "scheduled_date": 1}
+        )
+
+        if not stored:
+            return None
+
+        stored_day = GetStoredScheduledDay(stored)
+        # A rename of a workout that predates scheduled_day gives it one, so the unique index
+        # checks the name against that day's workouts.
+        new_day = update_data.setdefault("scheduled_day", stored_day)
+
+        if new_day != stored_day:
+            # Rescheduling takes a slot on the new day before the write, so a full day refuses
+            # the move without having to roll the workout back.
+            if not await ReserveWorkoutSlot(user_id, new_day):
+                raise WorkoutLimitReachedError(new_day)
+
+            moved_to = new_day
+
+    try:
+        result = await general_methods.UpdateCollectionEntryWithPrevious("workouts", workout_id, user_id, update_data)
+    except BaseException:
+        if moved_to:
+            await ReleaseWorkoutSlot(user_id, moved_to)
+
+        raise
 
-    local_midnight = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    start_of_day = local_midnight.astimezone(timezone.utc)
-    end_of_day = (local_midnight + timedelta(days=1)).astimezone(timezone.utc)
-    normalized_name = general_methods.NormalizeName(name)
-    daily_workouts = workouts.find({
-        "user_id": user_id,
-        "scheduled_date": {"$gte": start_of_day, "$lt": end_of_day}
-    })
+    if not result:
+        if moved_to:
+            await ReleaseWorkoutSlot(user_id, moved_to)
 
-    for workout in daily_workouts:
-        if "name" in workout and general_methods.NormalizeName(workout["name"]) == normalized_name:
-            return True
+        return None
+
+    previous, updated = result
+
+    if moved_to:
+        # The slot goes back on the day the write actually moved the workout from.
+        await ReleaseWorkoutSlot(user_id, GetStoredScheduledDay(previous))
+
+    await personal_records.ReplaceWorkout(user_id, workout_id, previous.get("exercises", []), updated.get("exercises", []))
+    await training_rollups.ReplaceWorkout(user_id, previous, updated)
+    await exercise_catalog.ReplaceWorkout(user_id, previous, updated)
+
+    return updated
+
+async def DeleteWorkout(workout_id: str, user_id: str) -> bool:
+    deleted = await general_methods.DeleteCollectionEntry("workouts", workout_id, user_id)
+
+    if not deleted:
+        return False
+
+    await ReleaseWorkoutSlot(user_id, GetStoredScheduledDay(deleted))
+    await personal_records.RemoveWorkout(user_id, workout_id, deleted.get("exercises", []))
+    await training_rollups.RemoveWorkout(user_id, deleted)
+    await exercise_catalog.RemoveWorkout(user_id, deleted)
+
+    return True
+
+# Raises WorkoutLimitReachedError when the day is full and DuplicateEntryError when a workout
+# with the same normalized name exists on the same day.
+async def CreateWorkout(workout_dict : Dict) -> Dict:
+    SetDuplicateCheckFields(workout_dict)
+    user_id = workout_dict["user_id"]
+    scheduled_day = workout_dict["scheduled_day"]
+
+    if not await ReserveWorkoutSlot(user_id, scheduled_day):
+        raise WorkoutLimitReachedError(scheduled_day)
+
+    try:
+        created = await general_methods.CreateCollectionEntry("workouts", workout_dict)
+    except BaseException:
+        # Any failed insert, not only a name clash, gives the slot back. An insert that did
+        # land before a network error then leaves the day one under its limit, never over.
+        await ReleaseWorkoutSlot(user_id, scheduled_day)
+        raise
+
+    await personal_records.ApplyWorkout(user_id, created["id"], created["exercises"])
+    await training_rollups.AddWorkout(user_id, created)
+    await exercise_catalog.AddWorkout(user_id, created)
+
+    return created
+
+async def GetWorkoutsForUser(user_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    exercise_names: Optional[List[str]] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    return await general_methods.GetCollectionEntriesForUser("workouts", user_id, start_date, end_date, limit, skip, cursor, exercise_names)
+
+async def GetWorkoutById(workout_id: str, user_id: str) -> Optional[Dict]:
+    return await general_methods.GetCollectionEntryById("workouts", workout_id, user_id)
+
+async def IsThereAWorkoutWithNameOnSameDate(user_id: str, name: str, date: datetime) -> bool:
+    workouts = GetDb()["workouts"]
+    workout = await workouts.find_one(
+        {
+            "user_id": user_id,
+            "scheduled_day": GetScheduledDay(date),
+            "normalized_name": general_methods.NormalizeName(name)
+        },
+        {"_id": 1}
+    )
 
-    return False
\ No newline at end of file
+    return workout is not None
@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+# A year of activity is a bitset with one bit per day (bit 0 is January 1st), stored
+# as six 64-bit words so it fits Mongo's signed int64 and its $bit operator.
+WORD_BITS = 64
+WORDS_PER_YEAR = 6
+WORD_MASK = (1 << WORD_BITS) - 1
+
+def GetDayOfYearIndex(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+def GetWordAndMask(day: date) -> Tuple[int, int]:
+    index = GetDayOfYearIndex(day)
+
+    return index // WORD_BITS, ToSignedWord(1 << (index % WORD_BITS))
+
+def ToSignedWord(word: int) -> int:
+    # Mongo has no unsigned 64-bit integer, so the top bit is stored as the sign.
+    word &= WORD_MASK
+
+    return word - (1 << WORD_BITS) if word >> (WORD_BITS - 1) else word
+
+def JoinWords(words: List[int]) -> int:
+    bits = 0
+
+    for position, word in enumerate(words):
+        bits |= (word & WORD_MASK) << (position * WORD_BITS)
+
+    return bits
+
+class ActivityTimeline:
+    """
+    A user's activity over consecutive years as one integer, bit i being the day
+    i days after January 1st of first_year. Every query below is a handful of
+    shifts, masks and popcounts over that integer, i.e. O(days / 64) word operations.
+    """
+
+    def __init__(self, years: Dict[int, int]):
+        self.first_year = min(years) if years else date.today().year
+        self.bits = 0
+
+        for year, year_bits in years.items():
+            self.bits |= year_bits << self.GetIndex(date(year, 1, 1))
+
+    def GetIndex(self, day: date) -> int:
+        return (day - date(self.first_year, 1, 1)).days
+
+    def GetRangeBits(self, start: date, end: date) -> Tuple[int, int]:
+        # The days from start to end inclusive, shifted down so start is bit 0.
+        start_index = max(self.GetIndex(start), 0)
+        end_index = self.GetIndex(end)
+
+        if end_index < start_index:
+            return 0, start_index
+
+        width = end_index - start_index + 1
+
+        return (self.bits >> start_index) & ((1 << width) - 1), start_index
+
+    def IsActive(self, day: date) -> bool:
+        index = self.GetIndex(day)
+
+        return index >= 0 and bool((self.bits >> index) & 1)
+
+    def GetCurrentStreak(self, today: date) -> int:
+        # Consecutive active days ending today: the distance from today down to the highest inactive day.
+        index = self.GetIndex(today)
+
+        if index < 0:
+            return 0
+
+        window = (1 << (index + 1)) - 1
+        inactive = ~self.bits & window
+
+        return index + 1 if inactive == 0 else index - (inactive.bit_length() - 1)
+
+    def GetLongestStreak(self) -> int:
+        # Each step drops the last day of every run, so the step count is the longest run.
+        bits = self.bits
+        longest = 0
+
+        while bits:
+            bits &= bits >> 1
+            longest += 1
+
+        return longest
+
+    def CountActiveDays(self, start: date, end: date) -> int:
+        range_bits, _ = self.GetRangeBits(start, end)
+
+        return bin(range_bits).count("1")
+
+    def GetActiveDays(self, start: date, end: date) -> List[date]:
+        range_bits, start_index = self.GetRangeBits(start, end)
+        origin = date(self.first_year, 1, 1) + timedelta(days=start_index)
+        days = []
+
+        while range_bits:
+            lowest = range_bits & -range_bits
+            days.append(origin + timedelta(days=lowest.bit_length() - 1))
+            range_bits ^= lowest
+
+        return days
@@ -0,0 +1,55 @@
+from typing import List, Sequence
+
+def LargestTriangleThreeBuckets(xs: Sequence[float], ys: Sequence[float], max_points: int) -> List[int]:
+    """
+    Picks at most max_points indices of a series, sorted by x, that keep its visual shape.
+
+    The first and last points are always kept. The points between them are split into
+    max_points - 2 buckets of equal size and each bucket keeps the point forming the
+    largest triangle with the point kept before it and the average of the next bucket,
+    so peaks and dips survive where plain striding would skip them. O(len(xs)).
+    """
+    count = len(xs)
+
+    if max_points >= count or max_points < 3:
+        return list(range(count))
+
+    bucket_size = (count - 2) / (max_points - 2)
+    selected = [0]
+    previous = 0
+
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # The next bucket's average point; the last bucket looks ahead to the final point.
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+
+        if next_start >= count - 1:
+            next_start, next_end = count - 1, count
+
+        next_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        next_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        previous_x, previous_y = xs[previous], ys[previous]
+        best_area = -1.0
+        best_index = start
+
+        for index in range(start, end):
+            # Twice the triangle's area; only the comparison matters.
+            area = abs(
+                (previous_x - next_x) * (ys[index] - previous_y)
+                - (previous_x - xs[index]) * (next_y - previous_y)
+            )
+
+            if area > best_area:
+                best_area = area
+                best_index = index
+
+        selected.append(best_index)
+        previous = best_index
+
+    selected.append(count - 1)
+
+    return selected
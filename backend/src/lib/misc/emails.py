@@ -1,26 +1,39 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Iterable, List, Tuple
 import config 
+from .smtp_pool import SmtpPool
 
-def SendEmail(email: str, subject: str, body: str) -> bool:
+# Every email goes through these persistent connections instead of a new SMTP
+# session, STARTTLS and login per message.
+smtp_pool = SmtpPool(
+    config.SMTP_HOST,
+    config.SMTP_PORT,
+    config.SENDER_EMAIL,
+    config.SENDER_EMAIL_PASSWORD,
+    size=config.SMTP_POOL_SIZE,
+    max_queue=config.SMTP_POOL_MAX_QUEUE
+)
+
+def BuildMessage(email: str, subject: str, body: str) -> str:
     msg = MIMEMultipart()
     msg['From'] = config.SENDER_EMAIL
     msg['To'] = email
     msg.attach(MIMEText(body, 'plain'))
     msg['Subject'] = subject
 
-    try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(config.SENDER_EMAIL, config.SENDER_EMAIL_PASSWORD)
-            server.sendmail(config.SENDER_EMAIL, email, msg.as_string())
-        
-            return True
-    except Exception as e:
-        return False
+    return msg.as_string()
+
+def SendEmail(email: str, subject: str, body: str) -> bool:
+    return smtp_pool.Send(config.SENDER_EMAIL, email, BuildMessage(email, subject, body))
+
+async def SendEmails(emails: Iterable[Tuple[str, str, str]]) -> List[bool]:
+    # (email, subject, body) tuples, sent concurrently over the pool; results keep their order.
+    return await smtp_pool.SendMany(
+        (config.SENDER_EMAIL, email, BuildMessage(email, subject, body)) for email, subject, body in emails
+    )
 
-def SendResetPasswordEmail(token: str, email: str) -> bool:
+def BuildResetPasswordEmail(token: str, email: str) -> Tuple[str, str]:
     reset_link = f"{config.FRONTEND_URL}/reset-password?token={token}&email={email}"
     subject = "Reset Your Password"
     body = f"""
@@ -28,9 +41,9 @@ def SendResetPasswordEmail(token: str, email: str) -> bool:
             The token will expire in {config.LINK_EXPIRATION_MINUTES} minutes from the time this email was sent.
             """
     
-    return SendEmail(email, subject, body)
+    return subject, body
 
-def SendVerificationEmail(token: str, email: str, username: str, hashed_password: str) -> bool:
+def BuildVerificationEmail(token: str, email: str) -> Tuple[str, str]:
     verification_link = f"{config.FRONTEND_URL}/authenticate?token={token}&email={email}"
     subject = "Verify Your Account"
     body = f"""
@@ -38,4 +51,4 @@ def SendVerificationEmail(token: str, email: str, username: str, hashed_password
             The token will expire in {config.LINK_EXPIRATION_MINUTES} minutes from the time this email was sent.
             """
     
-    return SendEmail(email, subject, body)
\ No newline at end of file
+    return subject, body
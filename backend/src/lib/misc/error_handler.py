@@ -60,10 +60,15 @@ class ErrorMessage:
     PASSWORD_WEAK = "Password does not meet strength requirements"
     REFRESH_TOKEN_MISSING = "Refresh token not found"
     INVALID_TOKEN = "Invalid or expired token"
+    EMAIL_NOT_FOUND = "No email was found for that request, or its link has expired"
     UNAUTHORIZED = "Authentication required"
     
     # Validation errors
     INVALID_ID = "Invalid ID format"
+    INVALID_CURSOR = "Invalid pagination cursor"
+    INVALID_SYNC_TOKEN = "Invalid sync token"
+    INVALID_DATE_RANGE = "The start date must not be after the end date"
+    INVALID_TIME_ZONE = "Unknown time zone '{time_zone}'"
     INVALID_EMAIL = "Invalid email format"
     EMPTY_INPUT = "Input cannot be empty"
     NO_DATA_PROVIDED = "No data provided to update"
@@ -81,4 +86,5 @@ class ErrorMessage:
     FAILED_TO_UPDATE = "Failed to update resource"
     FAILED_TO_DELETE = "Failed to delete resource"
     FAILED_TO_RETRIEVE = "Failed to retrieve resource"
-    LIMIT_EXCEEDED = "Limit exceeded: {limit}"
\ No newline at end of file
+    LIMIT_EXCEEDED = "Limit exceeded: {limit}"
+    SERVER_BUSY = "The server is busy. Please try again shortly."
\ No newline at end of file
@@ -0,0 +1,35 @@
+from typing import Optional
+from fastapi import Request, Response
+
+# The ETag names the user as well as the version, so a browser shared by two accounts
+# never revalidates one user's cached list against the other's counter. no-cache makes
+# the browser revalidate every time, which is cheap, instead of reusing a stale list.
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+def MakeETag(user_id: str, version: int, entry_id: Optional[str] = None) -> str:
+    # A single entry's tag also names the entry, so it never validates a list or another entry.
+    if entry_id is not None:
+        return f'W/"{user_id}.{entry_id}.{version}"'
+
+    return f'W/"{user_id}.{version}"'
+
+def IsNotModified(request: Request, etag: str) -> bool:
+    if_none_match: Optional[str] = request.headers.get("If-None-Match")
+
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # Weak comparison: the W/ prefix is ignored on both sides.
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+    return etag.removeprefix("W/") in tags
+
+def NotModifiedResponse(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **CACHE_HEADERS})
+
+def SetETag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers.update(CACHE_HEADERS)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+class HashingPoolFull(Exception):
+    """Raised when every worker is busy and the wait queue is at its limit."""
+
+class HashingPool:
+    """
+    Runs CPU-heavy password hashing off the event loop.
+
+    At most max_workers hashes run at once and at most max_queue more wait for
+    a worker. Anything past that is rejected straight away so a login burst
+    turns into fast 503s instead of an ever-growing backlog.
+    argon2-cffi releases the GIL while hashing, so threads give real parallelism.
+    """
+
+    # Number of recent samples kept for the latency percentiles.
+    LATENCY_SAMPLES = 1024
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hashing")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._hash_seconds = deque(maxlen=self.LATENCY_SAMPLES)
+        self._wait_seconds = deque(maxlen=self.LATENCY_SAMPLES)
+
+    async def Run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HashingPoolFull()
+
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+        future = self._executor.submit(self._RunTimed, fn, args, submitted_at)
+        # A cancelled caller stops waiting but cannot stop a hash that already started, so
+        # the slot is freed when the job itself finishes or is cancelled before it starts.
+        future.add_done_callback(self._Release)
+
+        return await asyncio.wrap_future(future)
+
+    def _Release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _RunTimed(self, fn: Callable[..., Any], args: tuple, submitted_at: float) -> Any:
+        started_at = time.perf_counter()
+
+        with self._lock:
+            self._running += 1
+            self._wait_seconds.append(started_at - submitted_at)
+
+        try:
+            return fn(*args)
+        finally:
+            finished_at = time.perf_counter()
+
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._hash_seconds.append(finished_at - started_at)
+
+    def GetMetrics(self) -> Dict[str, Any]:
+        with self._lock:
+            hash_samples = sorted(self._hash_seconds)
+            wait_samples = sorted(self._wait_seconds)
+
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": max(self._pending - self._running, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "hash_latency_ms": SummarizeLatencies(hash_samples),
+                "queue_wait_ms": SummarizeLatencies(wait_samples),
+            }
+
+def SummarizeLatencies(sorted_seconds: list) -> Dict[str, float]:
+    if not sorted_seconds:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    def Percentile(fraction: float) -> float:
+        index = min(int(len(sorted_seconds) * fraction), len(sorted_seconds) - 1)
+
+        return round(sorted_seconds[index] * 1000, 3)
+
+    return {
+        "p50": Percentile(0.50),
+        "p95": Percentile(0.95),
+        "max": round(sorted_seconds[-1] * 1000, 3),
+    }
@@ -0,0 +1,165 @@
+import threading
+from typing import Dict, Optional, Protocol, Set, Tuple
+from cachetools import LRUCache
+from fastapi import Request, Response
+import config
+
+# A cached list response: the serialized JSON body and the headers that go with it.
+CachedResponse = Tuple[bytes, Dict[str, str]]
+
+def GetResponseSize(key: Tuple, value: CachedResponse) -> int:
+    body, headers = value
+
+    return len(body) + sum(len(name) + len(header) for name, header in headers.items()) + sum(len(part) for part in key)
+
+class ResponseCacheBackend(Protocol):
+    """
+    Where ResponseCache keeps the responses. Keys are (user_id, version, query) tuples.
+    The methods are async so a backend shared across workers can do network I/O.
+    """
+
+    async def Get(self, key: Tuple[str, str, str]) -> Optional[CachedResponse]: ...
+
+    async def Set(self, key: Tuple[str, str, str], value: CachedResponse) -> None: ...
+
+    # Returns how many responses were dropped.
+    async def DeleteUser(self, user_id: str) -> int: ...
+
+    def GetMetrics(self) -> Dict[str, float]: ...
+
+class _EvictionCountingCache(LRUCache):
+    def __init__(self, max_bytes: int, on_evict):
+        super().__init__(maxsize=max_bytes, getsizeof=lambda value: value[0])
+        self._on_evict = on_evict
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(key)
+
+        return key, value
+
+class InMemoryResponseCacheBackend:
+    """
+    A per-process LRU bounded by the total size of the cached responses rather than
+    their count, since one user's list can be a hundred times another's. A response
+    larger than max_bytes is not stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        # Values are stored as (size, response) so the LRU can weigh them without recomputing.
+        self._entries = _EvictionCountingCache(max_bytes, self._Forget)
+        self._user_keys: Dict[str, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def _Forget(self, key: Tuple) -> None:
+        # Called by the LRU with the lock held when it evicts to make room.
+        self._evictions += 1
+        self._DiscardUserKey(key)
+
+    def _DiscardUserKey(self, key: Tuple) -> None:
+        keys = self._user_keys.get(key[0])
+
+        if keys is not None:
+            keys.discard(key)
+
+            if not keys:
+                del self._user_keys[key[0]]
+
+    async def Get(self, key: Tuple[str, str, str]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            return entry[1] if entry else None
+
+    async def Set(self, key: Tuple[str, str, str], value: CachedResponse) -> None:
+        size = GetResponseSize(key, value)
+
+        with self._lock:
+            if size > self._entries.maxsize:
+                return
+
+            self._entries[key] = (size, value)
+            self._user_keys.setdefault(key[0], set()).add(key)
+
+    async def DeleteUser(self, user_id: str) -> int:
+        with self._lock:
+            keys = self._user_keys.pop(user_id, set())
+
+            for key in keys:
+                self._entries.pop(key, None)
+
+            return len(keys)
+
+    def GetMetrics(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._entries.currsize,
+                "max_bytes": self._entries.maxsize,
+                "evictions": self._evictions,
+            }
+
+class ResponseCache:
+    """
+    Serialized list responses keyed by user, data version and query parameters, so a
+    repeated list request skips the database and the response models.
+
+    The version in the key is the per-user counter every write bumps, so an entry
+    written before a write is never read after it, in this worker or any other. The
+    write paths also call Invalidate, which frees the user's entries here right away
+    instead of leaving them to age out of the LRU.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def BuildKey(user_id: str, version: int, request: Request) -> Tuple[str, str, str]:
+        # Parameters are sorted so the same query in a different order shares an entry.
+        query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+
+        return user_id, str(version), f"{request.url.path}?{query}"
+
+    async def Get(self, user_id: str, version: int, request: Request) -> Optional[CachedResponse]:
+        cached = await self._backend.Get(self.BuildKey(user_id, version, request))
+
+        with self._lock:
+            if cached is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        return cached
+
+    async def Put(self, user_id: str, version: int, request: Request, body: bytes, headers: Dict[str, str]) -> None:
+        await self._backend.Set(self.BuildKey(user_id, version, request), (body, headers))
+
+    async def Invalidate(self, user_id: str) -> None:
+        dropped = await self._backend.DeleteUser(user_id)
+
+        with self._lock:
+            self._invalidations += dropped
+
+    def GetMetrics(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            metrics = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+        return metrics | self._backend.GetMetrics()
+
+def BuildResponse(cached: CachedResponse) -> Response:
+    body, headers = cached
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+list_response_cache = ResponseCache(InMemoryResponseCacheBackend(config.RESPONSE_CACHE_MAX_BYTES))
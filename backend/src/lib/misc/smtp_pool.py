@@ -0,0 +1,211 @@
+import asyncio
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .hashing_pool import SummarizeLatencies
+
+def IsConnectionLost(error: OSError) -> bool:
+    # smtplib errors are OSErrors too; only a disconnect, a socket error or a 421
+    # (the server closing the session) mean the connection has to be replaced.
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+
+    if isinstance(error, smtplib.SMTPException):
+        return getattr(error, "smtp_code", None) == 421
+
+    return True
+
+class SmtpPool:
+    """
+    Sends email over at most size persistent, authenticated SMTP connections.
+
+    A connection is opened, upgraded with STARTTLS and logged in once, then reused for
+    every message until the server drops it; a send that finds its connection dead
+    reconnects and tries once more. Send borrows a connection from any thread. The
+    async SendMany runs sends on the pool's own size threads and keeps at most
+    size + max_queue of its messages in flight, so a bulk run applies backpressure
+    instead of handing the executor thousands of messages at once.
+    smtplib connections are not thread-safe, so a connection is only ever used by the
+    thread that borrowed it.
+    """
+
+    # Number of recent samples kept for the latency percentiles.
+    LATENCY_SAMPLES = 1024
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+        size: int = 4,
+        max_queue: int = 100,
+        use_starttls: bool = True,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_queue = max_queue
+        self.use_starttls = use_starttls
+        self.timeout = timeout
+        # LIFO, so the most recently used connection, the one least likely to have idled out, goes first.
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp-pool")
+        self._lock = threading.Lock()
+        self._open = 0
+        self._sent = 0
+        self._failed = 0
+        self._reconnects = 0
+        self._batch_messages = 0
+        self._batch_seconds = 0.0
+        self._send_seconds = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def _Connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+        try:
+            if self.use_starttls:
+                connection.starttls(context=ssl.create_default_context())
+
+            if self.username:
+                connection.login(self.username, self.password)
+        except Exception:
+            self._CloseQuietly(connection)
+            raise
+
+        return connection
+
+    def _Acquire(self, fresh: bool = False) -> smtplib.SMTP:
+        # fresh prefers opening a new connection, for a retry after the idle ones turned out dead.
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            if not fresh:
+                try:
+                    return self._idle.get_nowait()
+                except queue.Empty:
+                    pass
+
+            with self._lock:
+                can_open = self._open < self.size
+
+                if can_open:
+                    self._open += 1
+
+            if can_open:
+                break
+
+            # Every connection is busy; wait for one to come back or to be discarded.
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                raise queue.Empty()
+
+            try:
+                return self._idle.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                continue
+
+        try:
+            return self._Connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+
+            raise
+
+    def _Release(self, connection: smtplib.SMTP) -> None:
+        self._idle.put(connection)
+
+    def _Discard(self, connection: smtplib.SMTP) -> None:
+        self._CloseQuietly(connection)
+
+        with self._lock:
+            self._open -= 1
+
+    @staticmethod
+    def _CloseQuietly(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def Send(self, from_address: str, to_address: str, message: str) -> bool:
+        """Sends one message, blocking the calling thread. Returns whether the server accepted it."""
+        started_at = time.perf_counter()
+
+        for attempt in range(2):
+            try:
+                connection = self._Acquire(fresh=attempt > 0)
+            except (queue.Empty, OSError):
+                break
+
+            try:
+                connection.sendmail(from_address, to_address, message)
+            except OSError as error:
+                if not IsConnectionLost(error):
+                    # The server refused this message but the session is still usable.
+                    self._Release(connection)
+                    break
+
+                # The connection was dropped, most likely while idle; replace it and retry once.
+                self._Discard(connection)
+
+                with self._lock:
+                    self._reconnects += 1
+
+                continue
+
+            self._Release(connection)
+
+            with self._lock:
+                self._sent += 1
+                self._send_seconds.append(time.perf_counter() - started_at)
+
+            return True
+
+        with self._lock:
+            self._failed += 1
+
+        return False
+
+    async def SendMany(self, messages: Iterable[Tuple[str, str, str]]) -> List[bool]:
+        """Sends (from, to, message) tuples concurrently over the pool. Results keep their order."""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.size + self.max_queue)
+        started_at = time.perf_counter()
+
+        async def SendOne(message: Tuple[str, str, str]) -> bool:
+            async with slots:
+                return await loop.run_in_executor(self._executor, self.Send, *message)
+
+        results = await asyncio.gather(*(SendOne(message) for message in messages))
+
+        with self._lock:
+            self._batch_messages += len(results)
+            self._batch_seconds += time.perf_counter() - started_at
+
+        return results
+
+    def Close(self) -> None:
+        while True:
+            try:
+                self._Discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def GetMetrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open_connections": self._open,
+                "idle_connections": self._idle.qsize(),
+                "sent": self._sent,
+                "failed": self._failed,
+                "reconnects": self._reconnects,
+                "messages_per_second": round(self._batch_messages / self._batch_seconds, 2) if self._batch_seconds else 0.0,
+                "send_latency_ms": SummarizeLatencies(sorted(self._send_seconds)),
+            }
@@ -1,13 +1,15 @@
 from datetime import datetime, timezone
-from fastapi import status, APIRouter, Depends, Request, Response
+from bson import ObjectId
+from fastapi import BackgroundTasks, status, APIRouter, Depends, Request, Response
 import lib.database_lib.users.general_methods as general_user_methods
 import lib.database_lib.users.reset_password as reset_password_methods
-import lib.database_lib.users.refresh_tokens as refresh_token_methods
+import lib.database_lib.users.email_outbox as email_outbox
+from lib.database_lib.users.repository import UserRepository, GetUserRepository, ID_PROJECTION, LOGIN_PROJECTION
 import lib.database_lib.models as models
 import lib.database_lib.users.auth_helper as auth_helper
+from lib.database_lib.users.verified_user_cache import verified_user_cache
 from config import limiter
 from lib.misc.error_handler import APIError, ErrorMessage
-import lib.database_lib.database_config as database_config
 import config 
 
 router = APIRouter(tags=["auth"], prefix="/auth")
@@ -37,10 +39,14 @@ def ResponseDeleteCookieHelper(response: Response):
         samesite="none" if config.IS_PRODUCTION else "lax",
     )
 
-def CreateAccessToken(request: Request, response: Response, user_id: str, email: str, username: str) -> str:
+async def CreateAccessToken(request: Request, response: Response, user_id: str, email: str, username: str) -> str:
     device_fingerprint = auth_helper.GenerateDeviceFingerprint(request)
-    access_token, refresh_token = auth_helper.CreateTokenPair(
-        user_id, email, username=username, device_fingerprint=device_fingerprint
+    access_token, refresh_token = await auth_helper.CreateTokenPair(
+        user_id,
+        email,
+        username=username,
+        device_fingerprint=device_fingerprint,
+        previous_refresh_token=request.cookies.get("refresh_token"),
     )
     
     ResponseSetCookieHelper(response, refresh_token, device_fingerprint)
@@ -49,33 +55,42 @@ def CreateAccessToken(request: Request, response: Response, user_id: str, email:
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 @limiter.limit("3/minute")
-async def SignUp(request: Request, user: models.UserCreate, response: Response):
-    if general_user_methods.DoesPendingUserExist(user.email, user.username):
+async def SignUp(request: Request, user: models.UserCreate, response: Response, background_tasks: BackgroundTasks):
+    await general_user_methods.DeleteUndeliveredPendingUsers(user.email, user.username)
+
+    if await general_user_methods.DoesPendingUserExist(user.email, user.username):
         raise APIError.conflict(ErrorMessage.PENDING_USER_ALREADY_EXISTS)
 
-    if general_user_methods.DoesVerifiedUserExist(user.email, user.username):
+    if await general_user_methods.DoesVerifiedUserExist(user.email, user.username):
         raise APIError.conflict(ErrorMessage.VERIFIED_USER_ALREADY_EXISTS)
     
     if not auth_helper.IsPasswordStrong(user.password):
         raise APIError.validation_error(ErrorMessage.PASSWORD_WEAK)
 
-    hashed_password = auth_helper.GetPasswordHash(user.password)
-    success = auth_helper.InitiateEmailVerification(user.email, user.username, hashed_password)
-
-    if not success:
-        raise APIError.server_error("Failed to send verification email. Please try again later.")
+    hashed_password = await auth_helper.GetPasswordHash(user.password)
+    pending_user_id = await auth_helper.InitiateEmailVerification(user.email, user.username, hashed_password)
+    # The email is sent after the response; the worker retries it if this attempt fails.
+    background_tasks.add_task(email_outbox.DeliverOne, email_outbox.VERIFICATION, pending_user_id)
     
-    return {"message": "Signup successful! Check your email to verify your account."}
+    return {
+        "message": "Signup successful! Check your email to verify your account.",
+        "status_id": email_outbox.MakeStatusId(email_outbox.VERIFICATION, pending_user_id),
+    }
 
 @router.post("/authenticate", response_model=models.TokenResponse, status_code=status.HTTP_200_OK)
 @limiter.limit("3/minute")
-async def VerifyUser(request: Request, email_verification_model: models.EmailVerificationModel, response: Response):
-    verified_user = general_user_methods.GetVerifiedUserByEmail(email_verification_model.email)
+async def VerifyUser(
+    request: Request,
+    email_verification_model: models.EmailVerificationModel,
+    response: Response,
+    users: UserRepository = Depends(GetUserRepository)
+):
+    verified_user = await users.FindByEmail(email_verification_model.email, ID_PROJECTION)
 
     if verified_user:
         raise APIError.conflict("User already verified")
 
-    pending_user = general_user_methods.GetPendingUserByEmail(email_verification_model.email)
+    pending_user = await general_user_methods.GetPendingUserByEmail(email_verification_model.email)
     
     if not pending_user:
         raise APIError.not_found("Pending user not found")
@@ -83,90 +98,101 @@ async def VerifyUser(request: Request, email_verification_model: models.EmailVer
     if pending_user.get("verification_token") != email_verification_model.verification_token:
         raise APIError.unauthorized("Invalid verification token")
     
-    pending_user = database_config.MakeDatetimeAware(pending_user)
-
     if pending_user.get("expires_at") < datetime.now(timezone.utc):
-        general_user_methods.DeletePendingUserByEmail(email_verification_model.email)
+        await general_user_methods.DeletePendingUserByEmail(email_verification_model.email)
         raise APIError.unauthorized("Verification token expired")
     
-    user_id = general_user_methods.CreateUser(
+    user_id = await general_user_methods.CreateUser(
         email=pending_user["email"],
         username=pending_user["username"],
         hashed_password=pending_user["password"]
     )
     
-    general_user_methods.DeletePendingUserByEmail(email_verification_model.email)
+    await general_user_methods.DeletePendingUserByEmail(email_verification_model.email)
     
     return models.TokenResponse(
-        access_token=CreateAccessToken(request, response, user_id, email_verification_model.email, pending_user["username"]),
+        access_token=await CreateAccessToken(request, response, user_id, email_verification_model.email, pending_user["username"]),
         token_type="bearer"
     )
 
 @router.post("/initial-reset-password", status_code=status.HTTP_200_OK)
 @limiter.limit("3/minute")
-async def InitialResetPasswordRequest(request: Request, reset_password_model: models.InitialResetPasswordModel, response: Response):
-    verified_user = general_user_methods.GetVerifiedUserByEmail(reset_password_model.email)
+async def InitialResetPasswordRequest(
+    request: Request,
+    reset_password_model: models.InitialResetPasswordModel,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    users: UserRepository = Depends(GetUserRepository)
+):
+    verified_user = await users.FindByEmail(reset_password_model.email, ID_PROJECTION)
 
     if not verified_user:
         raise APIError.conflict("Could not find account for that email")
     
-    if reset_password_methods.UserHasResetPasswordToken(reset_password_model.email):
+    if await reset_password_methods.UserHasResetPasswordToken(verified_user["_id"]):
         raise APIError.conflict("A reset password email has already been sent. Please check your email or try again later.")
 
-    success = auth_helper.InitiateResetPassword(reset_password_model.email)
-
-    if not success:
-        raise APIError.server_error("Failed to send reset password email. Please try again later.")
+    token_id = await auth_helper.InitiateResetPassword(reset_password_model.email, verified_user["_id"])
+    background_tasks.add_task(email_outbox.DeliverOne, email_outbox.RESET_PASSWORD, token_id)
     
-    return {"message": "Check your email to reset your password."}
+    return {
+        "message": "Check your email to reset your password.",
+        "status_id": email_outbox.MakeStatusId(email_outbox.RESET_PASSWORD, token_id),
+    }
 
 @router.post("/reset-password", response_model=models.TokenResponse)
 async def ResetPasswordRequest(
     request: Request,
     reset_password_model: models.ResetPasswordModel,
-    response: Response
+    response: Response,
+    users: UserRepository = Depends(GetUserRepository)
 ):
 
     if not auth_helper.IsPasswordStrong(reset_password_model.password):
         raise APIError.validation_error(ErrorMessage.PASSWORD_WEAK)
 
-    user_id = reset_password_methods.ConsumePasswordResetToken(
+    user_id = await reset_password_methods.ConsumePasswordResetToken(
         reset_password_model.token
     )
 
     if not user_id:
         raise APIError.unauthorized("Invalid or expired reset token")
 
-    hashed_password = auth_helper.GetPasswordHash(
+    hashed_password = await auth_helper.GetPasswordHash(
         reset_password_model.password
     )
 
-    reset_password_methods.ResetPassword(user_id, hashed_password)
-    user = general_user_methods.GetVerifiedUserByEmail(reset_password_model.email)
+    # The account comes from the reset token, never from the email in the request body.
+    user = await reset_password_methods.ResetPassword(users, user_id, hashed_password)
+
+    if not user:
+        raise APIError.not_found(ErrorMessage.USER_NOT_FOUND)
 
     return models.TokenResponse(
-        access_token=CreateAccessToken(request, response, str(user_id), user["email"], user["username"]),
+        access_token=await CreateAccessToken(request, response, str(user_id), user["email"], user["username"]),
         token_type="bearer"
     )
 
 @router.post("/login", response_model=models.TokenResponse, status_code=status.HTTP_200_OK)
 @limiter.limit("5/minute")
-async def Login(request: Request, user: models.UserLogin, response: Response):
-    email = general_user_methods.GetUserEmailByEmailOrUsername(user.email_or_username)
-    username = general_user_methods.GetUsernameByEmail(email)
+async def Login(
+    request: Request,
+    user: models.UserLogin,
+    response: Response,
+    users: UserRepository = Depends(GetUserRepository)
+):
+    user_record = await users.FindByEmailOrUsername(user.email_or_username, LOGIN_PROJECTION)
 
-    if not general_user_methods.DoesVerifiedUserExist(email, username):
+    if not user_record:
         raise APIError.validation_error(ErrorMessage.INVALID_CREDENTIALS)
 
-    hashed_password = general_user_methods.GetUserHashedPasswordInDB(email)
-
-    if not auth_helper.VerifyPassword(user.password, hashed_password):
+    if not await auth_helper.VerifyPassword(user.password, user_record["password"]):
         raise APIError.unauthorized(ErrorMessage.INVALID_CREDENTIALS)
     
-    user_id = general_user_methods.GetUserIdByEmail(email)
-    
     return models.TokenResponse(
-        access_token=CreateAccessToken(request, response, str(user_id), email, username),
+        access_token=await CreateAccessToken(
+            request, response, str(user_record["_id"]), user_record["email"], user_record["username"]
+        ),
         token_type="bearer"
     )
 
@@ -185,7 +211,7 @@ async def Refresh(request: Request, response: Response):
             ResponseDeleteCookieHelper(response)
             raise APIError.unauthorized(ErrorMessage.REFRESH_TOKEN_MISSING)
         
-        access_token, new_refresh_token = auth_helper.RefreshAccessToken(refresh_token, device_fingerprint)
+        access_token, new_refresh_token = await auth_helper.RefreshAccessToken(refresh_token, device_fingerprint)
         
         ResponseSetCookieHelper(response, new_refresh_token, device_fingerprint)
         
@@ -201,19 +227,51 @@ async def Refresh(request: Request, response: Response):
 @router.post("/logout", status_code=status.HTTP_200_OK)
 @limiter.limit("5/minute")
 async def Logout(request: Request, response: Response, current_user: models.CurrentUser = Depends(auth_helper.GetCurrentUser)):
-    refresh_token_methods.RevokeAllUserRefreshTokens(current_user.user_id)
+    refresh_token = request.cookies.get("refresh_token")
+
+    # Only this device's session ends. Without its token there is no way to tell which one
+    # it is, so the cookies are cleared and every other device stays signed in.
+    if refresh_token:
+        await auth_helper.RevokeRefreshToken(refresh_token)
+
+    verified_user_cache.Invalidate(current_user.user_id)
     ResponseDeleteCookieHelper(response)
 
     return {"message": "Logged out successfully"}
 
-@router.post("/is-request-token-valid", status_code=status.HTTP_200_OK)
+@router.post("/is-request-token-valid", response_model=models.EmailStatusResponse, status_code=status.HTTP_200_OK)
 @limiter.limit("10/minute")
 async def IsRequestTokenValid(request: Request, request_model: models.IsRequestTokenValidRequest, response: Response):
+    # A valid token also reports how far its email got.
     if request_model.type == "reset-password":
-        if not reset_password_methods.DoesResetPasswordTokenExist(request_model.token):
-            raise APIError.unauthorized(ErrorMessage.INVALID_TOKEN)
+        token_hash = reset_password_methods.HashToken(request_model.token)
+        query = {"token_hash": token_hash, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+        email_status = await email_outbox.GetDeliveryStatus(email_outbox.RESET_PASSWORD, query)
     elif request_model.type == "email-confirmation":
-        if not general_user_methods.DoesEmailConfirmationTokenExist(request_model.token):
-            raise APIError.unauthorized(ErrorMessage.INVALID_TOKEN)
+        query = {"verification_token": request_model.token}
+        email_status = await email_outbox.GetDeliveryStatus(email_outbox.VERIFICATION, query)
     else:
-        raise APIError.unauthorized(ErrorMessage.INVALID_TOKEN)
\ No newline at end of file
+        raise APIError.unauthorized(ErrorMessage.INVALID_TOKEN)
+
+    if email_status is None:
+        raise APIError.unauthorized(ErrorMessage.INVALID_TOKEN)
+
+    return models.EmailStatusResponse(status=email_status)
+
+# Lets the check-inbox page tell the user whether their email went out or has to be requested again.
+# The email is looked up by the status id its request returned, never by address.
+@router.post("/email-status", response_model=models.EmailStatusResponse, status_code=status.HTTP_200_OK)
+@limiter.limit("30/minute")
+async def GetEmailStatus(request: Request, request_model: models.EmailStatusRequest):
+    kind = email_outbox.VERIFICATION if request_model.type == "email-confirmation" else email_outbox.RESET_PASSWORD
+    document_id = email_outbox.ParseStatusId(kind, request_model.status_id)
+    email_status = None
+
+    if document_id is not None:
+        query = {"_id": document_id, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+        email_status = await email_outbox.GetDeliveryStatus(kind, query)
+
+    if email_status is None:
+        raise APIError.not_found(ErrorMessage.EMAIL_NOT_FOUND)
+
+    return models.EmailStatusResponse(status=email_status)
@@ -0,0 +1,35 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request, status
+from lib.database_lib import models
+from lib.database_lib.reports import report_methods
+from lib.database_lib.workouts import exercise_catalog
+from lib.database_lib.users import auth_helper
+from config import limiter
+
+router = APIRouter(tags=["exercises"], prefix="/exercises")
+
+# CATALOG - the user's exercise names starting with prefix, most used first, for autocomplete
+@router.get("/", response_model=List[models.ExerciseCatalogEntry], status_code=status.HTTP_200_OK)
+@limiter.limit("120/minute")
+async def GetExercises(
+    request: Request,
+    prefix: str = Query("", max_length=100),
+    limit: int = Query(20, ge=1, le=500),
+    current_user = Depends(auth_helper.GetCurrentUser),
+):
+    entries = await exercise_catalog.SearchCatalog(current_user.user_id, prefix, limit)
+
+    return [models.ExerciseCatalogEntry(name=entry["exercise"], workouts=entry["workouts"], last_used=entry["last_used"]) for entry in entries]
+
+# HISTORY - every logged entry of one exercise, oldest first, downsampled to max_points for charts
+@router.get("/{name}/history", response_model=List[models.ExerciseHistoryPoint], status_code=status.HTTP_200_OK)
+@limiter.limit("20/minute")
+async def GetExerciseHistory(
+    request: Request,
+    name: str,
+    max_points: Optional[int] = Query(None, ge=3, le=5000),
+    current_user = Depends(auth_helper.GetCurrentUser),
+):
+    history = await report_methods.GetExerciseHistory(current_user.user_id, name, max_points)
+
+    return [models.ExerciseHistoryPoint(**point) for point in history]
@@ -1,15 +1,68 @@
-from fastapi import APIRouter, Header, status
+from fastapi import APIRouter, Header, Query, status
 from fastapi.responses import JSONResponse
 import config
+from lib.database_lib.users import auth_helper, email_outbox
+from lib.database_lib.users.verified_user_cache import verified_user_cache
+from lib.database_lib.workouts.exercise_catalog_cache import exercise_catalog_cache
+from lib.misc.emails import smtp_pool
+from lib.misc.response_cache import list_response_cache
 from tasks import SendWeeklySummary
+from tasks.worker import RunWorker
 
 router = APIRouter(tags=["internal"], prefix="/internal")
 
 
+def IsCronAuthorized(authorization: str) -> bool:
+    return authorization == f"Bearer {config.CRON_SECRET}"
+
+
+# Each call handles one bounded slice of the week's run and can be repeated until "done" is true.
 @router.get("/weekly-summary", status_code=status.HTTP_200_OK)
-async def weekly_summary(authorization: str = Header(...)):
-    if authorization != f"Bearer {config.CRON_SECRET}":
+async def weekly_summary(
+    authorization: str = Header(...),
+    max_users: int = Query(config.WEEKLY_SUMMARY_MAX_USERS, ge=1),
+    max_seconds: float = Query(config.WEEKLY_SUMMARY_MAX_SECONDS, gt=0, le=300),
+):
+    if not IsCronAuthorized(authorization):
+        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+
+    progress = await SendWeeklySummary(max_users=max_users, max_seconds=max_seconds)
+    detail = "Weekly summary sent" if progress["done"] else "Weekly summary in progress"
+
+    return {"detail": detail, **progress}
+
+
+# Runs the due background jobs, for deployments without a worker. Jobs left when the time
+# budget runs out wait for the next call.
+@router.get("/jobs", status_code=status.HTTP_200_OK)
+async def run_jobs(
+    authorization: str = Header(...),
+    max_seconds: float = Query(config.JOB_RUN_MAX_SECONDS, gt=0, le=300),
+):
+    if not IsCronAuthorized(authorization):
+        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+
+    return await RunWorker(drain=True, max_seconds=max_seconds)
+
+
+# Retries outbox emails whose first delivery attempt failed, for deployments without a worker.
+@router.get("/email-outbox", status_code=status.HTTP_200_OK)
+async def deliver_email_outbox(authorization: str = Header(...), max_messages: int = Query(100, ge=1, le=1000)):
+    if not IsCronAuthorized(authorization):
+        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+
+    return await email_outbox.DeliverDue(max_messages)
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def metrics(authorization: str = Header(...)):
+    if not IsCronAuthorized(authorization):
         return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
 
-    SendWeeklySummary()
-    return {"detail": "Weekly summary sent"}
+    return {
+        "password_hashing": auth_helper.hashing_pool.GetMetrics(),
+        "verified_user_cache": verified_user_cache.GetMetrics(),
+        "exercise_catalog_cache": exercise_catalog_cache.GetMetrics(),
+        "smtp_pool": smtp_pool.GetMetrics(),
+        "list_response_cache": list_response_cache.GetMetrics(),
+    }
@@ -0,0 +1,75 @@
+from datetime import date
+from typing import List, Literal, Optional
+from zoneinfo import ZoneInfoNotFoundError
+from fastapi import APIRouter, Depends, Query, Request, status
+from lib.database_lib import models
+from lib.database_lib.reports import report_methods
+from lib.database_lib.workouts import training_rollups
+from lib.database_lib.users import auth_helper
+from config import limiter
+from lib.misc.error_handler import APIError, ErrorMessage
+
+router = APIRouter(tags=["reports"], prefix="/reports")
+
+ReportBucket = Literal["day", "week", "month"]
+
+def ValidateReportRange(start_date: date, end_date: date, time_zone: str) -> None:
+    if start_date > end_date:
+        raise APIError.validation_error(ErrorMessage.INVALID_DATE_RANGE)
+
+    try:
+        report_methods.GetDateRange(start_date, end_date, time_zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise APIError.validation_error(ErrorMessage.INVALID_TIME_ZONE.format(time_zone=time_zone))
+
+# VOLUME - sets x reps x weight per bucket, for one exercise or all of them
+@router.get("/volume", response_model=models.ReportResponse, status_code=status.HTTP_200_OK)
+@limiter.limit("20/minute")
+async def GetVolumeReport(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    current_user = Depends(auth_helper.GetCurrentUser),
+    exercise: Optional[str] = Query(None),
+    time_zone: str = Query("UTC"),
+    bucket: ReportBucket = Query("day"),
+):
+    ValidateReportRange(start_date, end_date, time_zone)
+    report = await report_methods.GetVolumeReport(current_user.user_id, start_date, end_date, time_zone, bucket, exercise)
+
+    return models.ReportResponse(**report)
+
+# 1RM - best Epley estimate of one exercise per bucket
+@router.get("/1rm", response_model=models.ReportResponse, status_code=status.HTTP_200_OK)
+@limiter.limit("20/minute")
+async def GetOneRepMaxReport(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    exercise: str = Query(..., min_length=1),
+    current_user = Depends(auth_helper.GetCurrentUser),
+    time_zone: str = Query("UTC"),
+    bucket: ReportBucket = Query("day"),
+):
+    ValidateReportRange(start_date, end_date, time_zone)
+    report = await report_methods.GetOneRepMaxReport(current_user.user_id, start_date, end_date, time_zone, bucket, exercise)
+
+    return models.ReportResponse(**report)
+
+# ROLLUPS - weekly or monthly totals read from the pre-aggregated buckets, for long ranges
+@router.get("/rollups", response_model=List[models.RollupPoint], status_code=status.HTTP_200_OK)
+@limiter.limit("20/minute")
+async def GetRollups(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    period: Literal["week", "month"] = Query("week"),
+    exercise: Optional[str] = Query(None),
+    current_user = Depends(auth_helper.GetCurrentUser),
+):
+    if start_date > end_date:
+        raise APIError.validation_error(ErrorMessage.INVALID_DATE_RANGE)
+
+    rollups = await training_rollups.GetRollups(current_user.user_id, period, start_date, end_date, exercise)
+
+    return [models.RollupPoint(**rollup) for rollup in rollups]
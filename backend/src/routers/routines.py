@@ -1,14 +1,22 @@
+import asyncio
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
+from pydantic import TypeAdapter
 from bson import ObjectId
-from fastapi import Query, Request, status, APIRouter, Depends
+from fastapi import Query, Request, Response, status, APIRouter, Depends
 from lib.database_lib import models 
 from lib.database_lib.users import auth_helper 
+from lib.database_lib.workouts import data_versions
 from lib.database_lib.workouts import routine_methods as routine_methods 
+from lib.database_lib.workouts.general_methods import DuplicateEntryError, InvalidCursorError
+import config
 from config import limiter
 from lib.misc.error_handler import APIError, ErrorMessage
+from lib.misc.etags import IsNotModified, MakeETag, NotModifiedResponse, SetETag
+from lib.misc.response_cache import BuildResponse, list_response_cache
 
 router = APIRouter(tags=["routines"], prefix="/routines")
+ROUTINE_LIST = TypeAdapter(List[models.RoutineResponse])
 
 # CREATE
 @router.post("/", response_model=models.RoutineResponse, status_code=status.HTTP_201_CREATED)
@@ -23,15 +31,12 @@ async def CreateRoutine(
     now = datetime.now(timezone.utc)
     routine_dict["created_at"] = now
 
-    if routine_methods.IsThereARoutineWithName(current_user.user_id, routine_dict["name"]):
+    # The unique (user_id, normalized_name) index rejects duplicate names.
+    try:
+        created_routine = await routine_methods.CreateRoutine(routine_dict)
+    except DuplicateEntryError:
         raise APIError.validation_error(ErrorMessage.ROUTINE_WITH_NAME_ALREADY_EXISTS.format(name=routine_dict["name"]))
 
-    routine_id = routine_methods.CreateRoutine(routine_dict)
-    created_routine = routine_methods.GetRoutineById(routine_id, current_user.user_id)
-    
-    if not created_routine:
-        raise APIError.server_error(ErrorMessage.FAILED_TO_RETRIEVE)
-
     return models.RoutineResponse(**created_routine)
 
 # UPDATE
@@ -51,15 +56,13 @@ async def UpdateRoutine(
     if not updated_data:
         raise APIError.validation_error(ErrorMessage.NO_DATA_PROVIDED)
 
-    success = routine_methods.UpdateRoutine(routine_id, current_user.user_id, updated_data)
+    try:
+        updated_routine = await routine_methods.UpdateRoutine(routine_id, current_user.user_id, updated_data)
+    except DuplicateEntryError:
+        raise APIError.validation_error(ErrorMessage.ROUTINE_WITH_NAME_ALREADY_EXISTS.format(name=updated_data["name"]))
     
-    if not success:
-        raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
-
-    updated_routine = routine_methods.GetRoutineById(routine_id, current_user.user_id)
-
     if not updated_routine:
-        raise APIError.server_error(ErrorMessage.FAILED_TO_RETRIEVE)
+        raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
 
     return models.RoutineResponse(**updated_routine)
 
@@ -74,25 +77,78 @@ async def delete_workout(
     if not ObjectId.is_valid(routine_id):
         raise APIError.validation_error(ErrorMessage.INVALID_ID)
 
-    success = routine_methods.DeleteRoutine(routine_id, current_user.user_id)
+    success = await routine_methods.DeleteRoutine(routine_id, current_user.user_id)
 
     if not success:
         raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
     
     return None
 
+# LIST - Newest first; the cursor for the next page, if any, is returned in the X-Next-Cursor header.
 @router.get("/", response_model=List[models.RoutineResponse])
 @limiter.limit("20/minute")
 async def list_workouts(
     request: Request,
     current_user = Depends(auth_helper.GetCurrentUser),
-    limit: int = Query(50, le=100),
+    limit: int = Query(50, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
 ):
-    routines = routine_methods.GetRoutinesForUser(
-        user_id=current_user.user_id,
-        limit=limit,
-        skip=skip
+    # The version is read before the entries, so the ETag is never newer than the page it tags.
+    version = await data_versions.GetVersion(current_user.user_id)
+    etag = MakeETag(current_user.user_id, version)
+
+    if IsNotModified(request, etag):
+        return NotModifiedResponse(etag)
+
+    cached = await list_response_cache.Get(current_user.user_id, version, request)
+
+    if cached is None:
+        try:
+            routines, next_cursor = await routine_methods.GetRoutinesForUser(
+                user_id=current_user.user_id,
+                limit=limit,
+                skip=skip,
+                cursor=cursor
+            )
+        except InvalidCursorError:
+            raise APIError.validation_error(ErrorMessage.INVALID_CURSOR)
+
+        headers = {config.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        cached = ROUTINE_LIST.dump_json([models.RoutineResponse(**r) for r in routines]), headers
+        await list_response_cache.Put(current_user.user_id, version, request, *cached)
+
+    response = BuildResponse(cached)
+    SetETag(response, etag)
+
+    return response
+
+# GET - One routine, revalidated against the same per-user version as the list.
+@router.get("/{routine_id}", response_model=models.RoutineResponse)
+@limiter.limit("60/minute")
+async def get_routine(
+    request: Request,
+    response: Response,
+    routine_id: str,
+    current_user = Depends(auth_helper.GetCurrentUser)
+):
+    if not ObjectId.is_valid(routine_id):
+        raise APIError.validation_error(ErrorMessage.INVALID_ID)
+
+    # The entry is resolved before any 304, so a missing or someone else's entry is never "not modified".
+    routine, version = await asyncio.gather(
+        routine_methods.GetRoutineById(routine_id, current_user.user_id),
+        data_versions.GetVersion(current_user.user_id)
     )
 
-    return [models.RoutineResponse(**r) for r in routines]
\ No newline at end of file
+    if not routine:
+        raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
+
+    etag = MakeETag(current_user.user_id, version, routine_id)
+
+    if IsNotModified(request, etag):
+        return NotModifiedResponse(etag)
+
+    SetETag(response, etag)
+
+    return models.RoutineResponse(**routine)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, status, Depends, Request
-import lib.database_lib.users.general_methods as general_user_methods
+from lib.database_lib.users.repository import UserRepository, GetUserRepository, SETTINGS_PROJECTION
 import lib.database_lib.settings.general_methods as general_settings_methods
 import lib.database_lib.models as models
 import lib.database_lib.users.auth_helper as auth_helper
@@ -13,9 +13,10 @@ router = APIRouter(tags=["settings"], prefix="/settings")
 @limiter.limit("20/minute")
 async def GetAllSettings(
     request: Request,
-    current_user = Depends(auth_helper.GetCurrentUser)
+    current_user = Depends(auth_helper.GetCurrentUser),
+    users: UserRepository = Depends(GetUserRepository)
 ):
-    user_record = general_user_methods.GetVerifiedUserByEmail(current_user.email)
+    user_record = await users.FindById(current_user.user_id, SETTINGS_PROJECTION)
 
     if not user_record:
         raise APIError.server_error(ErrorMessage.FAILED_TO_RETRIEVE)
@@ -32,7 +33,7 @@ async def UpdateBodyweight(
     payload: models.BodyweightUpdate,
     current_user = Depends(auth_helper.GetCurrentUser)
 ):
-    result = general_settings_methods.UpdateBodyweight(current_user.email, payload.bodyweight)
+    result = await general_settings_methods.UpdateBodyweight(current_user.email, payload.bodyweight)
 
     if not result:
         raise APIError.server_error(ErrorMessage.FAILED_TO_UPDATE)
@@ -0,0 +1,28 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, status
+from lib.database_lib import models
+from lib.database_lib.users import auth_helper
+from lib.database_lib.workouts import sync_methods
+from lib.database_lib.workouts.sync_methods import InvalidSyncTokenError
+from config import limiter
+from lib.misc.error_handler import APIError, ErrorMessage
+
+router = APIRouter(tags=["sync"], prefix="/sync")
+
+# SYNC - What changed in the user's workouts and routines since the token of the previous sync.
+# Apply the changes by id and call again with the returned token, right away while has_more is set.
+# reset means the token is missing or too old: reload the lists in full, then sync from the new token.
+@router.get("", response_model=models.SyncResponse, status_code=status.HTTP_200_OK)
+@limiter.limit("60/minute")
+async def GetChanges(
+    request: Request,
+    since: Optional[str] = Query(None, max_length=100),
+    limit: int = Query(200, ge=1, le=500),
+    current_user = Depends(auth_helper.GetCurrentUser),
+):
+    try:
+        changes = await sync_methods.GetChanges(current_user.user_id, since, limit)
+    except InvalidSyncTokenError:
+        raise APIError.validation_error(ErrorMessage.INVALID_SYNC_TOKEN)
+
+    return models.SyncResponse(**changes)
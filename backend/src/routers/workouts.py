@@ -1,23 +1,35 @@
+import asyncio
 from typing import List, Optional
+from pydantic import TypeAdapter
 from bson import ObjectId
-from fastapi import BackgroundTasks, Query, Request, status, APIRouter, Depends
+from fastapi import Query, Request, Response, status, APIRouter, Depends
 from lib.database_lib import models
 from lib.database_lib.users import auth_helper
+from lib.database_lib.workouts import activity_days, data_versions
 from lib.database_lib.workouts import workout_methods as general_workout_methods
-from datetime import datetime, timezone
+from lib.database_lib.workouts.general_methods import DuplicateEntryError, InvalidCursorError
+from lib.database_lib.workouts.workout_methods import WorkoutLimitReachedError
+from datetime import date, datetime, timedelta, timezone
 import config
 from config import limiter
 from lib.misc.error_handler import APIError, ErrorMessage
-from tasks import CheckPersonalRecords
+from lib.misc.etags import IsNotModified, MakeETag, NotModifiedResponse, SetETag
+from lib.misc.response_cache import BuildResponse, list_response_cache
+from tasks import EnqueuePersonalRecordsCheck
 
 router = APIRouter(tags=["workouts"], prefix="/workouts")
+WORKOUT_LIST = TypeAdapter(List[models.WorkoutResponse])
+
+def DailyWorkoutLimitError():
+    return APIError.validation_error(
+        ErrorMessage.LIMIT_EXCEEDED.format(limit=f"Maximum of {config.MAXIMUM_WORKOUTS_PER_DAY} workouts per day")
+    )
 
 # CREATE
 @router.post("/", response_model=models.WorkoutResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("10/minute")
 async def CreateWorkout(
     request: Request,
-    background_tasks: BackgroundTasks,
     workout: models.Workout,
     current_user = Depends(auth_helper.GetCurrentUser)
 ):
@@ -32,23 +44,17 @@ async def CreateWorkout(
     if workout_dict["scheduled_date"].tzinfo is None:
         workout_dict["scheduled_date"] = workout_dict["scheduled_date"].replace(tzinfo=timezone.utc)
 
-    if general_workout_methods.IsThereAWorkoutWithNameOnSameDate(current_user.user_id, workout_dict["name"], workout_dict["scheduled_date"]):
+    # I added this for some prevention of spamming workouts on a certain date.
+    # The per-day counter admits the workout and the unique (user_id, scheduled_day, normalized_name)
+    # index rejects duplicate names on a day.
+    try:
+        created_workout = await general_workout_methods.CreateWorkout(workout_dict)
+    except WorkoutLimitReachedError:
+        raise DailyWorkoutLimitError()
+    except DuplicateEntryError:
         raise APIError.validation_error(ErrorMessage.WORKOUT_ENTRY_WITH_NAME_ALREADY_EXISTS.format(name=workout_dict["name"]))
 
-    # I added this for some prevention of spamming workouts on a certain date.
-    num_on_date = general_workout_methods.GetNumberOfWorkoutsForUserOnDate(current_user.user_id, workout_dict["scheduled_date"])
-    
-    if num_on_date >= config.MAXIMUM_WORKOUTS_PER_DAY:
-        raise APIError.validation_error(
-            ErrorMessage.LIMIT_EXCEEDED.format(limit=f"Maximum of {config.MAXIMUM_WORKOUTS_PER_DAY} workouts per day")
-        )
-
-    workout_id = general_workout_methods.CreateWorkout(workout_dict)
-    background_tasks.add_task(CheckPersonalRecords, current_user.user_id, workout_id)
-    created_workout = general_workout_methods.GetWorkoutById(workout_id, current_user.user_id)
-    
-    if not created_workout:
-        raise APIError.server_error(ErrorMessage.FAILED_TO_RETRIEVE)
+    await EnqueuePersonalRecordsCheck(current_user.user_id, created_workout["id"])
 
     return models.WorkoutResponse(**created_workout)
 
@@ -69,15 +75,15 @@ async def UpdateWorkout(
     if not updated_data:
         raise APIError.validation_error(ErrorMessage.NO_DATA_PROVIDED)
 
-    success = general_workout_methods.UpdateWorkout(workout_id, current_user.user_id, updated_data)
+    try:
+        updated_workout = await general_workout_methods.UpdateWorkout(workout_id, current_user.user_id, updated_data)
+    except WorkoutLimitReachedError:
+        raise DailyWorkoutLimitError()
+    except DuplicateEntryError:
+        raise APIError.validation_error(ErrorMessage.WORKOUT_ENTRY_WITH_NAME_ALREADY_EXISTS.format(name=updated_data["name"]))
     
-    if not success:
-        raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
-
-    updated_workout = general_workout_methods.GetWorkoutById(workout_id, current_user.user_id)
-
     if not updated_workout:
-        raise APIError.server_error(ErrorMessage.FAILED_TO_RETRIEVE)
+        raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
 
     return models.WorkoutResponse(**updated_workout)
 
@@ -92,14 +98,38 @@ async def delete_workout(
     if not ObjectId.is_valid(workout_id):
         raise APIError.validation_error(ErrorMessage.INVALID_ID)
 
-    success = general_workout_methods.DeleteWorkout(workout_id, current_user.user_id)
+    success = await general_workout_methods.DeleteWorkout(workout_id, current_user.user_id)
 
     if not success:
         raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
     
     return None
 
+# ACTIVITY - Streaks and active days from the activity bitmaps, without reading any workouts.
+# today is the client's local date; the range defaults to the year up to it.
+@router.get("/activity", response_model=models.ActivitySummary)
+@limiter.limit("20/minute")
+async def get_activity(
+    request: Request,
+    current_user = Depends(auth_helper.GetCurrentUser),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    today: Optional[date] = Query(None),
+):
+    today = today or datetime.now(timezone.utc).date()
+    end_date = end_date or today
+    start_date = start_date or end_date - timedelta(days=365)
+
+    if start_date > end_date:
+        raise APIError.validation_error(ErrorMessage.INVALID_DATE_RANGE)
+
+    summary = await activity_days.GetActivitySummary(current_user.user_id, start_date, end_date, today)
+
+    return models.ActivitySummary(**summary)
+
 # LIST - Sorted by scheduled_date, with filters
+# Repeating exercise= keeps the workouts that list any of the given exercises.
+# The cursor for the next page, if any, is returned in the X-Next-Cursor header.
 @router.get("/", response_model=List[models.WorkoutResponse])
 @limiter.limit("20/minute")
 async def list_workouts(
@@ -107,15 +137,69 @@ async def list_workouts(
     current_user = Depends(auth_helper.GetCurrentUser),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    limit: int = Query(50, le=100),
+    limit: int = Query(50, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    exercise: Optional[List[str]] = Query(None, max_length=20),
+):
+    # The version is read before the entries, so the ETag is never newer than the page it tags.
+    version = await data_versions.GetVersion(current_user.user_id)
+    etag = MakeETag(current_user.user_id, version)
+
+    if IsNotModified(request, etag):
+        return NotModifiedResponse(etag)
+
+    cached = await list_response_cache.Get(current_user.user_id, version, request)
+
+    if cached is None:
+        try:
+            workouts, next_cursor = await general_workout_methods.GetWorkoutsForUser(
+                user_id=current_user.user_id,
+                start_date=start_date,
+                end_date=end_date,
+                limit=limit,
+                skip=skip,
+                cursor=cursor,
+                exercise_names=exercise
+            )
+        except InvalidCursorError:
+            raise APIError.validation_error(ErrorMessage.INVALID_CURSOR)
+
+        headers = {config.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        cached = WORKOUT_LIST.dump_json([models.WorkoutResponse(**w) for w in workouts]), headers
+        await list_response_cache.Put(current_user.user_id, version, request, *cached)
+
+    response = BuildResponse(cached)
+    SetETag(response, etag)
+
+    return response
+
+# GET - One workout, revalidated against the same per-user version as the list.
+@router.get("/{workout_id}", response_model=models.WorkoutResponse)
+@limiter.limit("60/minute")
+async def get_workout(
+    request: Request,
+    response: Response,
+    workout_id: str,
+    current_user = Depends(auth_helper.GetCurrentUser)
 ):
-    workouts = general_workout_methods.GetWorkoutsForUser(
-        user_id=current_user.user_id,
-        start_date=start_date,
-        end_date=end_date,
-        limit=limit,
-        skip=skip
+    if not ObjectId.is_valid(workout_id):
+        raise APIError.validation_error(ErrorMessage.INVALID_ID)
+
+    # The entry is resolved before any 304, so a missing or someone else's entry is never "not modified".
+    workout, version = await asyncio.gather(
+        general_workout_methods.GetWorkoutById(workout_id, current_user.user_id),
+        data_versions.GetVersion(current_user.user_id)
     )
 
-    return [models.WorkoutResponse(**w) for w in workouts]
\ No newline at end of file
+    if not workout:
+        raise APIError.not_found(ErrorMessage.RESOURCE_NOT_OWNED)
+
+    etag = MakeETag(current_user.user_id, version, workout_id)
+
+    if IsNotModified(request, etag):
+        return NotModifiedResponse(etag)
+
+    SetETag(response, etag)
+
+    return models.WorkoutResponse(**workout)
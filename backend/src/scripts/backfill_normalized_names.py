@@ -0,0 +1,73 @@
+"""
+Writes normalized_name (and scheduled_day for workouts) onto documents created
+before those fields existed, so the unique duplicate-name indexes cover them.
+
+Documents are walked in _id order in batches. A document whose normalized name
+collides with one that is already indexed is left without the field and
+reported; rename or delete it and run the script again. Legacy workouts only
+kept a UTC timestamp, so their scheduled_day is the UTC calendar day.
+
+Run from backend/src:
+    python -m scripts.backfill_normalized_names [--batch-size 1000]
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.workouts import general_methods
+from lib.database_lib.workouts import workout_methods
+
+def BuildBackfillFields(collection_name: str, doc: dict) -> dict:
+    fields = {"normalized_name": general_methods.NormalizeName(doc.get("name", ""))}
+
+    if collection_name == "workouts" and doc.get("scheduled_date"):
+        fields["scheduled_day"] = workout_methods.GetScheduledDay(doc["scheduled_date"])
+
+    return fields
+
+async def BackfillCollection(collection_name: str, batch_size: int) -> None:
+    collection = GetDb()[collection_name]
+    query = {"normalized_name": {"$exists": False}}
+    last_id = None
+    updated = 0
+    conflicts = []
+
+    while True:
+        batch_query = query if last_id is None else {**query, "_id": {"$gt": last_id}}
+        docs = await collection.find(batch_query, {"name": 1, "scheduled_date": 1}).sort("_id", 1).limit(batch_size).to_list()
+
+        if not docs:
+            break
+
+        last_id = docs[-1]["_id"]
+        operations = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": BuildBackfillFields(collection_name, doc)})
+            for doc in docs
+        ]
+
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        except BulkWriteError as e:
+            updated += e.details.get("nModified", 0)
+            conflicts.extend(str(docs[error["index"]]["_id"]) for error in e.details.get("writeErrors", []))
+
+    print(f"{collection_name}: backfilled {updated} document(s)")
+
+    for entry_id in conflicts:
+        print(f"{collection_name}: {entry_id} duplicates an existing name and was skipped")
+
+async def Backfill(batch_size: int) -> None:
+    await EnsureIndexes()
+
+    for collection_name in ["routines", "workouts"]:
+        await BackfillCollection(collection_name, batch_size)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(Backfill(args.batch_size))
@@ -0,0 +1,62 @@
+"""
+Rebuilds the per-user, per-day workout counters that enforce
+MAXIMUM_WORKOUTS_PER_DAY from the workouts that actually exist.
+
+Days come from scheduled_day, falling back to the UTC day of scheduled_date for
+workouts that were never backfilled, which matches how the app releases them.
+Counters are overwritten with the recomputed count, so run it after
+scripts.backfill_normalized_names and preferably while writes are quiet.
+
+Run from backend/src:
+    python -m scripts.backfill_workout_day_counters [--batch-size 1000]
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+
+COUNT_PIPELINE = [
+    {"$group": {
+        "_id": {
+            "user_id": "$user_id",
+            "scheduled_day": {"$ifNull": [
+                "$scheduled_day",
+                {"$dateToString": {"format": "%Y-%m-%d", "date": "$scheduled_date", "timezone": "UTC"}}
+            ]},
+        },
+        "count": {"$sum": 1},
+    }},
+]
+
+async def Backfill(batch_size: int) -> None:
+    db = GetDb()
+    await EnsureIndexes()
+
+    operations = []
+    written = 0
+
+    async for day in await db["workouts"].aggregate(COUNT_PIPELINE, allowDiskUse=True):
+        operations.append(UpdateOne(
+            {"user_id": day["_id"]["user_id"], "scheduled_day": day["_id"]["scheduled_day"]},
+            {"$set": {"count": day["count"]}},
+            upsert=True
+        ))
+
+        if len(operations) >= batch_size:
+            await db["workout_day_counters"].bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    if operations:
+        await db["workout_day_counters"].bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    print(f"Wrote {written} workout day counter(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(Backfill(args.batch_size))
@@ -0,0 +1,71 @@
+"""
+Moves live tokens from the legacy one-document-per-token "refresh_tokens"
+collection into the per-user "refresh_sessions" documents.
+
+Each token becomes one device session. The script is idempotent: a token
+whose hash is already in the user's sessions is left alone, so it can be
+re-run safely while old app instances are still writing legacy tokens.
+
+Run from backend/src:
+    python -m scripts.migrate_refresh_sessions [--batch-size 500] [--drop-legacy]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.users import refresh_tokens
+
+def BuildMigrationUpdate(token: dict) -> UpdateOne:
+    session = refresh_tokens.BuildSession(
+        token["token_hash"],
+        token["expires_at"],
+        token.get("device_fingerprint"),
+        token.get("created_at") or datetime.now(timezone.utc)
+    )
+    # Keeps every existing session except an identical token, so re-runs do not duplicate it.
+    keep_condition = {"$ne": ["$$session.token_hash", token["token_hash"]]}
+
+    return UpdateOne(
+        {"user_id": str(token["user_id"])},
+        refresh_tokens.BuildAppendSessionPipeline(session, keep_condition, token["email"], token["username"]),
+        upsert=True
+    )
+
+async def Migrate(batch_size: int, drop_legacy: bool) -> None:
+    db = GetDb()
+    await EnsureIndexes()
+
+    legacy_tokens = db["refresh_tokens"].find(
+        {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+    ).sort("created_at", 1)
+
+    batch = []
+    migrated = 0
+
+    async for token in legacy_tokens:
+        batch.append(BuildMigrationUpdate(token))
+
+        if len(batch) >= batch_size:
+            await db[refresh_tokens.COLLECTION_NAME].bulk_write(batch, ordered=True)
+            migrated += len(batch)
+            batch = []
+
+    if batch:
+        await db[refresh_tokens.COLLECTION_NAME].bulk_write(batch, ordered=True)
+        migrated += len(batch)
+
+    print(f"Migrated {migrated} refresh token(s) into {refresh_tokens.COLLECTION_NAME}")
+
+    if drop_legacy:
+        await db["refresh_tokens"].drop()
+        print("Dropped the legacy refresh_tokens collection")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--drop-legacy", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(Migrate(args.batch_size, args.drop_legacy))
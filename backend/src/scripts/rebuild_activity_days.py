@@ -0,0 +1,84 @@
+"""
+Rebuilds the per-user, per-year activity bitmaps from the workout day counters.
+
+A day is active when its counter is above zero, so run it after
+scripts.backfill_workout_day_counters. Every bitmap is overwritten with the
+recomputed words and bitmaps with no active day left are removed. Bitmaps the
+app updates while the rebuild runs are left alone.
+
+Run from backend/src:
+    python -m scripts.rebuild_activity_days [--batch-size 1000]
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timezone
+from bson.int64 import Int64
+from pymongo import UpdateOne
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.workouts import activity_days
+
+def BuildUserOperations(user_id: str, days: list, now: datetime) -> list:
+    return [
+        UpdateOne(
+            {"user_id": user_id, "year": year},
+            {"$set": {
+                **{field: Int64(word) for field, word in zip(activity_days.WORD_FIELDS, words)},
+                "updated_at": now,
+            }},
+            upsert=True
+        )
+        for year, words in activity_days.BuildYearWords(days).items()
+    ]
+
+async def Rebuild(batch_size: int) -> None:
+    db = GetDb()
+    activity = db[activity_days.COLLECTION_NAME]
+    await EnsureIndexes()
+
+    started_at = datetime.now(timezone.utc)
+    counters = db["workout_day_counters"].find(
+        {"count": {"$gt": 0}},
+        {"_id": 0, "user_id": 1, "scheduled_day": 1}
+    ).sort([("user_id", 1), ("scheduled_day", 1)])
+
+    operations = []
+    written = 0
+    user_id = None
+    days = []
+
+    async def Flush(final: bool = False):
+        nonlocal operations, written
+
+        if operations and (final or len(operations) >= batch_size):
+            await activity.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    async for counter in counters:
+        if counter["user_id"] != user_id:
+            if days:
+                operations.extend(BuildUserOperations(user_id, days, started_at))
+                await Flush()
+
+            user_id = counter["user_id"]
+            days = []
+
+        days.append(date.fromisoformat(counter["scheduled_day"]))
+
+    if days:
+        operations.extend(BuildUserOperations(user_id, days, started_at))
+
+    await Flush(final=True)
+
+    # Everything still current was stamped above or touched by the app since.
+    stale = await activity.delete_many({"updated_at": {"$lt": started_at}})
+
+    print(f"Wrote {written} activity bitmap(s), removed {stale.deleted_count} stale bitmap(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(Rebuild(args.batch_size))
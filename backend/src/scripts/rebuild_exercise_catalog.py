@@ -0,0 +1,64 @@
+"""
+Rebuilds every user's exercise catalog from the workouts.
+
+Each entry is overwritten with its recomputed workout count and last used date
+and entries of exercises no workout lists any more are removed. Entries the app
+writes while the rebuild runs are left alone. Running workers keep serving their
+cached catalogs until the cache TTL expires.
+
+Run from backend/src:
+    python -m scripts.rebuild_exercise_catalog [--user-id <id>] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo import UpdateOne
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.workouts import exercise_catalog
+
+async def Rebuild(user_id: Optional[str], batch_size: int) -> None:
+    db = GetDb()
+    catalog = db[exercise_catalog.COLLECTION_NAME]
+    await EnsureIndexes()
+
+    started_at = datetime.now(timezone.utc)
+    scope = {"user_id": user_id} if user_id else {}
+    pipeline = exercise_catalog.BuildCatalogPipeline(scope)
+
+    operations = []
+    written = 0
+
+    async for row in await db["workouts"].aggregate(pipeline, allowDiskUse=True):
+        operations.append(UpdateOne(
+            {"user_id": row["user_id"], "exercise": row["exercise"]},
+            {"$set": {
+                "workouts": row["workouts"],
+                "last_used": row["last_used"],
+                "updated_at": started_at,
+            }},
+            upsert=True
+        ))
+
+        if len(operations) >= batch_size:
+            await catalog.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    if operations:
+        await catalog.bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    # Everything still current was stamped above or touched by the app since.
+    stale = await catalog.delete_many(scope | {"updated_at": {"$lt": started_at}})
+
+    print(f"Wrote {written} catalog entries, removed {stale.deleted_count} stale entries")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", default=None, help="Only rebuild this user's catalog")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(Rebuild(args.user_id, args.batch_size))
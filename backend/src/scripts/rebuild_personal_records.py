@@ -0,0 +1,62 @@
+"""
+Rebuilds the personal_records collection from the workouts that actually exist.
+
+Run it once after deploying the personal records table, and again whenever the
+records are suspected to have drifted. Every (user, exercise) record is
+recomputed with the same tie-breaking as the live updates, and records whose
+exercise no longer appears in any workout are removed. Records written by the
+app while the rebuild runs are left alone.
+
+Run from backend/src:
+    python -m scripts.rebuild_personal_records [--user-id <id>] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo import UpdateOne
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.workouts import personal_records
+
+async def Rebuild(user_id: Optional[str], batch_size: int) -> None:
+    db = GetDb()
+    records = db[personal_records.COLLECTION_NAME]
+    await EnsureIndexes()
+
+    started_at = datetime.now(timezone.utc)
+    scope = {"user_id": user_id} if user_id else {}
+    pipeline = personal_records.BuildRecomputePipeline(scope)
+
+    operations = []
+    written = 0
+
+    async for row in await db["workouts"].aggregate(pipeline, allowDiskUse=True):
+        fields = {field: row[field] for field in personal_records.RECORD_FIELDS}
+        operations.append(UpdateOne(
+            {"user_id": row["user_id"], "exercise": row["exercise"]},
+            {"$set": fields | {"updated_at": started_at}},
+            upsert=True
+        ))
+
+        if len(operations) >= batch_size:
+            await records.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    if operations:
+        await records.bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    # Everything still current was stamped above or touched by the app since.
+    stale = await records.delete_many(scope | {"updated_at": {"$lt": started_at}})
+
+    print(f"Wrote {written} personal record(s), removed {stale.deleted_count} stale record(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", default=None, help="Only rebuild this user's records")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(Rebuild(args.user_id, args.batch_size))
@@ -0,0 +1,122 @@
+"""
+Rebuilds or checks the weekly and monthly training rollups against the workouts.
+
+rebuild  recomputes every rollup bucket from the workouts and removes buckets no
+         workout contributes to any more. Buckets the app writes while the
+         rebuild runs are left alone.
+check    recomputes the buckets the same way without writing and reports
+         buckets that are missing, extra or hold different values. It exits
+         with status 1 when anything differs.
+
+Run from backend/src:
+    python -m scripts.training_rollups rebuild [--user-id <id>] [--batch-size 1000]
+    python -m scripts.training_rollups check [--user-id <id>] [--show 20]
+"""
+import argparse
+import asyncio
+import math
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.workouts import training_rollups
+
+def GetKey(row: Dict) -> Tuple[str, str, str, str]:
+    return row["user_id"], row["exercise"], row["period"], row["start"]
+
+async def Rebuild(user_id: Optional[str], batch_size: int) -> None:
+    db = GetDb()
+    rollups = db[training_rollups.COLLECTION_NAME]
+    await EnsureIndexes()
+
+    started_at = datetime.now(timezone.utc)
+    scope = {"user_id": user_id} if user_id else {}
+    pipeline = training_rollups.BuildRollupPipeline(scope)
+
+    operations = []
+    written = 0
+
+    async for row in await db["workouts"].aggregate(pipeline, allowDiskUse=True):
+        user, exercise, period, start = GetKey(row)
+        fields = {field: row[field] for field in training_rollups.ROLLUP_FIELDS}
+        operations.append(UpdateOne(
+            {"user_id": user, "exercise": exercise, "period": period, "start": start},
+            {"$set": fields | {"updated_at": started_at}},
+            upsert=True
+        ))
+
+        if len(operations) >= batch_size:
+            await rollups.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    if operations:
+        await rollups.bulk_write(operations, ordered=False)
+        written += len(operations)
+
+    # Everything still current was stamped above or touched by the app since.
+    stale = await rollups.delete_many(scope | {"updated_at": {"$lt": started_at}})
+
+    print(f"Wrote {written} rollup bucket(s), removed {stale.deleted_count} stale bucket(s)")
+
+def GetDifferences(stored: Dict, expected: Dict) -> List[str]:
+    # Volumes are float sums added in a different order, so they only need to agree closely.
+    return [
+        f"{field} {stored.get(field)} != {expected[field]}"
+        for field in training_rollups.ROLLUP_FIELDS
+        if not math.isclose(stored.get(field, 0), expected[field], rel_tol=1e-9, abs_tol=1e-6)
+    ]
+
+async def Check(user_id: Optional[str], show: int) -> bool:
+    db = GetDb()
+    scope = {"user_id": user_id} if user_id else {}
+    pipeline = training_rollups.BuildRollupPipeline(scope)
+    expected = {GetKey(row): row async for row in await db["workouts"].aggregate(pipeline, allowDiskUse=True)}
+
+    mismatched = []
+    extra = []
+
+    async for stored in db[training_rollups.COLLECTION_NAME].find(scope, {"_id": 0}):
+        key = GetKey(stored)
+        row = expected.pop(key, None)
+
+        if row is None:
+            extra.append(key)
+        elif differences := GetDifferences(stored, row):
+            mismatched.append((key, differences))
+
+    missing = list(expected)
+
+    print(f"{len(missing)} missing, {len(extra)} extra, {len(mismatched)} mismatched rollup bucket(s)")
+
+    for key in missing[:show]:
+        print(f"  missing     {key}")
+
+    for key in extra[:show]:
+        print(f"  extra       {key}")
+
+    for key, differences in mismatched[:show]:
+        print(f"  mismatched  {key}: {', '.join(differences)}")
+
+    return not (missing or extra or mismatched)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser("rebuild")
+    rebuild_parser.add_argument("--user-id", default=None, help="Only rebuild this user's rollups")
+    rebuild_parser.add_argument("--batch-size", type=int, default=1000)
+
+    check_parser = subparsers.add_parser("check")
+    check_parser.add_argument("--user-id", default=None, help="Only check this user's rollups")
+    check_parser.add_argument("--show", type=int, default=20, help="How many differences of each kind to print")
+
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        asyncio.run(Rebuild(args.user_id, args.batch_size))
+    elif not asyncio.run(Check(args.user_id, args.show)):
+        sys.exit(1)
@@ -0,0 +1,2 @@
+from .personal_records import CheckPersonalRecords, EnqueuePersonalRecordsCheck
+from .weekly_summary import BuildWeeklySummaries, FormatWeeklySummary, ProcessSlice, SendWeeklySummary
@@ -0,0 +1,47 @@
+from typing import List
+from bson import ObjectId
+import config
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.jobs import job_queue
+from lib.database_lib.workouts import personal_records
+from lib.misc.emails import SendEmails
+
+JOB_TYPE = "check_personal_records"
+
+async def EnqueuePersonalRecordsCheck(user_id: str, workout_id: str) -> None:
+    # Workouts the user logs before the check runs join the same job and the same email.
+    await job_queue.Enqueue(
+        JOB_TYPE,
+        {"user_id": user_id},
+        dedupe_key=f"{JOB_TYPE}:{user_id}",
+        delay_seconds=config.PERSONAL_RECORDS_CHECK_DELAY_SECONDS,
+        merge={"$addToSet": {"payload.workout_ids": workout_id}}
+    )
+
+async def CheckPersonalRecords(user_id: str, workout_ids: List[str]):
+    db = GetDb()
+    user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"email": 1})
+    workouts = await db["workouts"].find(
+        {"_id": {"$in": [ObjectId(workout_id) for workout_id in workout_ids]}, "user_id": user_id},
+        {"exercises.name": 1}
+    ).to_list()
+
+    if not workouts or not user:
+        return
+
+    # The records were raised when the workouts were written; the ones they now hold are their PRs.
+    names = list({exercise["name"] for workout in workouts for exercise in workout.get("exercises", [])})
+    records = await personal_records.GetRecordsForExercises(user_id, names)
+    prs_broken = [
+        {"name": record["exercise"], "weight": record["max_weight"]}
+        for record in records
+        if record["max_weight_workout_id"] in workout_ids
+    ]
+
+    if prs_broken and user.get("email"):
+        lines = "\n".join(f"  - {e['name']}: {e['weight']} lbs" for e in prs_broken)
+        body = f"You broke personal records in your latest workout!\n\n{lines}\n\nKeep it up!"
+
+        # A failed send raises so the job is retried.
+        if not (await SendEmails([(user["email"], "New Personal Records!", body)]))[0]:
+            raise RuntimeError("The personal records email could not be sent")
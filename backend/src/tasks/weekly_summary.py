@@ -0,0 +1,153 @@
+import logging
+import time
+from typing import Dict, List, Set, Tuple
+import config
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.summaries import weekly_summary_jobs
+from lib.database_lib.workouts import activity_days, personal_records
+from lib.misc.emails import SendEmails
+from datetime import datetime, timezone, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+def BuildWeeklyWorkoutsPipeline(user_ids: List[str], week_ago: datetime, now: datetime) -> List[Dict]:
+    # This week's workout ids for every user in the batch who logged one.
+    return [
+        {"$match": {"user_id": {"$in": user_ids}, "scheduled_date": {"$gte": week_ago, "$lte": now}}},
+        {"$group": {"_id": "$user_id", "weekly_workout_ids": {"$push": {"$toString": "$_id"}}}},
+    ]
+
+def FormatWeeklySummary(workout_count: int, prs: List[str], streak: int) -> str:
+    body = "Here's your workout summary for the past week:\n\n"
+    body += f"Workouts logged: {workout_count}\n"
+
+    if prs:
+        body += f"Personal records broken: {', '.join(prs)}\n"
+    else:
+        body += "No new personal records this week.\n"
+
+    body += f"Current streak: {streak} day(s)\n\nKeep up the great work!"
+
+    return body
+
+async def BuildWeeklySummaries(users: List[Dict], now: datetime) -> List[Tuple[str, str, str]]:
+    """
+    Returns (user_id, email, body) for every user in the batch who logged a workout this week.
+    The cost is three round trips per batch whatever its size: one aggregation over this
+    week's workouts, one personal_records lookup for the records they hold and one read
+    of the activity bitmaps for the streaks.
+    """
+    db = GetDb()
+    week_ago = now - timedelta(days=7)
+    emails = {str(user["_id"]): user["email"] for user in users if user.get("email")}
+
+    if not emails:
+        return []
+
+    pipeline = BuildWeeklyWorkoutsPipeline(list(emails), week_ago, now)
+    activity = await (await db["workouts"].aggregate(pipeline)).to_list()
+
+    if not activity:
+        return []
+
+    # A PR was broken this week when the record is now held by one of this week's workouts.
+    weekly_workout_ids = [workout_id for row in activity for workout_id in row["weekly_workout_ids"]]
+    prs: Dict[str, Set[str]] = {}
+
+    async for record in db[personal_records.COLLECTION_NAME].find(
+        {"user_id": {"$in": [row["_id"] for row in activity]}, "max_weight_workout_id": {"$in": weekly_workout_ids}},
+        {"_id": 0, "user_id": 1, "exercise": 1}
+    ):
+        prs.setdefault(record["user_id"], set()).add(record["exercise"])
+
+    timelines = await activity_days.GetTimelines(row["_id"] for row in activity)
+
+    return [
+        (
+            row["_id"],
+            emails[row["_id"]],
+            FormatWeeklySummary(
+                len(row["weekly_workout_ids"]),
+                sorted(prs.get(row["_id"], ())),
+                timelines[row["_id"]].GetCurrentStreak(now.date()) if row["_id"] in timelines else 0
+            )
+        )
+        for row in activity
+    ]
+
+async def ProcessSlice(week: str, run_now: datetime, slice_doc: Dict, deadline: float) -> Tuple[int, int, bool]:
+    """
+    Emails the slice's users who have not had this week's summary yet. Returns the number
+    of users in the slice, the number of emails sent and whether the slice was worked
+    through before the deadline. A slice with users whose send failed is left open for a
+    later attempt rather than closed.
+    """
+    users = await weekly_summary_jobs.GetSliceUsers(slice_doc)
+    delivered = await weekly_summary_jobs.GetDeliveredUserIds(week, [str(user["_id"]) for user in users])
+    pending = [user for user in users if str(user["_id"]) not in delivered]
+    sent = 0
+
+    summaries = await BuildWeeklySummaries(pending, run_now)
+    send_batch_size = config.WEEKLY_SUMMARY_SEND_BATCH_SIZE
+
+    for start in range(0, len(summaries), send_batch_size):
+        if time.monotonic() >= deadline:
+            await weekly_summary_jobs.ReleaseSlice(slice_doc["_id"], done=False)
+            return len(users), sent, False
+
+        # Each group goes out concurrently over the pooled SMTP connections.
+        batch = summaries[start:start + send_batch_size]
+        results = await SendEmails((email, "Your Weekly Workout Summary", body) for _, email, body in batch)
+        delivered_ids = [user_id for (user_id, _, _), accepted in zip(batch, results) if accepted]
+        await weekly_summary_jobs.RecordDeliveries(week, delivered_ids)
+        sent += len(delivered_ids)
+
+    if sent < len(summaries):
+        retried = await weekly_summary_jobs.RetrySlice(
+            slice_doc["_id"], config.WEEKLY_SUMMARY_MAX_ATTEMPTS, config.WEEKLY_SUMMARY_RETRY_SECONDS
+        )
+
+        if not retried:
+            logger.warning("Weekly summary slice %s gave up on %d undelivered user(s)", slice_doc["_id"], len(summaries) - sent)
+    else:
+        await weekly_summary_jobs.ReleaseSlice(slice_doc["_id"], done=True)
+
+    return len(users), sent, True
+
+async def SendWeeklySummary(
+    max_users: int = config.WEEKLY_SUMMARY_MAX_USERS,
+    max_seconds: float = config.WEEKLY_SUMMARY_MAX_SECONDS,
+    batch_size: int = config.WEEKLY_SUMMARY_BATCH_SIZE
+) -> Dict:
+    """
+    Works through this week's summary run for up to max_users users or max_seconds,
+    whichever comes first, and reports where it stopped. Progress is persisted per
+    slice and per user, so it is safe to call again, or from several places at once,
+    until "done" is true.
+    """
+    deadline = time.monotonic() + max_seconds
+    now = datetime.now(timezone.utc)
+    week = weekly_summary_jobs.GetWeekKey(now)
+    run = await weekly_summary_jobs.GetOrCreateRun(week, now)
+    lease_seconds = max(config.WEEKLY_SUMMARY_LEASE_SECONDS, max_seconds)
+    users_claimed = 0
+    sent = 0
+
+    while users_claimed < max_users and time.monotonic() < deadline:
+        slice_doc = await weekly_summary_jobs.ReclaimExpiredSlice(week, lease_seconds)
+
+        if slice_doc is None:
+            slice_doc = await weekly_summary_jobs.ClaimNextSlice(week, min(batch_size, max_users - users_claimed), lease_seconds)
+
+        if slice_doc is None:
+            break
+
+        slice_users, slice_sent, finished = await ProcessSlice(week, run["now"], slice_doc, deadline)
+        users_claimed += slice_users
+        sent += slice_sent
+
+        if not finished:
+            break
+
+    return {"week": week, "sent": sent, "done": await weekly_summary_jobs.IsRunFinished(week)}
@@ -0,0 +1,143 @@
+"""
+Runs the background jobs queued in the jobs collection and sends the signup and
+password reset emails waiting in the email outbox.
+
+Each worker claims one due job at a time, runs it and marks it done, or puts it back
+with a backoff when it raises. A job that outlives its visibility timeout is cancelled
+and left for another claim. Outbox emails that the request's own delivery attempt
+could not send are retried the same way. Several workers can run side by side.
+SIGINT or SIGTERM lets the current job finish before the worker exits.
+On Vercel, which never starts this worker, the /internal/jobs and /internal/email-outbox
+crons drain the same queues. Their every-minute schedules need a Vercel Pro plan; Hobby
+only runs crons once a day.
+
+Run from backend/src:
+    python -m tasks.worker [--drain] [--poll-interval 2]
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, Optional
+import config
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.jobs import job_queue
+from lib.database_lib.users import email_outbox
+from . import personal_records
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[None]]
+
+HANDLERS: Dict[str, Handler] = {
+    personal_records.JOB_TYPE: personal_records.CheckPersonalRecords,
+}
+
+async def RunJob(job: Dict, handlers: Dict[str, Handler], visibility_timeout: float) -> bool:
+    """Runs one claimed job and records the outcome. Returns whether it succeeded."""
+    try:
+        # Past the timeout the lease is gone and another worker may run the job, so stop here.
+        await asyncio.wait_for(handlers[job["type"]](**job["payload"]), visibility_timeout)
+    except Exception as error:
+        logger.warning("Job %s (%s) failed on attempt %d: %r", job["_id"], job["type"], job["attempts"], error)
+        await job_queue.FailJob(job, "".join(traceback.format_exception(error)))
+        return False
+
+    await job_queue.CompleteJob(job)
+
+    return True
+
+async def RunWorker(
+    handlers: Dict[str, Handler] = HANDLERS,
+    poll_interval: float = config.JOB_POLL_INTERVAL_SECONDS,
+    visibility_timeout: float = config.JOB_VISIBILITY_TIMEOUT_SECONDS,
+    drain: bool = False,
+    stop: Optional[asyncio.Event] = None,
+    max_seconds: Optional[float] = None
+) -> Dict[str, int]:
+    """
+    Claims and runs jobs until stop is set or, with drain, until no job is due.
+    With max_seconds no job is claimed once that much time has passed, which keeps a
+    drain inside a serverless function's time limit.
+    Returns how many jobs succeeded and failed.
+    """
+    stop = stop or asyncio.Event()
+    counts = {"succeeded": 0, "failed": 0}
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+
+    while not stop.is_set():
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+        job = await job_queue.ClaimNextJob(handlers, visibility_timeout)
+
+        if job is None:
+            if drain:
+                break
+
+            try:
+                await asyncio.wait_for(stop.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            continue
+
+        succeeded = await RunJob(job, handlers, visibility_timeout)
+        counts["succeeded" if succeeded else "failed"] += 1
+
+    return counts
+
+async def RunEmailOutbox(
+    poll_interval: float = config.JOB_POLL_INTERVAL_SECONDS,
+    drain: bool = False,
+    stop: Optional[asyncio.Event] = None
+) -> Dict[str, int]:
+    """Sends due outbox emails until stop is set or, with drain, until none is due."""
+    stop = stop or asyncio.Event()
+    counts = {email_outbox.SENT: 0, email_outbox.PENDING: 0, email_outbox.FAILED: 0}
+
+    while not stop.is_set():
+        delivered = await email_outbox.DeliverDue()
+
+        for status, count in delivered.items():
+            counts[status] += count
+
+        if any(delivered.values()):
+            continue
+
+        if drain:
+            break
+
+        try:
+            await asyncio.wait_for(stop.wait(), poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    return counts
+
+async def Main(drain: bool, poll_interval: float) -> None:
+    await EnsureIndexes()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+
+    counts, email_counts = await asyncio.gather(
+        RunWorker(poll_interval=poll_interval, drain=drain, stop=stop),
+        RunEmailOutbox(poll_interval=poll_interval, drain=drain, stop=stop)
+    )
+
+    print(f"Ran {counts['succeeded']} job(s), {counts['failed']} failed")
+    print(f"Sent {email_counts['sent']} outbox email(s), {email_counts['pending']} to retry, {email_counts['failed']} failed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drain", action="store_true", help="Exit once no job is due instead of polling")
+    parser.add_argument("--poll-interval", type=float, default=config.JOB_POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(Main(args.drain, args.poll_interval))
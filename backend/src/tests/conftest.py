@@ -0,0 +1,42 @@
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from pymongo import AsyncMongoClient
+from pymongo.errors import PyMongoError
+import config
+
+async def RunOnServer(action) -> None:
+    # A short-lived client of its own, since GetClient's client belongs to the test's event loop.
+    client = AsyncMongoClient(config.MONGO_URI, serverSelectionTimeoutMS=2000)
+
+    try:
+        await action(client)
+    finally:
+        await client.close()
+
+@pytest.fixture
+def scratch_db(request, monkeypatch):
+    """
+    Points GetDb at a scratch database named after the test module, for the tests that
+    need a real MongoDB. Skips when MONGO_URI is unset or the server does not answer,
+    and drops the database afterwards.
+    """
+    if not config.MONGO_URI:
+        pytest.skip("MONGO_URI is not set")
+
+    try:
+        asyncio.run(RunOnServer(lambda client: client.admin.command("ping")))
+    except PyMongoError:
+        pytest.skip("MongoDB is not reachable")
+
+    name = f"{config.MONGO_DB_NAME}_{request.module.__name__.rsplit('.', 1)[-1]}"
+    monkeypatch.setattr(config, "MONGO_DB_NAME", name)
+
+    yield name
+
+    asyncio.run(RunOnServer(lambda client: client.drop_database(name)))
@@ -0,0 +1,97 @@
+import socketserver
+import threading
+import time
+from typing import List, Tuple
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    # Just enough SMTP for smtplib without STARTTLS or AUTH: every message is accepted and kept.
+    def handle(self):
+        server = self.server
+
+        with server.lock:
+            server.connections += 1
+            server.open_sockets.append(self.connection)
+
+        # Stands in for the TCP, TLS and login round trips of a real provider.
+        time.sleep(server.connect_delay)
+        self.Reply("220 sink ready")
+        sender, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+
+            if not line:
+                return
+
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.Reply("250 sink")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip("<>"), []
+                self.Reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip("<>"))
+                self.Reply("250 OK")
+            elif verb == "DATA":
+                self.Reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+
+                for data_line in iter(self.rfile.readline, b""):
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+
+                    data.append(data_line)
+
+                with server.lock:
+                    server.messages.append((sender, recipients, b"".join(data).decode("utf-8", "replace")))
+
+                self.Reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.Reply("250 OK")
+            elif verb == "QUIT":
+                self.Reply("221 Bye")
+                return
+            else:
+                self.Reply("502 Command not implemented")
+
+    def Reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """
+    A local SMTP server that stores what it receives, for tests and benchmarks.
+    Use it as a context manager; port holds the port it bound on localhost.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), SmtpSinkHandler)
+        self.connect_delay = connect_delay
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.open_sockets = []
+        self.messages: List[Tuple[str, List[str], str]] = []
+        self.port = self.server_address[1]
+
+    def DropConnections(self) -> None:
+        # Simulates the provider closing idle sessions.
+        with self.lock:
+            sockets, self.open_sockets = self.open_sockets, []
+
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,33 @@
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from lib.misc.activity_bitmap import ActivityTimeline, GetWordAndMask, JoinWords, WORDS_PER_YEAR
+
+def BuildYears(days):
+    words = {}
+
+    for day in days:
+        word, mask = GetWordAndMask(day)
+        words.setdefault(day.year, [0] * WORDS_PER_YEAR)[word] |= mask
+
+    return {year: JoinWords(year_words) for year, year_words in words.items()}
+
+def test_streaks_and_ranges_cross_word_and_year_boundaries():
+    # December 29th 2025 through January 3rd 2026, then a gap, then March 4th-5th 2026.
+    streak_days = [date(2025, 12, 29) + timedelta(days=i) for i in range(6)]
+    later_days = [date(2026, 3, 4), date(2026, 3, 5)]
+    timeline = ActivityTimeline(BuildYears(streak_days + later_days + [date(2025, 3, 5)]))
+
+    assert timeline.GetCurrentStreak(date(2026, 1, 3)) == 6
+    assert timeline.GetCurrentStreak(date(2026, 3, 5)) == 2
+    assert timeline.GetCurrentStreak(date(2026, 3, 6)) == 0
+    assert timeline.GetLongestStreak() == 6
+    assert timeline.CountActiveDays(date(2026, 1, 1), date(2026, 12, 31)) == 5
+    assert timeline.GetActiveDays(date(2026, 1, 2), date(2026, 3, 4)) == [date(2026, 1, 2), date(2026, 1, 3), date(2026, 3, 4)]
+    # March 5th 2025 is bit 63 of the first word, which is stored as the sign bit.
+    assert timeline.IsActive(date(2025, 3, 5))
+    assert timeline.IsActive(date(2025, 12, 29))
@@ -0,0 +1,21 @@
+import math
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from lib.misc.downsampling import LargestTriangleThreeBuckets
+
+def test_downsampling_keeps_the_ends_and_the_peaks():
+    xs = list(range(1000))
+    ys = [math.sin(x / 50) for x in xs]
+    ys[537] = 10.0
+
+    indices = LargestTriangleThreeBuckets(xs, ys, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert indices == sorted(set(indices))
+    assert 537 in indices
+    assert LargestTriangleThreeBuckets(xs[:10], ys[:10], 50) == list(range(10))
@@ -0,0 +1,63 @@
+import asyncio
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from bson import ObjectId
+import config
+from tests.smtp_sink import SmtpSink
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.users import auth_helper, email_outbox
+from lib.misc import emails
+from lib.misc.smtp_pool import SmtpPool
+
+def test_signup_email_is_queued_with_the_pending_user_and_delivered_after(scratch_db, monkeypatch):
+
+    async def run():
+        pending_user_id = await auth_helper.InitiateEmailVerification("new@example.com", "newuser", "hash")
+        queued = await GetDb()["pending_users"].find_one({"_id": pending_user_id})
+        await email_outbox.DeliverOne(email_outbox.VERIFICATION, pending_user_id)
+        delivered = await GetDb()["pending_users"].find_one({"_id": pending_user_id})
+
+        return queued, delivered
+
+    with SmtpSink() as sink:
+        monkeypatch.setattr(emails, "smtp_pool", SmtpPool("127.0.0.1", sink.port, None, None, size=1, use_starttls=False))
+        queued, delivered = asyncio.run(run())
+
+    assert queued[email_outbox.OUTBOX_FIELD]["status"] == email_outbox.PENDING
+    assert delivered[email_outbox.OUTBOX_FIELD]["status"] == email_outbox.SENT
+    assert "token" not in delivered[email_outbox.OUTBOX_FIELD]
+    assert len(sink.messages) == 1 and queued["verification_token"] in sink.messages[0][2]
+
+def test_raw_token_is_dropped_once_delivery_fails_for_good(scratch_db, monkeypatch):
+    monkeypatch.setattr(config, "EMAIL_OUTBOX_MAX_ATTEMPTS", 1)
+
+    # Nothing listens on a port the sink held and released, so every send is refused.
+    with SmtpSink() as sink:
+        closed_port = sink.port
+
+    monkeypatch.setattr(emails, "smtp_pool", SmtpPool("127.0.0.1", closed_port, None, None, size=1, use_starttls=False))
+
+    async def run():
+        pending_user_id = await auth_helper.InitiateEmailVerification("new@example.com", "newuser", "hash")
+        await email_outbox.DeliverOne(email_outbox.VERIFICATION, pending_user_id)
+
+        return await GetDb()["pending_users"].find_one({"_id": pending_user_id})
+
+    failed = asyncio.run(run())
+
+    assert failed[email_outbox.OUTBOX_FIELD]["status"] == email_outbox.FAILED
+    assert "token" not in failed[email_outbox.OUTBOX_FIELD]
+
+def test_status_id_names_only_the_outbox_it_was_issued_for(monkeypatch):
+    monkeypatch.setattr(config, "SECRET_KEY", "test-secret")
+    document_id = ObjectId()
+    status_id = email_outbox.MakeStatusId(email_outbox.VERIFICATION, document_id)
+
+    assert email_outbox.ParseStatusId(email_outbox.VERIFICATION, status_id) == document_id
+    assert email_outbox.ParseStatusId(email_outbox.RESET_PASSWORD, status_id) is None
+    assert email_outbox.ParseStatusId(email_outbox.VERIFICATION, f"{ObjectId()}.{status_id.partition('.')[2]}") is None
+    assert email_outbox.ParseStatusId(email_outbox.VERIFICATION, "new@example.com") is None
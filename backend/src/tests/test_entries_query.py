@@ -0,0 +1,42 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from bson import ObjectId
+from lib.database_lib.workouts.general_methods import EncodeCursor, FindEntriesForUser
+
+class RecordingCollection:
+    # Stands in for a collection to capture the filter; FindEntriesForUser does no I/O itself.
+    def find(self, filter_query):
+        self.filter_query = filter_query
+        return self
+
+    def sort(self, *args):
+        return self
+
+    def skip(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+def test_naive_end_date_combines_with_a_cursor():
+    collection = RecordingCollection()
+    last_value = datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc)
+    cursor = EncodeCursor(last_value, str(ObjectId()))
+
+    FindEntriesForUser(
+        collection, "scheduled_date", "u1",
+        start_date=datetime(2026, 1, 1), end_date=datetime(2026, 12, 31), cursor=cursor
+    )
+
+    bounds = collection.filter_query["scheduled_date"]
+    assert bounds["$gte"] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert bounds["$lte"] == last_value
+
+    FindEntriesForUser(collection, "scheduled_date", "u1", end_date=datetime(2026, 10, 1), cursor=cursor)
+
+    assert collection.filter_query["scheduled_date"]["$lte"] == datetime(2026, 10, 1, tzinfo=timezone.utc)
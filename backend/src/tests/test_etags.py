@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from fastapi import Request
+from lib.misc.etags import IsNotModified, MakeETag
+
+def BuildRequest(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def test_if_none_match_uses_weak_comparison_over_the_tag_list():
+    etag = MakeETag("user-1", 7)
+
+    assert etag == 'W/"user-1.7"'
+    assert IsNotModified(BuildRequest(etag), etag)
+    assert IsNotModified(BuildRequest('"user-1.7"'), etag)
+    assert IsNotModified(BuildRequest('W/"user-1.6", W/"user-1.7"'), etag)
+    assert IsNotModified(BuildRequest("*"), etag)
+    assert not IsNotModified(BuildRequest('W/"user-1.6"'), etag)
+    assert not IsNotModified(BuildRequest('W/"user-2.7"'), etag)
+    assert not IsNotModified(BuildRequest(), etag)
+
+def test_entry_tag_does_not_match_the_list_or_another_entry():
+    etag = MakeETag("user-1", 7, "entry-1")
+
+    assert etag == 'W/"user-1.entry-1.7"'
+    assert IsNotModified(BuildRequest(etag), etag)
+    assert not IsNotModified(BuildRequest(MakeETag("user-1", 7)), etag)
+    assert not IsNotModified(BuildRequest(MakeETag("user-1", 7, "entry-2")), etag)
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from lib.database_lib.workouts.exercise_catalog_cache import ExerciseCatalogCache
+
+def test_read_that_raced_with_a_write_is_not_cached():
+    cache = ExerciseCatalogCache(max_entries=10, ttl_seconds=60)
+    entries, generation = cache.Get("user")
+    assert entries is None
+
+    # A workout write lands between the database read and the Put.
+    cache.Invalidate("user")
+    cache.Put("user", [{"exercise": "Bench Press", "workouts": 1}], generation)
+    assert cache.Get("user")[0] is None
+
+    entries, generation = cache.Get("user")
+    cache.Put("user", [{"exercise": "Bench Press", "workouts": 2}], generation)
+    assert cache.Get("user")[0] == [{"exercise": "Bench Press", "workouts": 2}]
+    assert cache.GetMetrics()["hits"] == 1
@@ -0,0 +1,54 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from lib.misc.hashing_pool import HashingPool, HashingPoolFull
+
+def test_requests_past_the_queue_limit_are_rejected():
+    async def run():
+        pool = HashingPool(max_workers=2, max_queue=1)
+        results = await asyncio.gather(
+            *(pool.Run(time.sleep, 0.1) for _ in range(5)),
+            return_exceptions=True
+        )
+
+        return pool, results
+
+    pool, results = asyncio.run(run())
+    rejected = [r for r in results if isinstance(r, HashingPoolFull)]
+    metrics = pool.GetMetrics()
+
+    assert len(rejected) == 2
+    assert metrics["completed"] == 3
+    assert metrics["rejected"] == 2
+    assert metrics["queue_depth"] == 0
+    assert metrics["hash_latency_ms"]["max"] >= 100
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_finishes():
+    async def run():
+        pool = HashingPool(max_workers=1, max_queue=0)
+        caller = asyncio.create_task(pool.Run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+
+        # The worker is still hashing for the cancelled caller, so there is no room yet.
+        try:
+            await pool.Run(time.sleep, 0)
+            rejected_while_running = False
+        except HashingPoolFull:
+            rejected_while_running = True
+
+        await asyncio.sleep(0.3)
+        await pool.Run(time.sleep, 0)
+
+        return pool, rejected_while_running
+
+    pool, rejected_while_running = asyncio.run(run())
+
+    assert rejected_while_running
+    assert pool.GetMetrics()["completed"] == 2
@@ -0,0 +1,112 @@
+import asyncio
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+import config
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.jobs import job_queue
+from tasks.worker import RunWorker
+
+def test_collapsed_job_is_retried_until_it_succeeds(scratch_db, monkeypatch):
+    monkeypatch.setattr(config, "JOB_BACKOFF_BASE_SECONDS", 0)
+    calls = []
+
+    async def Flaky(user_id, workout_ids):
+        calls.append((user_id, sorted(workout_ids)))
+
+        if len(calls) == 1:
+            raise RuntimeError("SMTP went away")
+
+    async def run():
+        await EnsureIndexes()
+
+        for workout_id in ("a", "b", "a"):
+            await job_queue.Enqueue(
+                "check", {"user_id": "u1"}, dedupe_key="check:u1",
+                merge={"$addToSet": {"payload.workout_ids": workout_id}}
+            )
+
+        counts = await RunWorker(handlers={"check": Flaky}, drain=True)
+        jobs = await GetDb()[job_queue.COLLECTION_NAME].find({}).to_list()
+
+        return counts, jobs
+
+    counts, jobs = asyncio.run(run())
+
+    assert counts == {"succeeded": 1, "failed": 1}
+    assert calls == [("u1", ["a", "b"]), ("u1", ["a", "b"])]
+    assert len(jobs) == 1
+    assert jobs[0]["status"] == job_queue.DONE and jobs[0]["attempts"] == 2
+    assert "SMTP went away" in jobs[0]["last_error"]
+
+def test_jobs_without_a_dedupe_key_do_not_collide(scratch_db):
+    async def run():
+        await EnsureIndexes()
+        await job_queue.Enqueue("check", {"user_id": "u1"})
+        await job_queue.Enqueue("check", {"user_id": "u2"})
+
+        return await GetDb()[job_queue.COLLECTION_NAME].count_documents({})
+
+    assert asyncio.run(run()) == 2
+
+def test_requests_merge_only_into_the_untried_job(scratch_db):
+    async def Enqueue(workout_id):
+        await job_queue.Enqueue(
+            "check", {"user_id": "u1"}, dedupe_key="check:u1",
+            merge={"$addToSet": {"payload.workout_ids": workout_id}}
+        )
+
+    async def run():
+        await EnsureIndexes()
+        await Enqueue("a")
+        await Enqueue("b")
+        claimed = await job_queue.ClaimNextJob(["check"], 60)
+        # The claimed job may have read its data already, so this request gets a job of its own.
+        await Enqueue("c")
+        jobs = await GetDb()[job_queue.COLLECTION_NAME].find({}).sort("_id", 1).to_list()
+
+        return claimed, jobs
+
+    claimed, jobs = asyncio.run(run())
+
+    assert sorted(claimed["payload"]["workout_ids"]) == ["a", "b"]
+    assert [job["status"] for job in jobs] == [job_queue.RUNNING, job_queue.QUEUED]
+    assert jobs[1]["payload"]["workout_ids"] == ["c"]
+
+def test_job_whose_lease_expired_is_claimed_again(scratch_db):
+    async def run():
+        await EnsureIndexes()
+        await job_queue.Enqueue("check", {"user_id": "u1"})
+        # A zero visibility timeout lets the lease lapse as soon as it is taken.
+        first = await job_queue.ClaimNextJob(["check"], 0)
+        second = await job_queue.ClaimNextJob(["check"], 60)
+
+        return first, second, await job_queue.CompleteJob(first), await job_queue.CompleteJob(second)
+
+    first, second, first_completed, second_completed = asyncio.run(run())
+
+    assert second["_id"] == first["_id"] and second["lease"] != first["lease"]
+    assert second["attempts"] == 2
+    assert not first_completed and second_completed
+
+def test_failed_job_waits_out_its_backoff(scratch_db, monkeypatch):
+    monkeypatch.setattr(config, "JOB_BACKOFF_BASE_SECONDS", 60)
+
+    async def run():
+        await EnsureIndexes()
+        await job_queue.Enqueue("check", {"user_id": "u1"})
+        job = await job_queue.ClaimNextJob(["check"], 60)
+        await job_queue.FailJob(job, "boom")
+        stored = await GetDb()[job_queue.COLLECTION_NAME].find_one({"_id": job["_id"]})
+
+        return job, stored, await job_queue.ClaimNextJob(["check"], 60)
+
+    job, stored, reclaimed = asyncio.run(run())
+
+    assert stored["status"] == job_queue.QUEUED and stored["last_error"] == "boom"
+    assert 55 <= (stored["available_at"] - job["updated_at"]).total_seconds() <= 65
+    assert reclaimed is None
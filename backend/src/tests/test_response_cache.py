@@ -0,0 +1,37 @@
+import asyncio
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from lib.misc.response_cache import InMemoryResponseCacheBackend, GetResponseSize
+
+def test_backend_evicts_least_recently_used_by_bytes_and_drops_users():
+    async def Run():
+        body = b"x" * 100
+        keys = [("user-1", "1", "/workouts/?limit=50"), ("user-1", "1", "/routines/?"), ("user-2", "4", "/workouts/?")]
+        size = max(GetResponseSize(key, (body, {})) for key in keys)
+        backend = InMemoryResponseCacheBackend(size * 2)
+
+        await backend.Set(keys[0], (body, {}))
+        await backend.Set(keys[1], (body, {}))
+        assert await backend.Get(keys[0]) == (body, {})
+
+        # The third response only fits once the least recently used one is gone.
+        await backend.Set(keys[2], (body, {}))
+        assert await backend.Get(keys[1]) is None
+        assert await backend.Get(keys[0]) is not None
+        assert backend.GetMetrics()["evictions"] == 1
+
+        assert await backend.DeleteUser("user-1") == 1
+        assert await backend.Get(keys[0]) is None
+        assert await backend.Get(keys[2]) is not None
+
+        # A response larger than the whole cache is not stored.
+        await backend.Set(("user-3", "1", "/workouts/?"), (b"x" * size * 3, {}))
+        metrics = backend.GetMetrics()
+        assert metrics["entries"] == 1
+        assert metrics["bytes"] <= metrics["max_bytes"]
+
+    asyncio.run(Run())
@@ -0,0 +1,32 @@
+import asyncio
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from tests.smtp_sink import SmtpSink
+from lib.misc.smtp_pool import SmtpPool
+
+def test_pool_reuses_connections_and_reconnects_after_a_drop():
+    with SmtpSink() as sink:
+        pool = SmtpPool("127.0.0.1", sink.port, None, None, size=3, max_queue=5, use_starttls=False, timeout=5)
+        messages = [("sender@example.com", f"user{i}@example.com", f"Subject: {i}\r\n\r\nbody {i}") for i in range(40)]
+
+        results = asyncio.run(pool.SendMany(messages))
+
+        assert all(results)
+        assert len(sink.messages) == 40
+        assert sink.connections <= 3
+
+        # The server drops every idle session; the next sends reconnect and still go through.
+        sink.DropConnections()
+        assert asyncio.run(pool.SendMany(messages[:5])) == [True] * 5
+
+        metrics = pool.GetMetrics()
+        pool.Close()
+
+    assert len(sink.messages) == 45
+    assert metrics["sent"] == 45 and metrics["failed"] == 0
+    assert metrics["reconnects"] >= 1
+    assert metrics["messages_per_second"] > 0
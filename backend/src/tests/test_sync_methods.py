@@ -0,0 +1,72 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from bson import ObjectId
+from lib.database_lib.workouts.sync_methods import (
+    BuildChangesQuery, DecodeSyncToken, EncodeSyncToken, InvalidSyncTokenError, SOURCES, TrimPages
+)
+
+def test_sync_tokens_round_trip_and_reject_garbage():
+    since = datetime(2026, 10, 18, 12, 30, 15, 123000, tzinfo=timezone.utc)
+    positions = {name: (since, None) for name in SOURCES} | {"workouts": (since, ObjectId())}
+
+    assert DecodeSyncToken(EncodeSyncToken(positions)) == positions
+
+    with pytest.raises(InvalidSyncTokenError):
+        DecodeSyncToken("not-a-token")
+
+    with pytest.raises(InvalidSyncTokenError):
+        DecodeSyncToken(EncodeSyncToken({name: (since.replace(tzinfo=None), None) for name in SOURCES}))
+
+def test_trim_pages_resumes_each_truncated_page_after_its_last_entry():
+    start = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    page = lambda count, step: [{"updated_at": start + timedelta(seconds=i * step), "_id": ObjectId()} for i in range(count)]
+    pages = {"workouts": page(4, 1), "routines": page(4, 2), "tombstones": page(2, 1)}
+
+    positions = TrimPages(pages, 3)
+
+    assert positions == {
+        "workouts": (pages["workouts"][-1]["updated_at"], pages["workouts"][-1]["_id"]),
+        "routines": (pages["routines"][-1]["updated_at"], pages["routines"][-1]["_id"]),
+    }
+    assert [len(entries) for entries in pages.values()] == [3, 3, 2]
+
+def test_more_changes_than_the_limit_at_one_timestamp_still_make_progress():
+    # A burst stamped in the same millisecond, e.g. an import, larger than one page.
+    stamped = datetime(2026, 10, 18, 9, 0, tzinfo=timezone.utc)
+    burst = sorted(({"updated_at": stamped, "_id": ObjectId()} for _ in range(7)), key=lambda entry: entry["_id"])
+
+    def Matches(entry, query):
+        # Evaluates the query shape BuildChangesQuery produces.
+        if entry["updated_at"] < query["updated_at"]["$gte"]:
+            return False
+
+        if "$or" not in query:
+            return True
+
+        later, same_time = query["$or"]
+
+        return entry["updated_at"] > later["updated_at"]["$gt"] or (
+            entry["updated_at"] == same_time["updated_at"] and entry["_id"] > same_time["_id"]["$gt"]
+        )
+
+    position = (stamped, None)
+    seen = []
+
+    for _ in range(len(burst)):
+        page = [entry for entry in burst if Matches(entry, BuildChangesQuery("u1", position))][:4]
+        resumed = TrimPages({"workouts": page}, 3)
+        seen.extend(page)
+
+        if not resumed:
+            break
+
+        position = DecodeSyncToken(EncodeSyncToken({name: (stamped, None) for name in SOURCES} | resumed))["workouts"]
+
+    assert seen == burst
@@ -0,0 +1,68 @@
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from tasks import weekly_summary
+from lib.database_lib.summaries import weekly_summary_jobs
+
+def StubSlice(monkeypatch, accepted):
+    # Two users with a summary each; SendEmails accepts them according to accepted.
+    calls = {"released": [], "retried": [], "recorded": []}
+    users = [{"_id": "u1", "email": "u1@example.com"}, {"_id": "u2", "email": "u2@example.com"}]
+
+    async def GetSliceUsers(slice_doc):
+        return users
+
+    async def GetDeliveredUserIds(week, user_ids):
+        return set()
+
+    async def BuildWeeklySummaries(pending, now):
+        return [(user["_id"], user["email"], "body") for user in pending]
+
+    async def SendEmails(messages):
+        return [accepted[email] for email, _, _ in messages]
+
+    async def RecordDeliveries(week, user_ids):
+        calls["recorded"].extend(user_ids)
+
+    async def ReleaseSlice(slice_id, done):
+        calls["released"].append(done)
+
+    async def RetrySlice(slice_id, max_attempts, retry_seconds):
+        calls["retried"].append(max_attempts)
+        return True
+
+    monkeypatch.setattr(weekly_summary_jobs, "GetSliceUsers", GetSliceUsers)
+    monkeypatch.setattr(weekly_summary_jobs, "GetDeliveredUserIds", GetDeliveredUserIds)
+    monkeypatch.setattr(weekly_summary_jobs, "RecordDeliveries", RecordDeliveries)
+    monkeypatch.setattr(weekly_summary_jobs, "ReleaseSlice", ReleaseSlice)
+    monkeypatch.setattr(weekly_summary_jobs, "RetrySlice", RetrySlice)
+    monkeypatch.setattr(weekly_summary, "BuildWeeklySummaries", BuildWeeklySummaries)
+    monkeypatch.setattr(weekly_summary, "SendEmails", SendEmails)
+
+    return calls
+
+def RunSlice():
+    return asyncio.run(weekly_summary.ProcessSlice(
+        "2026-W42", datetime.now(timezone.utc), {"_id": "slice"}, time.monotonic() + 60
+    ))
+
+def test_slice_with_a_failed_send_is_left_for_a_retry(monkeypatch):
+    calls = StubSlice(monkeypatch, {"u1@example.com": True, "u2@example.com": False})
+
+    assert RunSlice() == (2, 1, True)
+    assert calls["recorded"] == ["u1"]
+    assert calls["released"] == []
+    assert len(calls["retried"]) == 1
+
+def test_slice_is_closed_once_every_user_is_delivered(monkeypatch):
+    calls = StubSlice(monkeypatch, {"u1@example.com": True, "u2@example.com": True})
+
+    assert RunSlice() == (2, 2, True)
+    assert calls["released"] == [True]
+    assert calls["retried"] == []
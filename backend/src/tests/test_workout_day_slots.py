@@ -0,0 +1,28 @@
+import asyncio
+import sys
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+import config
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import EnsureIndexes
+from lib.database_lib.workouts import workout_methods
+
+def test_concurrent_first_reservations_of_a_day_are_not_refused(scratch_db, monkeypatch):
+    monkeypatch.setattr(config, "MAXIMUM_WORKOUTS_PER_DAY", 3)
+
+    async def run():
+        await EnsureIndexes()
+        reserved = await asyncio.gather(*(
+            workout_methods.ReserveWorkoutSlot("u1", "2026-10-18") for _ in range(5)
+        ))
+        counter = await GetDb()["workout_day_counters"].find_one({"user_id": "u1", "scheduled_day": "2026-10-18"})
+
+        return reserved, counter
+
+    reserved, counter = asyncio.run(run())
+
+    assert sorted(reserved) == [False, False, True, True, True]
+    assert counter["count"] == 3
@@ -0,0 +1,66 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+grandparent_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(grandparent_dir))
+
+from lib.database_lib.database_config import GetDb
+from lib.database_lib.indexes import INDEX_DEFINITIONS
+from lib.database_lib.workouts.general_methods import EncodeCursor, FindEntriesForUser
+
+INDEX_NAME = "workouts_user_id_exercise_name_scheduled_date_id"
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Row"]
+
+def GetStages(plan):
+    # Every stage of a winning plan, in either the classic or the SBE explain format.
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan
+
+        for value in plan.values():
+            yield from GetStages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from GetStages(value)
+
+async def ExplainPages():
+    workouts = GetDb()["workouts"]
+
+    for keys, options in INDEX_DEFINITIONS["workouts"]:
+        await workouts.create_index(keys, **options)
+
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    await workouts.insert_many([
+        {
+            "user_id": f"user-{i % 5}",
+            "scheduled_date": start + timedelta(hours=i),
+            "exercises": [{"name": EXERCISES[i % 3]}, {"name": EXERCISES[i % 3 + 2]}],
+        }
+        for i in range(2000)
+    ])
+
+    plans = []
+    queries = [
+        (["Squat"], None),
+        (["Squat"], EncodeCursor(start + timedelta(hours=1500), "f" * 24)),
+        (["Squat", "Row"], None),
+    ]
+
+    for exercise_names, cursor in queries:
+        find = FindEntriesForUser(
+            workouts, "scheduled_date", "user-1", start, start + timedelta(days=60), exercise_names, cursor, limit=20
+        )
+        plans.append((await find.explain())["queryPlanner"]["winningPlan"])
+
+    return plans
+
+def test_exercise_filter_is_served_in_order_by_its_index(scratch_db):
+    for plan in asyncio.run(ExplainPages()):
+        stages = list(GetStages(plan))
+        index_names = {stage.get("indexName") for stage in stages if stage["stage"] == "IXSCAN"}
+
+        assert index_names == {INDEX_NAME}
+        # Several exercises are merged from their already sorted index ranges, never sorted in memory.
+        assert not any(stage["stage"] == "SORT" for stage in stages)
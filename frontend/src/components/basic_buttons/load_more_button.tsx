@@ -0,0 +1,29 @@
+import type { FC } from "react";
+
+interface LoadMoreButtonProps {
+    hasMore: boolean;
+    isLoadingMore: boolean;
+    loadMore: () => void;
+    label: string;
+}
+
+export const LoadMoreButton: FC<LoadMoreButtonProps> = ({
+    hasMore,
+    isLoadingMore,
+    loadMore,
+    label,
+}) => {
+    if (!hasMore) return null;
+
+    return (
+        <div className="flex justify-center mt-4">
+            <button
+                onClick={loadMore}
+                disabled={isLoadingMore}
+                className="bg-[#2A2A3D] text-white px-4 py-2 rounded-lg hover:bg-gray-600 transition-colors disabled:opacity-50"
+            >
+                {isLoadingMore ? "Loading…" : label}
+            </button>
+        </div>
+    );
+};
@@ -9,6 +9,8 @@ import { RoutineDropdown } from "../dropdowns/routine_dropdown.tsx";
 import Swal from "sweetalert2";
 import { useEffect, useState } from "react";
 import { useRoutines } from "../../contexts/routines";
+import { updateFetchedData } from "../../contexts/use_fetch_data";
+import { invalidateActiveDays } from "../../contexts/use_active_days";
 
 type ValidEditType = "workouts" | "routines";
 
@@ -34,9 +36,10 @@ export function useDeleteItem(editType: ValidEditType) {
         mutationFn: (id: string) =>
             apiClient.delete(`${endpoint}${id}`).then((res) => res.data),
         onSuccess: (_, id) => {
-            queryClient.setQueryData<any[]>([editType], (oldList = []) =>
-                oldList.filter((item: any) => item.id !== id),
+            updateFetchedData<Workout | Routine>(queryClient, editType, (pages) =>
+                pages.map((page) => page.filter((item) => item.id !== id)),
             );
+            if (editType === "workouts") invalidateActiveDays(queryClient);
             Notifications.showSuccess(
                 editType === "workouts" ? "Workout deleted" : "Routine deleted",
             );
@@ -79,10 +82,6 @@ export const CreateAndEdit: React.FC<CreateAndEditProps> = ({
 }) => {
     const endpoint = `/${editType}/`;
     const queryClient = useQueryClient();
-    type EditTypeMap = {
-        workouts: Workout[];
-        routines: Routine[];
-    };
     const [dropdownVisible, setDropdownVisible] = useState(false);
     const [selectedRoutineName, setSelectedRoutineName] = useState("");
 
@@ -143,10 +142,15 @@ export const CreateAndEdit: React.FC<CreateAndEditProps> = ({
                 })
                 .then((res) => res.data),
         onSuccess: (newList: any) => {
-            queryClient.setQueryData<EditTypeMap[typeof editType]>(
-                [editType],
-                (oldList = []) => [...oldList, newList],
+            updateFetchedData<Workout | Routine>(
+                queryClient,
+                editType,
+                (pages) =>
+                    pages.map((page, index) =>
+                        index === pages.length - 1 ? [...page, newList] : page,
+                    ),
             );
+            if (editType === "workouts") invalidateActiveDays(queryClient);
             setSelectedRoutineName("");
             setFormData(defaultFormData);
             setIsCreating(false);
@@ -176,17 +180,19 @@ export const CreateAndEdit: React.FC<CreateAndEditProps> = ({
                 })
                 .then((res) => res.data),
         onSuccess: (updatedWorkout) => {
-            queryClient.setQueryData<Workout[]>(
-                [editType],
-                (oldWorkouts = []) => {
-                    return oldWorkouts.map((workout) => {
-                        if (workout.id === updatedWorkout.id) {
-                            return updatedWorkout;
-                        }
-                        return workout;
-                    });
-                },
+            updateFetchedData<Workout | Routine>(
+                queryClient,
+                editType,
+                (pages) =>
+                    pages.map((page) =>
+                        page.map((workout) =>
+                            workout.id === updatedWorkout.id
+                                ? updatedWorkout
+                                : workout,
+                        ),
+                    ),
             );
+            if (editType === "workouts") invalidateActiveDays(queryClient);
 
             setFormData(defaultFormData);
             setEditingId(null);
@@ -281,7 +281,10 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
             if (response && response.data?.message) {
                 Notifications.showSuccess(response.data?.message);
                 // Redirect to a new page.
-                navigate("/check-inbox", { replace: true });
+                navigate("/check-inbox", {
+                    replace: true,
+                    state: { statusId: response.data?.status_id },
+                });
             }
         } catch (error: any) {
             console.error("Signup error:", error);
@@ -1,12 +1,38 @@
-import { createContext, useContext, type ReactNode } from "react";
+import { createContext, useContext, useMemo, type ReactNode } from "react";
 import { useFetchData } from "./use_fetch_data";
 
+interface LoadMore {
+    hasMore: boolean;
+    isLoadingMore: boolean;
+    loadMore: () => void;
+}
+
 export function createDataProvider<T>(endpoint: string) {
     const Context = createContext<T[] | undefined>(undefined);
+    const LoadMoreContext = createContext<LoadMore | undefined>(undefined);
 
     const Provider = ({ children }: { children: ReactNode }) => {
-        const { data = [] } = useFetchData<T>(endpoint);
-        return <Context.Provider value={data}>{children}</Context.Provider>;
+        const { data, hasNextPage, isFetchingNextPage, fetchNextPage } =
+            useFetchData<T>(endpoint);
+        const items = useMemo(
+            () => (data ? data.pages.flatMap((page) => page.items) : []),
+            [data],
+        );
+        const loadMore = {
+            hasMore: hasNextPage,
+            isLoadingMore: isFetchingNextPage,
+            loadMore: () => {
+                if (hasNextPage && !isFetchingNextPage) fetchNextPage();
+            },
+        };
+
+        return (
+            <Context.Provider value={items}>
+                <LoadMoreContext.Provider value={loadMore}>
+                    {children}
+                </LoadMoreContext.Provider>
+            </Context.Provider>
+        );
     };
 
     const useData = () => {
@@ -16,5 +42,12 @@ export function createDataProvider<T>(endpoint: string) {
         return ctx;
     };
 
-    return { Provider, useData };
+    const useLoadMore = () => {
+        const ctx = useContext(LoadMoreContext);
+        if (!ctx)
+            throw new Error(`useLoadMore must be inside ${endpoint} Provider`);
+        return ctx;
+    };
+
+    return { Provider, useData, useLoadMore };
 }
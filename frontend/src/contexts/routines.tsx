@@ -1,4 +1,7 @@
 import { createDataProvider } from "./create_data_provider";
 
-export const { Provider: RoutinesProvider, useData: useRoutines } =
-    createDataProvider<Routine>("routines");
+export const {
+    Provider: RoutinesProvider,
+    useData: useRoutines,
+    useLoadMore: useRoutinesLoadMore,
+} = createDataProvider<Routine>("routines");
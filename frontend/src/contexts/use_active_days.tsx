@@ -0,0 +1,27 @@
+import { useQuery, type QueryClient } from "@tanstack/react-query";
+import { apiClient } from "../lib/apiclient";
+
+const ACTIVE_DAYS_KEY = "workouts-activity";
+
+// Local days ("YYYY-MM-DD") with at least one workout, from the year before the
+// given one to the year after, read from the server's activity bitmaps so the
+// calendar does not depend on how much of the workout list has been loaded.
+export function useActiveDays(year: number) {
+    return useQuery<Set<string>>({
+        queryKey: [ACTIVE_DAYS_KEY, year],
+        queryFn: async () => {
+            const res = await apiClient.get("/workouts/activity", {
+                params: {
+                    start_date: `${year - 1}-01-01`,
+                    end_date: `${year + 1}-12-31`,
+                },
+            });
+            return new Set<string>(res.data.days);
+        },
+    });
+}
+
+// Refetches the active days after a workout is created, moved or deleted.
+export function invalidateActiveDays(queryClient: QueryClient) {
+    queryClient.invalidateQueries({ queryKey: [ACTIVE_DAYS_KEY] });
+}
@@ -1,12 +1,55 @@
-import { useQuery } from "@tanstack/react-query";
+import {
+    useInfiniteQuery,
+    type InfiniteData,
+    type QueryClient,
+} from "@tanstack/react-query";
 import { apiClient } from "../lib/apiclient";
 
+const PAGE_SIZE = 50;
+
+type Page<T> = { items: T[]; nextCursor?: string };
+type FetchedPages<T> = InfiniteData<Page<T>, string | undefined>;
+
+// Loads the first page of the list; each further keyset page is fetched only when asked for.
 export function useFetchData<T>(endpoint: string) {
-    return useQuery<T[]>({
+    return useInfiniteQuery<
+        Page<T>,
+        Error,
+        FetchedPages<T>,
+        string[],
+        string | undefined
+    >({
         queryKey: [endpoint],
-        queryFn: async () => {
-            const res = await apiClient.get(`/${endpoint}/`);
-            return res.data as T[];
+        initialPageParam: undefined,
+        queryFn: async ({ pageParam }) => {
+            const res = await apiClient.get(`/${endpoint}/`, {
+                params: { limit: PAGE_SIZE, cursor: pageParam },
+            });
+            return {
+                items: res.data as T[],
+                nextCursor: res.headers["x-next-cursor"],
+            };
         },
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
+    });
+}
+
+// Applies a change to the loaded pages of a list, e.g. after a create, update or delete.
+export function updateFetchedData<T>(
+    queryClient: QueryClient,
+    endpoint: string,
+    update: (pages: T[][]) => T[][],
+) {
+    queryClient.setQueryData<FetchedPages<T>>([endpoint], (old) => {
+        if (!old) return old;
+
+        const pages = update(old.pages.map((page) => page.items));
+        return {
+            ...old,
+            pages: old.pages.map((page, index) => ({
+                ...page,
+                items: pages[index],
+            })),
+        };
     });
 }
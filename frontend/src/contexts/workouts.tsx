@@ -1,4 +1,7 @@
 import { createDataProvider } from "./create_data_provider";
 
-export const { Provider: WorkoutsProvider, useData: useWorkouts } =
-    createDataProvider<Workout>("workouts");
+export const {
+    Provider: WorkoutsProvider,
+    useData: useWorkouts,
+    useLoadMore: useWorkoutsLoadMore,
+} = createDataProvider<Workout>("workouts");
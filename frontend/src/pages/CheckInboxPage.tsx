@@ -1,10 +1,20 @@
-import { useEffect } from "react";
-import { useNavigate } from "react-router-dom";
+import { useEffect, useState } from "react";
+import { useLocation, useNavigate } from "react-router-dom";
 import { useAuth } from "../contexts/auth";
+import { unauthenticatedClient } from "../lib/apiclient";
+
+type EmailStatus = "pending" | "sending" | "sent" | "failed";
+
+const STATUS_POLL_INTERVAL_MS = 3000;
+const STATUS_POLL_ATTEMPTS = 20;
 
 const CheckInboxPage = () => {
     const navigate = useNavigate();
+    const location = useLocation();
     const { user, accessToken } = useAuth();
+    // Returned by signup; it names this email without giving away the address.
+    const statusId: string | undefined = location.state?.statusId;
+    const [emailStatus, setEmailStatus] = useState<EmailStatus | null>(null);
 
     useEffect(() => {
         if (user || accessToken) {
@@ -12,6 +22,55 @@ const CheckInboxPage = () => {
         }
     }, [user, accessToken, navigate]);
 
+    // The verification email is sent after signup responds, so its delivery is polled.
+    useEffect(() => {
+        if (!statusId) return;
+
+        let attempts = 0;
+        let stopped = false;
+
+        const poll = async () => {
+            try {
+                const response = await unauthenticatedClient.post(
+                    "/auth/email-status",
+                    { type: "email-confirmation", status_id: statusId },
+                );
+                setEmailStatus(response.data.status);
+
+                if (["sent", "failed"].includes(response.data.status)) {
+                    return;
+                }
+            } catch (error) {
+                return;
+            }
+
+            attempts += 1;
+
+            if (!stopped && attempts < STATUS_POLL_ATTEMPTS) {
+                timer = setTimeout(poll, STATUS_POLL_INTERVAL_MS);
+            }
+        };
+
+        let timer = setTimeout(poll, 0);
+
+        return () => {
+            stopped = true;
+            clearTimeout(timer);
+        };
+    }, [statusId]);
+
+    const getStatusText = () => {
+        if (emailStatus === "failed") {
+            return "We could not send the email. Please sign up again.";
+        }
+
+        if (emailStatus === "pending" || emailStatus === "sending") {
+            return "Sending a link to your email inbox…";
+        }
+
+        return "A link has been sent to your email inbox";
+    };
+
     return (
         <div className="background-primary flex items-center justify-center">
             <div className="max-w-md w-full space-y-8">
@@ -19,9 +78,7 @@ const CheckInboxPage = () => {
                     <h2 className="text-3xl font-bold text-white-900 mb-2">
                         Check your email inbox
                     </h2>
-                    <p className="text-white-800">
-                        A link has been sent to your email inbox
-                    </p>
+                    <p className="text-white-800">{getStatusText()}</p>
                 </div>
             </div>
         </div>
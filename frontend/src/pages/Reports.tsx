@@ -9,6 +9,10 @@ import { DatesLibrary } from "../lib/dates";
 import { Notifications } from "../lib/notifications";
 import { Graph, type GraphPoint, defaultGraphData } from "../components/graph";
 import { useWorkouts } from "../contexts/workouts";
+import { apiClient } from "../lib/apiclient";
+
+// Enough points to show the shape of years of training without crowding the chart.
+const HISTORY_MAX_POINTS = 150;
 
 const Reports: FC = () => {
     type STATUS_TYPE = "none" | "loading" | "error" | "success";
@@ -40,38 +44,51 @@ const Reports: FC = () => {
     const setReportTypeToVolume = () => setReportType("volume");
     const setReportTypeTo1RM = () => setReportType("1rm");
 
-    const fetchAllExercises = () => {
-        const exerciseSet = new Set<string>();
-
-        workouts.forEach((workout) => {
-            workout.exercises.forEach((exercise) => {
-                exerciseSet.add(exercise.name);
+    // The server keeps a catalog of the user's exercise names, most used first.
+    const fetchAllExercises = async () => {
+        try {
+            const res = await apiClient.get("/exercises/", {
+                params: { limit: 500 },
             });
-        });
-
-        setExercises(Array.from(exerciseSet));
+            setExercises(
+                res.data.map((entry: { name: string }) => entry.name),
+            );
+        } catch (err: any) {
+            Notifications.showError(err);
+        }
     };
 
-    const fetchWorkoutsWithSelectedExerciseName = () => {
+    // The server filters by exercise through its index and returns the workouts newest first.
+    const fetchWorkoutsWithSelectedExerciseName = async () => {
         if (!selectedExerciseName) {
             setContainsWorkouts([]);
             setStatus("none");
             return;
         }
 
-        const newContains = workouts
-            .filter((workout) =>
-                workout.exercises.some(
-                    (exerciseObj) => exerciseObj.name == selectedExerciseName,
-                ),
-            )
-            .sort(
-                (a, b) =>
-                    new Date(b.scheduled_date).getTime() -
-                    new Date(a.scheduled_date).getTime(),
-            );
-        setContainsWorkouts(newContains);
-        setStatus("success");
+        setStatus("loading");
+
+        try {
+            const newContains: Workout[] = [];
+            let cursor: string | undefined = undefined;
+
+            do {
+                const res = await apiClient.get("/workouts/", {
+                    params: {
+                        exercise: selectedExerciseName,
+                        limit: 100,
+                        cursor,
+                    },
+                });
+                newContains.push(...(res.data as Workout[]));
+                cursor = res.headers["x-next-cursor"];
+            } while (cursor);
+
+            setContainsWorkouts(newContains);
+            setStatus("success");
+        } catch (err: any) {
+            setStatus("error");
+        }
     };
 
     useEffect(() => {
@@ -79,8 +96,10 @@ const Reports: FC = () => {
     }, [workouts]);
 
     useEffect(() => {
-        fetchWorkoutsWithSelectedExerciseName();
-    }, [workouts, selectedExerciseName]);
+        if (reportType === "contains") {
+            fetchWorkoutsWithSelectedExerciseName();
+        }
+    }, [workouts, selectedExerciseName, reportType]);
 
     useEffect(() => {
         setSelectedExerciseName("");
@@ -141,103 +160,100 @@ const Reports: FC = () => {
         return startDate && endDate && startDate <= endDate;
     };
 
-    const getWorkoutsInPeriod = () => {
-        const inPeriod: Workout[] = [];
-
-        const startStr = DatesLibrary.convertDateToYMD(startDate);
-        const endStr = DatesLibrary.convertDateToYMD(endDate);
-
-        console.log(startStr + ", " + endStr);
-
-        for (let workout of workouts) {
-            const scheduledDateStr = DatesLibrary.convertDateToYMD(new Date(workout.scheduled_date));
-
-            if (scheduledDateStr >= startStr && scheduledDateStr <= endStr) {
-                if (!selectedExerciseName) {
-                    inPeriod.push(workout);
-                } else {
-                    if (
-                        workout.exercises.some(
-                            (exerciseObj) =>
-                                exerciseObj.name == selectedExerciseName,
-                        )
-                    ) {
-                        inPeriod.push(workout);
-                    }
-                }
-            }
+    type ReportResponse = {
+        total: number | null;
+        points: { bucket: string; value: number }[];
+    };
+
+    // The server buckets by the browser's calendar days and returns only the chart points.
+    const computeReport = async (isVolume: boolean) => {
+        const exerciseName = selectedExerciseName;
+        let report: ReportResponse;
+
+        try {
+            const res = await apiClient.get(
+                isVolume ? "/reports/volume" : "/reports/1rm",
+                {
+                    params: {
+                        start_date: DatesLibrary.convertDateToYMD(startDate),
+                        end_date: DatesLibrary.convertDateToYMD(endDate),
+                        exercise: exerciseName || undefined,
+                        time_zone:
+                            Intl.DateTimeFormat().resolvedOptions().timeZone,
+                        bucket: "day",
+                    },
+                },
+            );
+            report = res.data;
+        } catch (err: any) {
+            Notifications.showError(err);
+            return;
         }
 
-        return inPeriod;
+        if (isVolume) {
+            setVolumeReportTotal(report.total ?? 0);
+            setVolumeReportExerciseName(exerciseName);
+        } else {
+            setOneRepMaxExercise(exerciseName || "");
+        }
+
+        if (report.points.length === 0) {
+            setGraphData(defaultGraphData);
+            return;
+        }
+
+        const new_graph_data: GraphPoint[] = report.points.map((point) => ({
+            name: DatesLibrary.formatDateToLocaleDateString(
+                point.bucket + "T00:00:00",
+                true,
+                true,
+            ),
+            amount: point.value,
+        }));
+
+        setGraphData(new_graph_data);
     };
 
-    const computeReport = (isVolume: boolean) => {
-        const inPeriod = getWorkoutsInPeriod();
-        let perDay: { [date: string]: number } = {};
-        let total: number = 0; // For the volume reports.
-
-        for (const entry of inPeriod) {
-            const key = DatesLibrary.convertDateToYMD(new Date(entry.scheduled_date));
-            if (!(key in perDay)) perDay[key] = 0;
-
-            if (isVolume) {
-                for (const exercise of entry.exercises) {
-                    if (
-                        selectedExerciseName !== null &&
-                        selectedExerciseName !== "" &&
-                        exercise.name != selectedExerciseName
-                    ) {
-                        continue;
-                    }
-
-                    const toAdd: number = Math.floor(
-                        exercise.sets * exercise.reps * (exercise.weight || 0),
-                    );
-                    perDay[key] += toAdd;
-                    total += toAdd;
-                }
-            } else {
-                for (const exercise of entry.exercises) {
-                    // The one rep max one requires a selected exercise.
-                    if (exercise.name != selectedExerciseName) {
-                        continue;
-                    }
-
-                    // Epley formula
-                    const weight: number = exercise.weight || 0;
-                    perDay[key] = Math.floor(weight * (1 + exercise.reps / 30));
-                }
-            }
+    // The whole history of one exercise, downsampled by the server to a fixed number of points.
+    const computeHistory = async () => {
+        if (selectedExerciseName == null || selectedExerciseName == "") {
+            Notifications.showError(
+                "Please select an exercise for the 1RM history!",
+            );
+            return;
         }
 
-        perDay = Object.fromEntries(
-            Object.entries(perDay).sort(([a], [b]) => a.localeCompare(b)),
-        );
+        const exerciseName = selectedExerciseName;
+        let history: { date: string; e1rm: number }[];
 
-        if (isVolume) {
-            setVolumeReportTotal(total);
-            setVolumeReportExerciseName(selectedExerciseName);
-        } else {
-            setOneRepMaxExercise(selectedExerciseName || "");
+        try {
+            const res = await apiClient.get(
+                `/exercises/${encodeURIComponent(exerciseName)}/history`,
+                { params: { max_points: HISTORY_MAX_POINTS } },
+            );
+            history = res.data;
+        } catch (err: any) {
+            Notifications.showError(err);
+            return;
         }
 
-        if (perDay.length === 0) {
+        setOneRepMaxExercise(exerciseName);
+
+        if (history.length === 0) {
             setGraphData(defaultGraphData);
             return;
         }
 
-        const new_graph_data: GraphPoint[] = Object.entries(perDay).map(
-            ([day, amt]) => ({
+        setGraphData(
+            history.map((point) => ({
                 name: DatesLibrary.formatDateToLocaleDateString(
-                    day + "T00:00:00",
+                    point.date,
                     true,
                     true,
                 ),
-                amount: amt as number,
-            }),
+                amount: Math.floor(point.e1rm),
+            })),
         );
-
-        setGraphData(new_graph_data);
     };
 
     const generateVolumeOr1RMReport = (isVolume: boolean) => {
@@ -480,6 +496,12 @@ const Reports: FC = () => {
                                 >
                                     Generate Report
                                 </button>
+                                <button
+                                    onClick={computeHistory}
+                                    className="w-full rounded-lg bg-gray-700 px-4 py-2 text-white"
+                                >
+                                    All-time History
+                                </button>
                                 {oneRepMaxExercise !== "" &&
                                     !isEqual(graphData, defaultGraphData) && (
                                         <Graph
@@ -1,9 +1,10 @@
 import { useState, type FC } from "react";
 import { Navbar } from "../components/navbar";
-import { useRoutines } from "../contexts/routines";
+import { useRoutines, useRoutinesLoadMore } from "../contexts/routines";
 import ListedRoutine from "../components/workouts/listed_routine";
 import { Plus } from "lucide-react";
 import { BackButton } from "../components/basic_buttons/back_button";
+import { LoadMoreButton } from "../components/basic_buttons/load_more_button";
 import {
     CreateAndEdit,
     useDeleteItem,
@@ -15,6 +16,7 @@ const Routines: FC = () => {
     const [expandedId, setExpandedId] = useState<string | null>(null);
 
     const routines = useRoutines();
+    const loadMore = useRoutinesLoadMore();
     const deleteWorkoutOrRoutine = useDeleteItem("routines");
     const defaultFormData = {
         name: "",
@@ -51,6 +53,7 @@ const Routines: FC = () => {
                                 </h1>
                                 <p className="text-sm sm:text-base text-gray-600 mt-1">
                                     Total routines: {routines.length}
+                                    {loadMore.hasMore && "+"}
                                 </p>
                             </div>
 
@@ -98,6 +101,10 @@ const Routines: FC = () => {
                                     />
                                 ))}
                             </ul>
+                            <LoadMoreButton
+                                {...loadMore}
+                                label="Load more routines"
+                            />
                         </div>
                     </div>
                 </div>
@@ -5,7 +5,9 @@ import { Navbar } from "../components/navbar.tsx";
 import { CalendarPicker } from "../components/dates/calendar_picker.tsx";
 import { DatesLibrary } from "../lib/dates";
 import { ListedWorkout } from "../components/workouts/listed_workout.tsx";
-import { useWorkouts } from "../contexts/workouts";
+import { useWorkouts, useWorkoutsLoadMore } from "../contexts/workouts";
+import { useActiveDays } from "../contexts/use_active_days";
+import { LoadMoreButton } from "../components/basic_buttons/load_more_button.tsx";
 import { useNavigate } from "react-router";
 import { Card } from "../components/card.tsx";
 import {
@@ -21,6 +23,7 @@ const Workouts: FC = () => {
     const [showCalendarPicker, setShowCalendarPicker] = useState(false);
 
     const workouts = useWorkouts();
+    const loadMore = useWorkoutsLoadMore();
     const navigate = useNavigate();
     const deleteWorkoutOrRoutine = useDeleteItem("workouts");
 
@@ -60,6 +63,11 @@ const Workouts: FC = () => {
         });
     };
 
+    // Each calendar cell is a set lookup into the active days of the years around the selected date.
+    const { data: activeDays = new Set<string>() } = useActiveDays(
+        selectedDate.getFullYear(),
+    );
+
     const changeDayOrMonth = (is_day: boolean, offset: number) => {
         const newDate = new Date(selectedDate);
 
@@ -191,7 +199,9 @@ const Workouts: FC = () => {
                             onSelectDate={setSelectedDate}
                             isOpen={showCalendarPicker}
                             onClose={() => setShowCalendarPicker(false)}
-                            getWorkoutsForDate={getWorkoutsForDate}
+                            showIndicator={(date: Date) =>
+                                activeDays.has(DatesLibrary.convertDateToYMD(date))
+                            }
                         />
                     </div>
                 </div>
@@ -247,6 +257,10 @@ const Workouts: FC = () => {
                                 ),
                             )
                         )}
+                        <LoadMoreButton
+                            {...loadMore}
+                            label="Load older workouts"
+                        />
                     </div>
                 </div>
             </div>